@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import secrets
+import sys
+from datetime import datetime
+from typing import Any, Dict, Literal
+
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from .key_rotation import REENCRYPTION
+from .lead_export import export_fields, export_rows, format_rows, lead_filter
+from .pdf_processing import (
+    build_page_documents,
+    describe_failed_pages,
+    extract_pdf,
+    prune_extraction_cache,
+    save_upload_to_disk,
+    validate_pdf,
+)
+from .profiling import HEAP, SAMPLER, write_collapsed
+from .security import index_key_configured
+from .tenants import normalize_tenant, tenant_dir
+from .vectorstore import (
+    compact_index,
+    delete_document,
+    document_sources,
+    index_stats,
+    replace_document,
+    resident_indexes,
+)
+
+
+def is_admin_request(token: str | None) -> bool:
+    expected = os.environ.get("ADMIN_TOKEN")
+    return bool(expected and token and secrets.compare_digest(token, expected))
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    # Admin surface is off unless ADMIN_TOKEN is configured
+    if not os.environ.get("ADMIN_TOKEN"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_request(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+def tenant_param(tenant: str | None = None) -> str | None:
+    # ?tenant=... selects a tenant's index; omitted means the shared index
+    try:
+        return normalize_tenant(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/profile/start")
+async def start_profile(interval_ms: float = 5.0) -> Dict[str, Any]:
+    started = SAMPLER.start(interval_ms / 1000.0)
+    if not started:
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return {"status": "started", "interval_ms": interval_ms}
+
+
+@router.post("/profile/stop", response_class=PlainTextResponse)
+async def stop_profile():
+    if not SAMPLER.running:
+        raise HTTPException(status_code=409, detail="Profiler is not running")
+    samples = SAMPLER.samples
+    stacks = SAMPLER.stop()
+    path = write_collapsed(stacks, "sampling")
+    body = "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]))
+    return PlainTextResponse(body, headers={"X-Profile-Output": str(path), "X-Profile-Samples": str(samples)})
+
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(frames: int = 10) -> Dict[str, Any]:
+    if not HEAP.start(frames):
+        raise HTTPException(status_code=409, detail="tracemalloc already running")
+    return {"status": "started", "frames": frames}
+
+
+@router.post("/tracemalloc/snapshot")
+async def tracemalloc_snapshot(request: Request, top: int = 25) -> Dict[str, Any]:
+    try:
+        report = HEAP.snapshot(top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    session_state = getattr(request.app.state, "session_state", None)
+    if session_state is not None:
+        report["session_state_entries"] = len(session_state)
+        report["session_state_shallow_kb"] = round(sys.getsizeof(session_state) / 1024, 1)
+    conversations = getattr(request.app.state, "conversations", None)
+    if conversations is not None:
+        report["conversations"] = conversations.stats()
+    return report
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc() -> Dict[str, str]:
+    HEAP.stop()
+    return {"status": "stopped"}
+
+
+def _upload_path(source: str, tenant: str | None) -> str | None:
+    """Path of ``source``'s file in the tenant's upload folder, or None when it is not a plain file name."""
+    if source in ("", ".", "..") or source != os.path.basename(source) or "\\" in source:
+        return None
+    return os.path.join(tenant_dir(os.environ.get("UPLOAD_DIR", "./storage/uploads"), tenant), source)
+
+
+@router.get("/documents")
+async def list_documents(tenant: str | None = Depends(tenant_param)) -> Dict[str, Any]:
+    return {"tenant": tenant, "documents": document_sources(tenant), "index": index_stats(tenant)}
+
+
+@router.delete("/documents/{source:path}")
+def delete_indexed_document(source: str, tenant: str | None = Depends(tenant_param)) -> Dict[str, Any]:
+    removed = delete_document(source, tenant=tenant)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No indexed chunks for '{source}'")
+    # Drop the upload too, or the next reindex.py run would index the document again
+    upload_path = _upload_path(source, tenant)
+    if upload_path and os.path.isfile(upload_path):
+        prune_extraction_cache(upload_path)
+        os.remove(upload_path)
+    return {"source": source, "deleted_chunks": removed}
+
+
+@router.put("/documents/{source:path}")
+async def replace_indexed_document(
+    source: str,
+    file: UploadFile = File(...),
+    tag: str | None = Form(None),
+    tenant: str | None = Depends(tenant_param),
+) -> Dict[str, Any]:
+    upload_path = _upload_path(source, tenant)
+    if upload_path is None:
+        raise HTTPException(status_code=400, detail="source must be a file name without a directory")
+    data = await file.read()
+    ok, err = validate_pdf(source, len(data))
+    if not ok:
+        raise HTTPException(status_code=400, detail=err)
+    save_path = save_upload_to_disk(os.path.dirname(upload_path), source, data)
+    extracted = await asyncio.to_thread(extract_pdf, save_path)
+    texts, metas = build_page_documents(source, extracted.pages, tag=tag)
+    if not texts:
+        raise HTTPException(status_code=400, detail="No extractable text")
+    chunks = await asyncio.to_thread(replace_document, source, texts, metas, tenant=tenant)
+    return {"source": source, "indexed_chunks": chunks, "errors": describe_failed_pages(source, extracted)}
+
+
+@router.post("/index/compact")
+def compact_vector_index(tenant: str | None = Depends(tenant_param)) -> Dict[str, int]:
+    return compact_index(tenant)
+
+
+@router.get("/index/resident")
+async def resident_vector_indexes() -> Dict[str, Any]:
+    return resident_indexes()
+
+
+@router.get("/leads/export")
+def export_leads(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    business_type: Literal["company", "freelancer"] | None = None,
+    fields: str | None = None,
+    pii: Literal["masked", "plain", "none"] = "masked",
+    after: str | None = None,
+    batch_size: int = 500,
+) -> StreamingResponse:
+    # Sync endpoint on purpose: Starlette iterates the blocking generator in a worker thread
+    from bson import ObjectId
+
+    try:
+        columns = export_fields(fields.split(",") if fields else None, pii)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if after is not None and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="'after' must be a lead id")
+    if not 1 <= batch_size <= 10_000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 10000")
+
+    rows = export_rows(lead_filter(since, until, business_type), columns, pii, batch_size, after)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        format_rows(rows, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="leads.{format}"'},
+    )
+
+
+@router.get("/keys/rotation")
+def key_rotation_status() -> Dict[str, Any]:
+    return REENCRYPTION.status()
+
+
+@router.post("/keys/rotation/start")
+def start_key_rotation(batch_size: int | None = None, max_per_sec: float | None = None) -> Dict[str, Any]:
+    # Without its own key the duplicate-lead index hangs off the oldest encryption key,
+    # and removing that key after the rotation would silently change every blind index
+    if not index_key_configured():
+        raise HTTPException(status_code=400, detail="Set PAN_AADHAAR_INDEX_KEY and restart before rotating keys")
+    if not REENCRYPTION.start(batch_size, max_per_sec):
+        raise HTTPException(status_code=409, detail="Key rotation already running")
+    return {"status": "started", **REENCRYPTION.state}
+
+
+@router.post("/keys/rotation/stop")
+def stop_key_rotation() -> Dict[str, str]:
+    if not REENCRYPTION.stop():
+        raise HTTPException(status_code=409, detail="Key rotation is not running")
+    return {"status": "stopping"}
@@ -11,31 +11,37 @@ RE_AADHAAR = re.compile(r"\b(\d{12})\b")
 
 
 def infer_lead_fields_from_message(message: str, current: LeadFields) -> LeadFields:
-    updated = current.copy(deep=True)
+    """``current`` with any fields found in ``message`` filled in.
+
+    Copy-on-write: ``current`` is never modified, and is returned as is when
+    the message adds nothing, so most turns allocate no new lead.
+    """
+    # Field values found in this message; applied in one shallow copy at the end
+    updates: Dict[str, str] = {}
     text = message.strip()
 
     # Full name detection - Let AI handle this intelligently
     # We'll extract the name from the AI's response when it confirms the name
-    if updated.full_name is None:
+    if current.full_name is None:
         # Only detect names when AI explicitly confirms them
         # This prevents false positives like "onboard", "company", etc.
         pass
 
 
     # Business type - Case insensitive
-    if updated.business_type is None:
+    if current.business_type is None:
         text_lower = text.lower()
         if "freelancer" in text_lower or "as a freelancer" in text_lower:
-            updated.business_type = "freelancer"
+            updates["business_type"] = "freelancer"
         elif "company" in text_lower or "pvt" in text_lower or "private limited" in text_lower:
-            updated.business_type = "company"
+            updates["business_type"] = "company"
 
     # Website - Improved detection for various formats
-    if updated.website is None:
+    if current.website is None:
         # First try to find full URLs
         m = re.search(r"https?://\S+", text)
         if m:
-            updated.website = m.group(0)
+            updates["website"] = m.group(0)
         # Handle domain names without protocol
         elif re.search(r"\b([a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}\b", text):
             # Extract domain name
@@ -44,43 +50,45 @@ def infer_lead_fields_from_message(message: str, current: LeadFields) -> LeadFie
                 domain = domain_match.group(0)
                 # Skip common words that might be false positives
                 if domain not in ["example.com", "localhost", "test.com"] and len(domain) > 5:
-                    updated.website = f"https://{domain}"
+                    updates["website"] = f"https://{domain}"
         # Handle specific known websites
         elif "airesponder.xyz" in text.lower():
-            updated.website = "https://airesponder.xyz"
+            updates["website"] = "https://airesponder.xyz"
         elif "ragsu.xyz" in text.lower():
-            updated.website = "https://ragsu.xyz"
+            updates["website"] = "https://ragsu.xyz"
         # Handle website mentioned after colon
         elif "website" in text.lower() and ":" in text:
             parts = text.split(":")
             if len(parts) > 1:
                 website = parts[1].strip().strip(".")
                 if website and not website.startswith("http") and "." in website:
-                    updated.website = f"https://{website}"
+                    updates["website"] = f"https://{website}"
 
     # PAN and Aadhaar - Case insensitive detection
     # First try to find PAN in the text (case insensitive)
     pan_m = RE_PAN.search(text.upper())
     if pan_m:
-        updated.pan = pan_m.group(1).upper()
+        updates["pan"] = pan_m.group(1).upper()
     # Handle PAN mentioned in conversation with any case
     elif "pan" in text.lower():
         # Look for PAN pattern in the text (case insensitive)
         pan_match = re.search(r"\b([A-Za-z]{5}[0-9]{4}[A-Za-z])\b", text)
         if pan_match:
-            updated.pan = pan_match.group(1).upper()  # Convert to uppercase
+            updates["pan"] = pan_match.group(1).upper()  # Convert to uppercase
     # Handle specific PAN patterns mentioned
     elif any(pattern in text.lower() for pattern in ["dfgth", "fghth", "tegyh"]):
         # Look for any PAN-like pattern
         pan_match = re.search(r"\b([A-Za-z]{5}[0-9]{4}[A-Za-z])\b", text)
         if pan_match:
-            updated.pan = pan_match.group(1).upper()  # Convert to uppercase
+            updates["pan"] = pan_match.group(1).upper()  # Convert to uppercase
 
     aad_m = RE_AADHAAR.search(text)
     if aad_m:
-        updated.aadhaar = aad_m.group(1)
+        updates["aadhaar"] = aad_m.group(1)
 
-    return updated
+    # Values already stored (e.g. the same PAN repeated) do not count as changes
+    updates = {k: v for k, v in updates.items() if getattr(current, k) != v}
+    return current.model_copy(update=updates) if updates else current
 
 
 def completion_status(lead: LeadFields) -> Dict[str, bool]:
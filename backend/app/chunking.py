@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+CHUNK_STRATEGIES = ("character", "token", "sentence", "page")
+
+# (size, overlap) per strategy; sizes are characters except for "token"
+DEFAULT_SIZES: Dict[str, tuple[int, int]] = {
+    "character": (1000, 150),
+    "token": (256, 32),
+    "sentence": (1000, 150),
+    "page": (4000, 0),
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+# "3.1.3 GST Registration Requirements", "Chapter 4 ...", "2. Benefits for ..."
+_HEADING = re.compile(r"^(?:chapter\s+\d+|\d+(?:\.\d+)*\.?\s+[A-Z])", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ChunkingSpec:
+    """How an index splits page text into chunks; stored in the index manifest."""
+
+    strategy: str = "character"
+    size: int = 1000
+    overlap: int = 150
+
+    def __post_init__(self) -> None:
+        if self.strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"Chunk strategy must be one of {', '.join(CHUNK_STRATEGIES)}, got '{self.strategy}'")
+        if self.size <= 0 or not 0 <= self.overlap < self.size:
+            raise ValueError(f"Invalid chunk size/overlap {self.size}/{self.overlap}")
+
+    @classmethod
+    def for_strategy(cls, strategy: str, size: int | None = None, overlap: int | None = None) -> "ChunkingSpec":
+        default_size, default_overlap = DEFAULT_SIZES.get(strategy, (1000, 150))
+        return cls(strategy, size if size is not None else default_size,
+                   overlap if overlap is not None else default_overlap)
+
+    @classmethod
+    def parse(cls, value: str) -> "ChunkingSpec":
+        """``strategy[:size[:overlap]]``, e.g. ``token:256:32`` or ``page``."""
+        parts = value.split(":")
+        numbers = [int(p) for p in parts[1:3]]
+        return cls.for_strategy(parts[0].strip().lower(), *numbers)
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any]) -> "ChunkingSpec":
+        return cls(str(raw["strategy"]), int(raw["size"]), int(raw["overlap"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return f"{self.strategy}:{self.size}:{self.overlap}"
+
+
+def default_spec() -> ChunkingSpec:
+    """Chunking for newly created indexes, from CHUNK_STRATEGY / CHUNK_SIZE / CHUNK_OVERLAP."""
+    size = os.environ.get("CHUNK_SIZE")
+    overlap = os.environ.get("CHUNK_OVERLAP")
+    return ChunkingSpec.for_strategy(
+        os.environ.get("CHUNK_STRATEGY", "character").strip().lower(),
+        int(size) if size else None,
+        int(overlap) if overlap else None,
+    )
+
+
+def split_documents(texts: List[str], metadatas: List[dict] | None, spec: ChunkingSpec) -> List[Document]:
+    """Chunk ``texts`` (one per page) into documents that keep their page's metadata."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_core.documents import Document
+
+    if spec.strategy == "character":
+        splitter = RecursiveCharacterTextSplitter(chunk_size=spec.size, chunk_overlap=spec.overlap)
+        return splitter.create_documents(texts, metadatas=metadatas)
+    if spec.strategy == "token":
+        splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name="cl100k_base", chunk_size=spec.size, chunk_overlap=spec.overlap
+        )
+        return splitter.create_documents(texts, metadatas=metadatas)
+
+    # Oversized pages / sentences fall back to plain character splitting without overlap
+    fallback = RecursiveCharacterTextSplitter(chunk_size=spec.size, chunk_overlap=0)
+    docs: List[Document] = []
+    for i, text in enumerate(texts):
+        metadata = metadatas[i] if metadatas else {}
+        if spec.strategy == "page":
+            pieces = [text.strip()] if len(text.strip()) <= spec.size else fallback.split_text(text)
+        else:
+            pieces = _sentence_chunks(text, spec, fallback)
+        docs.extend(Document(page_content=p, metadata=dict(metadata)) for p in pieces if p.strip())
+    return docs
+
+
+def _sentence_chunks(text: str, spec: ChunkingSpec, fallback: Any) -> List[str]:
+    """Pack whole sentences into chunks of up to ``spec.size`` characters.
+
+    A heading line starts a new chunk unless the current one is still under a
+    quarter full. Overlap is whole trailing sentences of the previous chunk,
+    up to ``spec.overlap`` characters.
+    """
+    units: List[tuple[str, bool]] = []
+    for line in (l.strip() for l in text.splitlines()):
+        if not line:
+            continue
+        is_heading = len(line) <= 80 and bool(_HEADING.match(line)) and not line.endswith(".")
+        for j, sentence in enumerate(_SENTENCE_END.split(line)):
+            if len(sentence) > spec.size:
+                units.extend((piece, False) for piece in fallback.split_text(sentence))
+            else:
+                units.append((sentence, is_heading and j == 0))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for sentence, is_heading in units:
+        if current and ((is_heading and length >= spec.size // 4) or length + len(sentence) + 1 > spec.size):
+            chunks.append(" ".join(current))
+            carried: List[str] = []
+            if not is_heading:
+                carried_len = 0
+                for prev in reversed(current):
+                    if carried_len + len(prev) + 1 > spec.overlap:
+                        break
+                    carried.insert(0, prev)
+                    carried_len += len(prev) + 1
+            current, length = carried, sum(len(s) + 1 for s in carried)
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
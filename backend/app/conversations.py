@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Tuple
+
+# (role, content); tuples keep a stored transcript far smaller than Message models or dicts
+Turn = Tuple[str, str]
+
+
+class ConversationStore:
+    """Per-session chat transcripts held by this worker, for ``ChatRequest.message``.
+
+    Sessions are kept in least-recently-used order: beyond ``max_sessions``,
+    or after ``ttl_seconds`` without a turn, the oldest transcripts are
+    dropped. Each transcript keeps only its last ``max_messages`` turns,
+    which is also all the LLM prompt needs.
+    """
+
+    def __init__(self, max_sessions: int, max_messages: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, Tuple[float, List[Turn]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def history(self, session_id: str) -> List[Turn]:
+        """Copy of the stored transcript; empty for an unknown or expired session."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._sessions[session_id]
+                return []
+            return list(entry[1])
+
+    def append(self, session_id: str, *turns: Turn) -> int:
+        """Add ``turns`` to the session's transcript; returns its new length."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            transcript = entry[1] if entry is not None and now - entry[0] <= self.ttl_seconds else []
+            transcript.extend(turns)
+            if len(transcript) > self.max_messages:
+                del transcript[: len(transcript) - self.max_messages]
+            self._sessions[session_id] = (now, transcript)
+            self._evict_locked(now)
+            return len(transcript)
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict_locked(self, now: float) -> None:
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        # Oldest first, so stop at the first session that is still live
+        while self._sessions:
+            session_id, (touched, _transcript) = next(iter(self._sessions.items()))
+            if now - touched <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "messages": sum(len(t) for _ts, t in self._sessions.values()),
+                "chars": sum(len(c) for _ts, t in self._sessions.values() for _r, c in t),
+            }
+
+
+def conversation_store_from_env() -> ConversationStore:
+    return ConversationStore(
+        max_sessions=int(os.environ.get("CHAT_HISTORY_MAX_SESSIONS", "10000")),
+        max_messages=int(os.environ.get("CHAT_HISTORY_MAX_MESSAGES", "40")),
+        ttl_seconds=float(os.environ.get("CHAT_HISTORY_TTL_SECONDS", "3600")),
+    )
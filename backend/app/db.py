@@ -1,17 +1,36 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+
 # Load environment variables if not already loaded
 if not os.environ.get("MONGODB_URI"):
     load_dotenv()
 
 
+_CLIENT: MongoClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
 def get_mongo_client() -> MongoClient:
+    # MongoClient is thread-safe and owns a connection pool; build it once per process
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = _create_mongo_client()
+    return _CLIENT
+
+
+def _create_mongo_client() -> MongoClient:
+    from pymongo import MongoClient
+
     mongo_uri = os.environ.get("MONGODB_URI")
     if not mongo_uri:
         raise ValueError("MONGODB_URI environment variable is required for MongoDB Atlas connection")
@@ -59,6 +78,8 @@ def get_db():
 
 def test_connection() -> bool:
     """Test MongoDB Atlas connection"""
+    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+
     try:
         client = get_mongo_client()
         # Test connection with a ping command
@@ -76,15 +97,121 @@ def test_connection() -> bool:
         return False
 
 
-def insert_lead(lead_doc: Dict[str, Any]) -> str:
-    """Insert lead document into MongoDB Atlas"""
+# Fields a resubmission may change; everything else is kept from the first write
+_UPDATABLE_FIELDS = ("full_name", "business_type", "website")
+
+_INDEXES_READY = False
+
+
+def ensure_indexes() -> None:
+    """Create the ``leads`` indexes the dedupe lookups rely on; safe to repeat."""
+    global _INDEXES_READY
+    from pymongo import ASCENDING
+
+    leads = get_db().leads
+    # One lead per PAN/Aadhaar pair; older leads without blind indexes are left out
+    leads.create_index(
+        [("pan_bidx", ASCENDING), ("aadhaar_bidx", ASCENDING)],
+        name="uniq_pan_aadhaar",
+        unique=True,
+        partialFilterExpression={"pan_bidx": {"$exists": True}, "aadhaar_bidx": {"$exists": True}},
+    )
+    leads.create_index("aadhaar_bidx", name="aadhaar_bidx")
+    leads.create_index(
+        "idempotency_key",
+        name="uniq_idempotency_key",
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$exists": True}},
+    )
+    _INDEXES_READY = True
+
+
+def upsert_lead(lead_doc: Dict[str, Any], idempotency_key: str | None = None) -> Tuple[str, bool]:
+    """Store a lead once per PAN/Aadhaar pair; returns (lead id, created).
+
+    A repeated ``idempotency_key`` returns the lead it first created. A new
+    submission for a known PAN/Aadhaar pair updates the name, business type
+    and website of the existing lead instead of inserting a duplicate.
+    Both checks are single lookups on unique indexes. Raises ValueError when
+    PAN or Aadhaar normalise to nothing, as there is no key to match on.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    if lead_doc.get("pan_bidx") is None or lead_doc.get("aadhaar_bidx") is None:
+        raise ValueError("Lead has no usable PAN/Aadhaar to deduplicate on")
     try:
-        db = get_db()
-        res = db.leads.insert_one(lead_doc)
-        print(f"✅ Lead successfully saved to MongoDB Atlas with ID: {res.inserted_id}")
-        return str(res.inserted_id)
+        if not _INDEXES_READY:
+            ensure_indexes()
+        try:
+            return _upsert_once(lead_doc, idempotency_key)
+        except DuplicateKeyError:
+            # A concurrent submit inserted the same lead first; now it is found
+            return _upsert_once(lead_doc, idempotency_key)
     except Exception as e:
         print(f"❌ Failed to save lead to MongoDB Atlas: {e}")
         raise Exception(f"Database error: {e}")
 
 
+def _upsert_once(lead_doc: Dict[str, Any], idempotency_key: str | None) -> Tuple[str, bool]:
+    leads = get_db().leads
+    if idempotency_key:
+        existing = leads.find_one({"idempotency_key": idempotency_key}, {"_id": 1})
+        if existing is not None:
+            return str(existing["_id"]), False
+
+    key = {"pan_bidx": lead_doc["pan_bidx"], "aadhaar_bidx": lead_doc["aadhaar_bidx"]}
+    now = time.time()
+    on_insert = {k: v for k, v in lead_doc.items() if k not in _UPDATABLE_FIELDS and k not in key}
+    on_insert["created_at"] = now
+    if idempotency_key:
+        on_insert["idempotency_key"] = idempotency_key
+    update = {
+        "$set": {**{k: lead_doc.get(k) for k in _UPDATABLE_FIELDS}, "updated_at": now},
+        "$setOnInsert": on_insert,
+    }
+    res = leads.update_one(key, update, upsert=True)
+    if res.upserted_id is not None:
+        print(f"✅ Lead successfully saved to MongoDB Atlas with ID: {res.upserted_id}")
+        return str(res.upserted_id), True
+    existing = leads.find_one(key, {"_id": 1})
+    print(f"Lead already stored with ID: {existing['_id']}; updated it")
+    return str(existing["_id"]), False
+
+
+def insert_leads(lead_docs: List[Dict[str, Any]]) -> List[Tuple[str | None, str | None]]:
+    """Insert a batch of new leads in one unordered ``insert_many``.
+
+    Returns (lead id, error) per document, in order: error is None for a
+    stored lead and "duplicate" (with the id of the lead already holding
+    that PAN/Aadhaar pair) when the unique index rejected it. Unlike
+    ``upsert_lead``, existing leads are never updated.
+    """
+    from pymongo.errors import BulkWriteError
+
+    if not _INDEXES_READY:
+        ensure_indexes()
+    leads = get_db().leads
+    now = time.time()
+    # insert_many sets _id on each of these
+    docs = [{**doc, "created_at": now} for doc in lead_docs]
+    errors: Dict[int, str] = {}
+    try:
+        leads.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            errors[err["index"]] = "duplicate" if err.get("code") == 11000 else err.get("errmsg", "write failed")
+
+    results: List[Tuple[str | None, str | None]] = [
+        (None, errors[i]) if i in errors else (str(doc["_id"]), None) for i, doc in enumerate(docs)
+    ]
+    duplicates = [i for i, error in errors.items() if error == "duplicate"]
+    if duplicates:
+        # One lookup for the whole batch: which lead holds each rejected pair
+        pans = list({docs[i]["pan_bidx"] for i in duplicates})
+        holders = {
+            (d["pan_bidx"], d["aadhaar_bidx"]): str(d["_id"])
+            for d in leads.find({"pan_bidx": {"$in": pans}}, {"pan_bidx": 1, "aadhaar_bidx": 1})
+        }
+        for i in duplicates:
+            results[i] = (holders.get((docs[i]["pan_bidx"], docs[i]["aadhaar_bidx"])), "duplicate")
+    return results
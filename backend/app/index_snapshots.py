@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+
+
+# On-disk layout, for an index named "faiss_index" under VECTOR_DB_DIR:
+#
+#   faiss_index.manifest.json   {"version": 7, "snapshot": "faiss_index.v000007", "tombstones": [...]}
+#   faiss_index.v000007/        index.faiss, index.pkl[, vectors.f32.npy]
+#   faiss_index.lock            advisory lock held by the single writer
+#   faiss_index/                pre-manifest index, read as version 0 until the first write
+#
+# Snapshots are never modified once the manifest points at them: a writer builds
+# the next version in a temporary directory, renames it into place and then
+# atomically replaces the manifest. Readers only need to stat the manifest to
+# notice a new version.
+
+EXACT_VECTORS_FILE = "vectors.f32.npy"
+LEGACY_TOMBSTONES_FILE = "tombstones.json"
+
+
+@dataclass
+class Manifest:
+    version: int
+    snapshot: str
+    tombstones: List[int] = field(default_factory=list)
+    created_at: float = 0.0
+    # ChunkingSpec.to_dict() the index was built with; None for older indexes
+    chunking: Dict[str, Any] | None = None
+
+
+def manifest_path(base: str) -> str:
+    return base + ".manifest.json"
+
+
+def snapshot_path(base: str, manifest: Manifest) -> str:
+    return os.path.join(os.path.dirname(base), manifest.snapshot)
+
+
+def signature(base: str) -> Tuple[Any, ...] | None:
+    """Cheap change detector: one stat of the manifest (or of the legacy files)."""
+    try:
+        st = os.stat(manifest_path(base))
+        return ("manifest", st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+    try:
+        index_mtime = os.stat(os.path.join(base, "index.faiss")).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        tomb_mtime = os.stat(os.path.join(base, LEGACY_TOMBSTONES_FILE)).st_mtime_ns
+    except OSError:
+        tomb_mtime = 0
+    return ("legacy", index_mtime, tomb_mtime)
+
+
+def read_manifest(base: str) -> Manifest | None:
+    try:
+        with open(manifest_path(base)) as f:
+            raw = json.load(f)
+        return Manifest(int(raw["version"]), raw["snapshot"], list(raw.get("tombstones", [])),
+                        float(raw.get("created_at", 0)), raw.get("chunking"))
+    except FileNotFoundError:
+        pass
+    if not os.path.exists(os.path.join(base, "index.faiss")):
+        return None
+    tombstones: List[int] = []
+    try:
+        with open(os.path.join(base, LEGACY_TOMBSTONES_FILE)) as f:
+            tombstones = list(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return Manifest(0, os.path.basename(base), tombstones)
+
+
+def write_manifest(base: str, manifest: Manifest) -> None:
+    tmp = f"{manifest_path(base)}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump({"version": manifest.version, "snapshot": manifest.snapshot, "tombstones": manifest.tombstones,
+                   "created_at": manifest.created_at, "chunking": manifest.chunking}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, manifest_path(base))
+
+
+_PATH_LOCKS: Dict[str, threading.RLock] = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+_LOCK_STATE = threading.local()
+
+
+def _path_lock(base: str) -> threading.RLock:
+    lock = _PATH_LOCKS.get(base)
+    if lock is None:
+        with _PATH_LOCKS_GUARD:
+            lock = _PATH_LOCKS.setdefault(base, threading.RLock())
+    return lock
+
+
+@contextlib.contextmanager
+def writer_lock(base: str) -> Iterator[None]:
+    """Exclusive writer lock on one index across threads and worker processes (re-entrant per thread).
+
+    Locks are per index path, so writers to different tenants' indexes do not wait on each other.
+    """
+    base = os.path.abspath(base)
+    with _path_lock(base):
+        held = _LOCK_STATE.__dict__.setdefault("held", {})
+        depth, handle = held.get(base, (0, None))
+        if depth == 0:
+            handle = _acquire_file_lock(base + ".lock")
+        held[base] = (depth + 1, handle)
+        try:
+            yield
+        finally:
+            depth, handle = held[base]
+            if depth == 1:
+                del held[base]
+                _release_file_lock(handle)
+            else:
+                held[base] = (depth - 1, handle)
+
+
+def _acquire_file_lock(path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(path, "a+b")
+    try:
+        import fcntl
+
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    except ImportError:  # Windows
+        import msvcrt
+
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                time.sleep(0.05)
+    return handle
+
+
+def _release_file_lock(handle) -> None:
+    try:
+        import fcntl
+
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    except ImportError:
+        import msvcrt
+
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    handle.close()
+
+
+def load_snapshot(base: str, manifest: Manifest, embeddings: Any, mmap: bool,
+                  with_exact: bool = True) -> Tuple[FAISS, np.ndarray | None]:
+    """Load a snapshot; ``mmap`` maps the float32 re-rank sidecar instead of reading it (read-only use).
+
+    The FAISS index itself is always read into memory: faiss-cpu 1.8 reads
+    flat and scalar-quantized indexes fully even with IO_FLAG_MMAP. The
+    sidecar is skipped unless ``with_exact``.
+    """
+    import faiss
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+
+    path = snapshot_path(base, manifest)
+    index = faiss.read_index(os.path.join(path, "index.faiss"))
+    docstore, index_to_docstore_id = _load_docstore(os.path.join(path, "index.pkl"))
+    store = FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    exact = None
+    exact_path = os.path.join(path, EXACT_VECTORS_FILE)
+    if with_exact and os.path.exists(exact_path):
+        exact = np.load(exact_path, mmap_mode="r" if mmap else None)
+        if exact.shape[0] != index.ntotal:
+            print(f"Ignoring {exact_path}: {exact.shape[0]} rows for {index.ntotal} vectors")
+            exact = None
+    return store, exact
+
+
+class _PendingDocument:
+    """Stand-in for a pickled Document whose state this langchain version cannot restore."""
+
+    def __setstate__(self, state: Any) -> None:
+        fields = state.get("__dict__", state) if isinstance(state, dict) else {}
+        self.page_content = fields.get("page_content", "")
+        self.metadata = fields.get("metadata") or {}
+
+
+class _CompatUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        if name == "Document" and module.startswith("langchain"):
+            return _PendingDocument
+        return super().find_class(module, name)
+
+
+def _load_docstore(path: str) -> Tuple[Any, Dict[int, str]]:
+    """``(docstore, index_to_docstore_id)`` from ``index.pkl``.
+
+    Indexes saved by a newer langchain pickle pydantic v2 Documents, which
+    the installed version fails to restore (KeyError on ``__fields_set__``);
+    those are rebuilt from their page_content and metadata.
+    """
+    with open(path, "rb") as f:
+        try:
+            return pickle.load(f)
+        except KeyError:
+            f.seek(0)
+            docstore, index_to_docstore_id = _CompatUnpickler(f).load()
+    from langchain_core.documents import Document
+
+    for doc_id, doc in list(docstore._dict.items()):
+        if isinstance(doc, _PendingDocument):
+            docstore._dict[doc_id] = Document(page_content=doc.page_content, metadata=doc.metadata)
+    return docstore, index_to_docstore_id
+
+
+def write_snapshot(base: str, store: FAISS, exact: np.ndarray | None, tombstones: List[int],
+                   chunking: Dict[str, Any] | None = None) -> Manifest:
+    """Publish ``store`` as the next version. Caller must hold ``writer_lock``.
+
+    ``chunking`` defaults to the current version's, so it is recorded once
+    when an index is created and carried forward.
+    """
+    import numpy as np
+
+    current = read_manifest(base)
+    version = (current.version if current else 0) + 1
+    name = f"{os.path.basename(base)}.v{version:06d}"
+    parent = os.path.dirname(base)
+    os.makedirs(parent or ".", exist_ok=True)
+    tmp = os.path.join(parent, f".{name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    store.save_local(tmp)
+    if exact is not None:
+        with open(os.path.join(tmp, EXACT_VECTORS_FILE), "wb") as f:
+            np.save(f, exact)
+    final = os.path.join(parent, name)
+    shutil.rmtree(final, ignore_errors=True)
+    os.rename(tmp, final)
+
+    if chunking is None and current is not None:
+        chunking = current.chunking
+    manifest = Manifest(version, name, sorted(int(t) for t in tombstones), time.time(), chunking)
+    write_manifest(base, manifest)
+    prune_snapshots(base, keep=int(os.environ.get("VECTOR_SNAPSHOTS_KEEP", "2")))
+    return manifest
+
+
+def update_tombstones(base: str, manifest: Manifest, tombstones: List[int]) -> Manifest:
+    """Point the manifest at the same snapshot with a new tombstone list."""
+    updated = replace(manifest, tombstones=sorted(int(t) for t in tombstones), created_at=time.time())
+    write_manifest(base, updated)
+    return updated
+
+
+def prune_snapshots(base: str, keep: int) -> None:
+    """Delete all but the newest ``keep`` versioned snapshots.
+
+    Workers that already loaded an older snapshot keep their in-memory copy
+    (a mapped re-rank sidecar stays readable after unlinking on POSIX). A
+    worker still loading a snapshot when it is deleted fails that load and
+    retries with the manifest's newer version (see vectorstore._load_from_disk).
+    """
+    parent, prefix = os.path.dirname(base), os.path.basename(base) + ".v"
+    versions = sorted(
+        (d for d in os.listdir(parent) if d.startswith(prefix) and d[len(prefix):].isdigit()),
+        key=lambda d: int(d[len(prefix):]),
+    )
+    for old in versions[: max(0, len(versions) - max(1, keep))]:
+        shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
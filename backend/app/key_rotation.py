@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from .security import blind_index, current_key_id, decrypt_sensitive, key_ids, rotate_sensitive
+
+
+_ENCRYPTED_FIELDS = ("pan", "aadhaar")
+_BLIND_INDEXES = {"pan": "pan_bidx", "aadhaar": "aadhaar_bidx"}
+# Progress is kept in Mongo so a restarted (or different) worker resumes where the last run stopped
+_CHECKPOINT_ID = "leads"
+
+
+class ReencryptionJob:
+    """Background re-encryption of ``leads`` under the newest key of the ring.
+
+    Walks leads whose ``enc_key_id`` is not the current key in ``_id`` order,
+    ``batch_size`` at a time, rewriting each batch with one unordered
+    ``bulk_write`` and pausing between batches to stay under ``max_per_sec``
+    documents per second. Each update is conditional on the token it read,
+    so a lead changed meanwhile is simply picked up by a later run.
+
+    Blind indexes are recomputed with the configured PAN_AADHAAR_INDEX_KEY
+    on the way, which moves leads indexed under the key derived from the
+    oldest encryption key onto it. A lead whose recomputed pair already
+    belongs to another lead is left unchanged and counted in ``conflicts``.
+    """
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.state: Dict[str, Any] = {"status": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, batch_size: int | None = None, max_per_sec: float | None = None) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            batch_size = batch_size or int(os.environ.get("KEY_ROTATION_BATCH_SIZE", "200"))
+            max_per_sec = max_per_sec or float(os.environ.get("KEY_ROTATION_MAX_PER_SEC", "500"))
+            self._stop.clear()
+            self.state = {"status": "running", "target_key_id": current_key_id(), "scanned": 0,
+                          "rotated": 0, "failed": 0, "conflicts": 0, "batches": 0, "started_at": time.time()}
+            self._thread = threading.Thread(target=self._run, args=(batch_size, max_per_sec),
+                                            name="key-rotation", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        if not self.running:
+            return False
+        self._stop.set()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        from .db import get_db
+
+        report: Dict[str, Any] = {"job": dict(self.state), "key_ids": key_ids()}
+        try:
+            report["checkpoint"] = get_db().key_rotation.find_one({"_id": _CHECKPOINT_ID})
+            if report["checkpoint"] and report["checkpoint"].get("last_id") is not None:
+                report["checkpoint"]["last_id"] = str(report["checkpoint"]["last_id"])
+            report["remaining"] = get_db().leads.count_documents({"enc_key_id": {"$ne": current_key_id()}})
+        except Exception as e:
+            report["error"] = str(e)
+        return report
+
+    def _run(self, batch_size: int, max_per_sec: float) -> None:
+        try:
+            self._rotate_all(batch_size, max_per_sec)
+            self.state["status"] = "stopped" if self._stop.is_set() else "done"
+        except Exception as e:
+            self.state.update(status="failed", error=str(e))
+            print(f"Key rotation failed: {e}")
+        self.state["finished_at"] = time.time()
+        print(f"Key rotation {self.state['status']}: {self.state['rotated']} leads re-encrypted, "
+              f"{self.state['failed']} unreadable, {self.state['conflicts']} duplicate PAN/Aadhaar conflicts")
+
+    def _rotate_all(self, batch_size: int, max_per_sec: float) -> None:
+        from pymongo.errors import BulkWriteError
+
+        from .db import get_db
+
+        db = get_db()
+        target = self.state["target_key_id"]
+        checkpoint = db.key_rotation.find_one({"_id": _CHECKPOINT_ID}) or {}
+        # A checkpoint for an older target key is stale: leads after it may have been written with that key
+        last_id = checkpoint.get("last_id") if checkpoint.get("target_key_id") == target else None
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            query: Dict[str, Any] = {"enc_key_id": {"$ne": target}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            fields = [*_ENCRYPTED_FIELDS, *_BLIND_INDEXES.values()]
+            page = list(db.leads.find(query, {f: 1 for f in fields}).sort("_id", 1).limit(batch_size))
+            if not page:
+                break
+            ops = self._updates(page, target)
+            conflicts = 0
+            if ops:
+                try:
+                    db.leads.bulk_write(ops, ordered=False)
+                except BulkWriteError as e:
+                    # The other writes of the batch still went through
+                    errors = e.details.get("writeErrors", [])
+                    conflicts = sum(1 for err in errors if err.get("code") == 11000)
+                    if conflicts < len(errors):
+                        raise
+            last_id = page[-1]["_id"]
+            self.state["scanned"] += len(page)
+            self.state["rotated"] += len(ops) - conflicts
+            self.state["conflicts"] += conflicts
+            self.state["batches"] += 1
+            self.state["last_id"] = str(last_id)
+            db.key_rotation.update_one(
+                {"_id": _CHECKPOINT_ID},
+                {"$set": {"target_key_id": target, "last_id": last_id, "updated_at": time.time(),
+                          **{k: self.state[k] for k in ("scanned", "rotated", "failed", "conflicts")}}},
+                upsert=True,
+            )
+            # Throttle so the job never competes with request traffic for Mongo
+            pause = len(page) / max_per_sec - (time.perf_counter() - started)
+            if pause > 0:
+                self._stop.wait(pause)
+
+    def _updates(self, page: List[Dict[str, Any]], target: str) -> List[Any]:
+        from cryptography.fernet import InvalidToken
+        from pymongo import UpdateOne
+
+        ops = []
+        for doc in page:
+            try:
+                rotated = {f: rotate_sensitive(doc.get(f)) for f in _ENCRYPTED_FIELDS}
+            except InvalidToken:
+                # Encrypted with a key no longer in the ring; left as is and counted
+                self.state["failed"] += 1
+                continue
+            update = {**rotated, "enc_key_id": target}
+            for field, bidx in _BLIND_INDEXES.items():
+                value = blind_index(field, decrypt_sensitive(doc.get(field)))
+                if value is not None and value != doc.get(bidx):
+                    update[bidx] = value
+            unchanged = {"_id": doc["_id"], **{f: doc.get(f) for f in _ENCRYPTED_FIELDS}}
+            ops.append(UpdateOne(unchanged, {"$set": update}))
+        return ops
+
+
+REENCRYPTION = ReencryptionJob()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Sequence
+
+from .security import decrypt_sensitive, mask_sensitive
+
+
+EXPORT_FORMATS = ("ndjson", "csv")
+# none: leave PAN/Aadhaar out entirely (nothing is decrypted)
+PII_MODES = ("masked", "plain", "none")
+EXPORT_FIELDS = ("id", "created_at", "session_id", "full_name", "business_type", "website", "pan", "aadhaar")
+_ENCRYPTED_FIELDS = ("pan", "aadhaar")
+
+
+def lead_filter(since: datetime | None = None, until: datetime | None = None,
+                business_type: str | None = None) -> Dict[str, Any]:
+    """Mongo filter for an export; dates are matched on the ObjectId timestamp, so no extra index is needed."""
+    from bson import ObjectId
+
+    query: Dict[str, Any] = {}
+    id_range: Dict[str, Any] = {}
+    if since is not None:
+        id_range["$gte"] = ObjectId.from_datetime(_as_utc(since))
+    if until is not None:
+        id_range["$lt"] = ObjectId.from_datetime(_as_utc(until))
+    if id_range:
+        query["_id"] = id_range
+    if business_type:
+        query["business_type"] = business_type
+    return query
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def iter_lead_pages(query: Dict[str, Any], fields: Sequence[str], batch_size: int = 500,
+                    after: str | None = None) -> Iterator[List[Dict[str, Any]]]:
+    """Pages of raw lead documents in ``_id`` order.
+
+    Each page is a fresh ``_id > last`` range query, so no server cursor is
+    held between pages and an export can resume from any ``after`` id.
+    """
+    from bson import ObjectId
+
+    from .db import get_db
+
+    leads = get_db().leads
+    projection = {f: 1 for f in fields if f not in ("id", "created_at")}
+    projection["_id"] = 1
+    last = ObjectId(after) if after else None
+    while True:
+        id_range = dict(query.get("_id", {}))
+        if last is not None:
+            id_range.pop("$gte", None)
+            id_range["$gt"] = last
+        page_query = {**query, "_id": id_range} if id_range else query
+        page = list(leads.find(page_query, projection).sort("_id", 1).limit(batch_size))
+        if not page:
+            return
+        yield page
+        if len(page) < batch_size:
+            return
+        last = page[-1]["_id"]
+
+
+def export_fields(fields: Sequence[str] | None, pii: str) -> List[str]:
+    """Validated output columns; PAN/Aadhaar are dropped for ``pii="none"``."""
+    if pii not in PII_MODES:
+        raise ValueError(f"pii must be one of {', '.join(PII_MODES)}, got '{pii}'")
+    fields = list(fields or EXPORT_FIELDS)
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown)}")
+    return [f for f in fields if not (pii == "none" and f in _ENCRYPTED_FIELDS)]
+
+
+def _decrypt(value: str | None, pii: str) -> str | None:
+    plain = decrypt_sensitive(value)
+    return mask_sensitive(plain) if pii == "masked" else plain
+
+
+def export_rows(query: Dict[str, Any], fields: Sequence[str] = EXPORT_FIELDS, pii: str = "masked",
+                batch_size: int = 500, after: str | None = None,
+                workers: int | None = None) -> Iterator[List[Dict[str, Any]]]:
+    """Pages of export rows: ``fields`` only, ids as strings, PAN/Aadhaar decrypted per ``pii``.
+
+    Decryption of a page is spread over a thread pool while the next page is
+    fetched, so memory stays at about two pages whatever the collection size.
+    """
+    fields = export_fields(fields, pii)
+    encrypted = [f for f in fields if f in _ENCRYPTED_FIELDS]
+    workers = workers or int(os.environ.get("EXPORT_DECRYPT_WORKERS", "4"))
+
+    def convert(doc: Dict[str, Any]) -> Dict[str, Any]:
+        row: Dict[str, Any] = {}
+        for f in fields:
+            if f == "id":
+                row[f] = str(doc["_id"])
+            elif f == "created_at":
+                row[f] = doc["_id"].generation_time.isoformat()
+            elif f in encrypted:
+                row[f] = _decrypt(doc.get(f), pii)
+            else:
+                row[f] = doc.get(f)
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="lead-export") as pool:
+        pages = iter_lead_pages(query, fields, batch_size, after)
+        pending = pool.submit(next, pages, None)
+        while True:
+            page = pending.result()
+            if page is None:
+                return
+            # Fetch the next page from Mongo while this one is decrypted
+            pending = pool.submit(next, pages, None)
+            chunk = max(1, len(page) // max(1, workers)) if encrypted else len(page)
+            yield list(pool.map(convert, page, chunksize=chunk))
+
+
+def format_rows(pages: Iterator[List[Dict[str, Any]]], fields: Sequence[str], fmt: str = "ndjson") -> Iterator[str]:
+    """Serialise row pages as NDJSON lines or CSV (with a header), one text chunk per page."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}, got '{fmt}'")
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(fields), extrasaction="ignore")
+        writer.writeheader()
+        yield buffer.getvalue()
+        for page in pages:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(page)
+            yield buffer.getvalue()
+        return
+    for page in pages:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in page)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .chat_logic import RE_AADHAAR, RE_PAN
+from .schemas import LeadFields
+
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_FIELDS = ("session_id", "full_name", "business_type", "website", "pan", "aadhaar")
+REQUIRED_FIELDS = ("full_name", "business_type", "pan", "aadhaar")
+
+
+def import_format(content_type: str | None) -> str:
+    """Body format from the Content-Type header; NDJSON unless it says CSV."""
+    return "csv" if content_type and "csv" in content_type.lower() else "ndjson"
+
+
+class LineTooLongError(ValueError):
+    """A line of an imported body is longer than the configured limit."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int | None = None) -> AsyncIterator[str]:
+    """Lines of a streamed body, decoded as they complete, without holding the whole body.
+
+    Raises LineTooLongError as soon as a line grows past ``max_line_bytes``,
+    so a body without newlines is never buffered whole.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        if b"\n" in chunk:
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if max_line_bytes is not None and len(line) > max_line_bytes:
+                    raise LineTooLongError(f"line longer than {max_line_bytes} bytes")
+                yield line.decode("utf-8", errors="replace").rstrip("\r")
+        if max_line_bytes is not None and len(buffer) > max_line_bytes:
+            raise LineTooLongError(f"line longer than {max_line_bytes} bytes")
+    if buffer:
+        yield buffer.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str,
+                       max_line_bytes: int | None = None) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """(row number, record, parse error) per non-blank line of a CSV or NDJSON body.
+
+    One record per line: CSV fields may be quoted but not span lines. Row
+    numbers count data rows from 1, so the CSV header is not a row. Raises
+    ValueError when the CSV header lacks a required column or is longer than
+    ``max_line_bytes``. A longer data row is reported as the last row: the
+    rest of the body is not read.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(IMPORT_FORMATS)}, got '{fmt}'")
+    header: List[str] | None = None
+    row = 0
+    try:
+        async for line in iter_lines(chunks, max_line_bytes):
+            if header is None and row == 0:
+                line = line.lstrip("\ufeff")
+            if not line.strip():
+                continue
+            if fmt == "csv" and header is None:
+                header = [h.strip().lower() for h in next(csv.reader([line]))]
+                missing = [f for f in REQUIRED_FIELDS if f not in header]
+                if missing:
+                    raise ValueError(f"CSV header is missing {', '.join(missing)}")
+                continue
+            row += 1
+            try:
+                if fmt == "csv":
+                    values = next(csv.reader([line]))
+                    if len(values) > len(header):
+                        raise ValueError(f"{len(values)} columns, header has {len(header)}")
+                    record = dict(zip(header, values))
+                else:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("expected a JSON object")
+            except (ValueError, csv.Error) as e:
+                yield row, None, f"unreadable row: {e}"
+                continue
+            yield row, record, None
+    except LineTooLongError as e:
+        if fmt == "csv" and header is None:
+            raise
+        yield row + 1, None, f"{e}; this and later rows were not read"
+
+def validate_lead(record: Dict[str, Any]) -> LeadFields:
+    """A complete lead from an imported record, or ValueError saying what is wrong.
+
+    Stricter than the chat flow: every required field must be present and
+    PAN/Aadhaar must match the patterns the chat extracts them with.
+    """
+    values = {}
+    for field in IMPORT_FIELDS[1:]:
+        value = record.get(field)
+        values[field] = str(value).strip() if value not in (None, "") else None
+    missing = [f for f in REQUIRED_FIELDS if not values[f]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    values["business_type"] = values["business_type"].lower()
+    try:
+        lead = LeadFields(**values)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+    if not RE_PAN.fullmatch(lead.pan):
+        raise ValueError("pan: expected 5 letters, 4 digits and a letter")
+    if not RE_AADHAAR.fullmatch(lead.aadhaar):
+        raise ValueError("aadhaar: expected 12 digits")
+    return lead
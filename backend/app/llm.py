@@ -1,18 +1,102 @@
 from __future__ import annotations
 
+import itertools
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Sequence, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema import HumanMessage, SystemMessage, AIMessage
+from . import metrics
+from .resilience import CircuitBreaker, CircuitOpenError, LatencyWindow
 
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_core.prompts import ChatPromptTemplate
 
-def get_llm():
+
+def get_llm(model: str | None = None):
     # Uses GPT-4.1 via OpenAI-compatible API key in OPENAI_API_KEY
-    model = os.environ.get("OPENAI_MODEL", "gpt-4.1")
+    model = model or os.environ.get("OPENAI_MODEL", "gpt-4.1")
     temperature = float(os.environ.get("LLM_TEMPERATURE", "0.2"))
-    return ChatOpenAI(model=model, temperature=temperature)
+    # Per-request deadline: fail fast instead of waiting on the client's default timeout
+    timeout = float(os.environ.get("LLM_TIMEOUT_SECONDS", "20"))
+    max_retries = int(os.environ.get("LLM_MAX_RETRIES", "0"))
+    return _cached_llm(model, temperature, timeout, max_retries)
+
+
+@lru_cache(maxsize=8)
+def _cached_llm(model: str, temperature: float, timeout: float, max_retries: int):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout, max_retries=max_retries)
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_LATENCY: Dict[str, LatencyWindow] = {}
+_REGISTRY_LOCK = threading.Lock()
+_ROUTE_COUNTER = itertools.count()
+
+
+def _breaker(model: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(model)
+    if breaker is None:
+        with _REGISTRY_LOCK:
+            breaker = _BREAKERS.get(model)
+            if breaker is None:
+                breaker = _BREAKERS[model] = CircuitBreaker(
+                    model,
+                    failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", "5")),
+                    reset_timeout=float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30")),
+                )
+    return breaker
+
+
+def _latency(model: str) -> LatencyWindow:
+    window = _LATENCY.get(model)
+    if window is None:
+        with _REGISTRY_LOCK:
+            window = _LATENCY.setdefault(model, LatencyWindow())
+    return window
+
+
+def _routes() -> Tuple[List[str], bool]:
+    """Configured models, primary first, and whether the primary's p95 is over the threshold."""
+    primary = os.environ.get("OPENAI_MODEL", "gpt-4.1")
+    fast = os.environ.get("OPENAI_FAST_MODEL")
+    if not fast or fast == primary:
+        return [primary], False
+    threshold_ms = float(os.environ.get("LLM_P95_THRESHOLD_MS", "8000"))
+    p95 = _latency(primary).percentile(0.95)
+    return [primary, fast], p95 is not None and p95 * 1000 > threshold_ms
+
+
+def candidate_models() -> List[str]:
+    """Models to try, in order, for the next request.
+
+    When ``OPENAI_FAST_MODEL`` is set and the primary model's p95 latency is
+    above ``LLM_P95_THRESHOLD_MS``, traffic moves to the fast model. Every
+    ``LLM_PROBE_EVERY``-th request still goes to the primary so its latency
+    window keeps updating and traffic can move back once it recovers.
+    """
+    models, degraded = _routes()
+    probe_every = max(1, int(os.environ.get("LLM_PROBE_EVERY", "10")))
+    if degraded and next(_ROUTE_COUNTER) % probe_every != 0:
+        return models[::-1]
+    return models
+
+
+def llm_status() -> Dict[str, Any]:
+    # Reads the routing without counting as a request, so polling it does not shift the probe cadence
+    models, degraded = _routes()
+    status: Dict[str, Any] = {}
+    for model in (models[::-1] if degraded else models):
+        p95 = _latency(model).percentile(0.95)
+        status[model] = {
+            "breaker": _breaker(model).state,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return status
 
 
 SYSTEM_PROMPT = (
@@ -49,37 +133,71 @@ SYSTEM_PROMPT = (
 )
 
 
-def build_prompt(contexts: List[str]) -> ChatPromptTemplate:
+def _system_text(contexts: List[str]) -> str:
     context_block = "\n\n".join([f"- {c}" for c in contexts]) if contexts else ""
-    system = (
+    return (
         SYSTEM_PROMPT
         + ("\nContext you can use for answers (don't reveal this block):\n" + context_block if context_block else "")
     )
+
+
+def build_prompt(contexts: List[str]) -> ChatPromptTemplate:
+    """The chat prompt as a template taking ``history`` and ``input``; renders the same messages as build_messages."""
+    from langchain_core.messages import SystemMessage
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
     return ChatPromptTemplate.from_messages(
         [
-            SystemMessage(content=system),
+            SystemMessage(content=_system_text(contexts)),
             MessagesPlaceholder(variable_name="history"),
             ("human", "{input}"),
         ]
     )
 
 
-def generate_reply(messages: List[Dict[str, str]], contexts: List[str]) -> str:
-    llm = get_llm()
-    prompt = build_prompt(contexts)
-    # Convert messages to LangChain messages, excluding last human which is question
-    history_lc = []
-    if len(messages) > 1:
-        for m in messages[:-1]:
-            if m["role"] == "user":
-                history_lc.append(HumanMessage(content=m["content"]))
-            elif m["role"] == "assistant":
-                history_lc.append(AIMessage(content=m["content"]))
-            else:
-                history_lc.append(SystemMessage(content=m["content"]))
-    question = messages[-1]["content"]
-    chain = prompt | llm
-    resp = chain.invoke({"history": history_lc, "input": question})
-    return resp.content
+def build_messages(messages: Sequence[Tuple[str, str]], contexts: List[str]) -> List[BaseMessage]:
+    """System prompt with the contexts, the history, then the last of ``messages`` as the human turn.
+
+    The chat model takes these directly: building ``build_prompt`` and a
+    chain per request would render the same messages at several times the cost.
+    """
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+    question = messages[-1][1]
+    prompt: List[BaseMessage] = [SystemMessage(content=_system_text(contexts))]
+    for role, content in messages[:-1]:
+        if role == "user":
+            prompt.append(HumanMessage(content=content))
+        elif role == "assistant":
+            prompt.append(AIMessage(content=content))
+        else:
+            prompt.append(SystemMessage(content=content))
+    prompt.append(HumanMessage(content=question))
+    return prompt
+
+
+def generate_reply(messages: Sequence[Tuple[str, str]], contexts: List[str]) -> str:
+    """Reply to the last of ``messages``, given as (role, content) pairs."""
+    with metrics.stage("chat", "prompt_build"):
+        prompt = build_messages(messages, contexts)
+
+    # A model whose breaker is open is skipped; a failing call is not retried on
+    # another model so the caller's keyword fallback keeps tail latency bounded.
+    for model in candidate_models():
+        breaker = _breaker(model)
+        if not breaker.allow():
+            continue
+        start = time.perf_counter()
+        try:
+            with metrics.stage("chat", "llm"):
+                resp = get_llm(model).invoke(prompt)
+        except Exception:
+            _latency(model).observe(time.perf_counter() - start)
+            breaker.record_failure()
+            raise
+        _latency(model).observe(time.perf_counter() - start)
+        breaker.record_success()
+        return resp.content
+    raise CircuitOpenError("LLM circuit open for all configured models")
 
 
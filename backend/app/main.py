@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, List
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Tuple
 from dotenv import load_dotenv
 import pathlib
-import os
 import re
+import time
 
 # Load environment variables from .env file
 # Try multiple paths to find .env file
@@ -13,7 +17,6 @@ env_paths = [
     pathlib.Path(__file__).parent.parent / '.env',  # backend/.env
     pathlib.Path(__file__).parent / '.env',         # backend/app/.env
     pathlib.Path.cwd() / '.env',                    # Current working directory
-    '.env'                                          # Relative to current directory
 ]
 
 env_loaded = False
@@ -32,17 +35,39 @@ if not env_loaded:
 
 
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from .schemas import ChatRequest, ChatResponse, LeadFields, LeadSubmitRequest, UploadResponse, RetrievedContext
-from .vectorstore import index_texts, similarity_search
-from .pdf_processing import extract_text_from_pdf, validate_pdf, save_upload_to_disk
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+
+# Heavy dependencies (langchain, FAISS, PyPDF2, pymongo, cryptography) are imported
+# lazily by these modules and pre-loaded by the lifespan warm-up below.
+
+from .schemas import (
+    BulkLeadResult,
+    BulkSubmitResponse,
+    ChatRequest,
+    ChatResponse,
+    LeadFields,
+    LeadSubmitRequest,
+    RetrievedContext,
+    UploadResponse,
+)
+from .vectorstore import index_texts, replace_document, similarity_search_with_scores
+from .rerank import ScoredChunk, candidate_count, rerank
+from .pdf_processing import build_page_documents, describe_failed_pages, extract_pdf, validate_pdf, save_upload_to_disk
 from .chat_logic import infer_lead_fields_from_message, completion_status
-from .llm import generate_reply
-from .security import encrypt_sensitive
-from .db import insert_lead, test_connection
+from .conversations import conversation_store_from_env
+from .llm import generate_reply, llm_status
+from .resilience import CircuitOpenError
+from . import metrics
+from .admin import router as admin_router, is_admin_request
+from .profiling import RequestProfile
+from .security import blind_index, current_key_id, encrypt_sensitive
+from .db import insert_leads, test_connection, upsert_lead
+from .lead_import import import_format, iter_records, validate_lead
+from .startup import WarmupState, warm_up
+from .tenants import normalize_tenant, tenant_dir
 
 
 def is_likely_full_name(text: str) -> bool:
@@ -102,7 +127,40 @@ def is_likely_full_name(text: str) -> bool:
     return True
 
 
-app = FastAPI(title="AI Hackathon Backend", version="0.1.0")
+WARMUP = WarmupState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start listening immediately; /ready flips once the warm-up has finished
+    task = asyncio.create_task(warm_up(WARMUP)) if WARMUP.enabled else None
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+
+
+def default_response_class() -> type[JSONResponse]:
+    """ORJSONResponse when orjson is installed (it is optional); it encodes several times faster than json."""
+    try:
+        import orjson  # noqa: F401
+        from fastapi.responses import ORJSONResponse
+    except ImportError:
+        return JSONResponse
+    return ORJSONResponse
+
+
+def model_response(model: BaseModel) -> Response:
+    """JSON response serialised by pydantic in one pass, for models an endpoint built from trusted values.
+
+    Returned as is, FastAPI would dump the model, validate it again against
+    ``response_model`` and encode the result; ``response_model`` still
+    documents the endpoint.
+    """
+    return Response(content=model.__pydantic_serializer__.to_json(model), media_type="application/json")
+
+
+app = FastAPI(title="AI Hackathon Backend", version="0.1.0", lifespan=lifespan,
+              default_response_class=default_response_class())
 
 origins = os.environ.get("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173").split(",")
 app.add_middleware(
@@ -114,29 +172,109 @@ app.add_middleware(
 )
 
 
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def record_request_duration(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            path=getattr(route, "path", "unmatched"),
+            status=str(response.status_code),
+        )
+        return response
+
+
+if os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes"):
+    @app.middleware("http")
+    async def profile_tagged_request(request: Request, call_next):
+        # Opt-in per request: "X-Profile: 1" plus a valid X-Admin-Token.
+        # The profiler sees everything the event loop runs meanwhile, so
+        # profile under light traffic for clean per-request attribution.
+        if request.headers.get("x-profile") != "1" or not is_admin_request(request.headers.get("x-admin-token")):
+            return await call_next(request)
+        profile = RequestProfile(request.url.path)
+        with profile:
+            response = await call_next(request)
+        response.headers["X-Profile-Output"] = str(profile.dump())
+        return response
+
+
 SESSION_STATE: Dict[str, LeadFields] = {}
+app.state.session_state = SESSION_STATE
+# Transcripts for clients that send only the new message (ChatRequest.message)
+CONVERSATIONS = conversation_store_from_env()
+app.state.conversations = CONVERSATIONS
+app.include_router(admin_router)
+
+
+def lead_document(session_id: str, lead: LeadFields) -> Dict[str, Any]:
+    """Mongo document for a lead: PAN/Aadhaar encrypted, plus their blind indexes for dedupe."""
+    return {
+        "session_id": session_id,
+        "full_name": lead.full_name,
+        "business_type": lead.business_type,
+        "website": lead.website,
+        "pan": encrypt_sensitive(lead.pan),
+        "aadhaar": encrypt_sensitive(lead.aadhaar),
+        "enc_key_id": current_key_id(),
+        "pan_bidx": blind_index("pan", lead.pan),
+        "aadhaar_bidx": blind_index("aadhaar", lead.aadhaar),
+    }
+
+
+def _retrieve(query_text: str, filters: Dict[str, Any] | None, tenant: str | None) -> List[ScoredChunk]:
+    with metrics.stage("chat", "retrieval"):
+        candidates = similarity_search_with_scores(query_text, k=candidate_count(4), filters=filters, tenant=tenant)
+    # Optional (RERANK_MODE): drop weakly related chunks to keep the prompt short
+    with metrics.stage("chat", "rerank"):
+        return rerank(query_text, candidates, k=4)
 
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest):
     try:
         # Retrieve current lead state
-        lead = SESSION_STATE.get(req.session_id, LeadFields())
+        lead = SESSION_STATE.get(req.session_id)
+        metrics.cache_lookup("session_state", lead is not None)
+        if lead is None:
+            lead = LeadFields()
+
+        # (role, content) turns, either sent whole by the client or kept here per session
+        if req.message is not None:
+            history = CONVERSATIONS.history(req.session_id)
+            history.append((req.message.role, req.message.content))
+        else:
+            history = [(m.role, m.content) for m in req.messages]
 
         # Update with any implicit info from latest user message
-        if req.messages:
+        if history:
             try:
-                lead = infer_lead_fields_from_message(req.messages[-1].content, lead)
+                with metrics.stage("chat", "inference"):
+                    lead = infer_lead_fields_from_message(history[-1][1], lead)
             except Exception as e:
                 print(f"Error inferring lead fields: {e}")
                 # Continue with existing lead state
 
         # Retrieve RAG contexts
-        query_text = req.messages[-1].content if req.messages else ""
+        query_text = history[-1][1] if history else ""
         try:
-            retrieved_pairs = similarity_search(query_text, k=4)
-            contexts = [c for c, _m in retrieved_pairs]
-            ctx_models = [RetrievedContext(content_preview=c[:200], source=_m.get("source")) for c, _m in retrieved_pairs]
+            filters = {"source": req.sources} if req.sources else None
+            # Embedding the query, the search and the rerank all block; run them off the event loop
+            chunks = await asyncio.to_thread(_retrieve, query_text, filters, req.tenant)
+            contexts = [c.text for c in chunks]
+            # Built from our own index metadata, so constructed without validation
+            ctx_models = [
+                RetrievedContext.model_construct(
+                    content_preview=c.text[:200],
+                    source=c.metadata.get("source"),
+                    page=c.metadata.get("page"),
+                    distance=round(c.distance, 4),
+                    relevance=c.relevance,
+                )
+                for c in chunks
+            ]
         except Exception as e:
             print(f"Error retrieving contexts: {e}")
             contexts = []
@@ -144,8 +282,8 @@ async def chat(req: ChatRequest):
 
         # Generate LLM reply
         try:
-            messages_dicts = [m.dict() for m in req.messages]
-            reply = generate_reply(messages_dicts, contexts)
+            # Up to LLM_TIMEOUT_SECONDS per model; other requests keep being served meanwhile
+            reply = await asyncio.to_thread(generate_reply, history, contexts)
             
             # Extract name from AI's response when it confirms the name
             # Look for patterns like "Thanks [Full Name]!" or "Great [Full Name]!"
@@ -156,7 +294,7 @@ async def chat(req: ChatRequest):
                 name_match = re.search(r'(?:Thanks|Great)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', reply)
                 if name_match:
                     detected_name = name_match.group(1)
-                    lead.full_name = detected_name
+                    lead = lead.model_copy(update={"full_name": detected_name})
                     print(f"🔍 AI confirmed full name: '{detected_name}'")
                 else:
                     # Fallback: try to capture name after "Thanks" or "Great" until punctuation
@@ -165,20 +303,24 @@ async def chat(req: ChatRequest):
                         potential_name = fallback_match.group(1).strip()
                         # Check if it looks like a name (contains letters and spaces)
                         if re.match(r'^[A-Za-z\s]+$', potential_name) and len(potential_name.split()) >= 1:
-                            lead.full_name = potential_name.title()
+                            lead = lead.model_copy(update={"full_name": potential_name.title()})
                             print(f"🔍 Fallback name extraction: '{potential_name.title()}'")
                     
                     # Additional fallback: extract name from user's message if AI didn't confirm
-                    if not lead.full_name and req.messages:
-                        user_message = req.messages[-1].content.strip()
+                    if not lead.full_name and history:
+                        user_message = history[-1][1].strip()
                         # Check if user message looks like a full name using our validation function
                         if is_likely_full_name(user_message):
-                            lead.full_name = user_message.title()
+                            lead = lead.model_copy(update={"full_name": user_message.title()})
                             print(f"🔍 User message full name extraction: '{user_message.title()}'")
                         else:
                             print(f"⚠️ Skipping user message '{user_message}' - doesn't look like a full name")
         except Exception as e:
-            print(f"Error generating reply: {e}")
+            if isinstance(e, CircuitOpenError):
+                metrics.ERRORS.inc(path="chat", stage="llm", error="CircuitOpenError")
+                print(f"LLM unavailable, using fallback reply: {e}")
+            else:
+                print(f"Error generating reply: {e}")
             # Provide a fallback response
             if "onboard" in query_text.lower() or "lead" in query_text.lower():
                 reply = "I'd be happy to help you with lead onboarding! Let me collect your details. What's your **full name** (first, middle, and last name)?"
@@ -210,15 +352,10 @@ async def chat(req: ChatRequest):
             completion["pan"], completion["aadhaar"]]):
         try:
             # Auto-submit the lead
-            doc = {
-                "session_id": req.session_id,
-                "full_name": lead.full_name,
-                "business_type": lead.business_type,
-                "website": lead.website,
-                "pan": encrypt_sensitive(lead.pan),
-                "aadhaar": encrypt_sensitive(lead.aadhaar),
-            }
-            submission_id = insert_lead(doc)
+            with metrics.stage("chat", "auto_submit"):
+                # Every later turn of a completed session resubmits; the PAN/Aadhaar blind index keeps
+                # it one lead, and corrections made in those turns update it
+                submission_id, _created = await asyncio.to_thread(upsert_lead, lead_document(req.session_id, lead))
             auto_submitted = True
             # Add a confirmation message to the reply
             reply += f"\n\n✅ Perfect! I've automatically saved your details with ID: {submission_id}. Thank you for completing the onboarding process!"
@@ -226,50 +363,158 @@ async def chat(req: ChatRequest):
             # If auto-submission fails, just continue normally
             print(f"Auto-submission failed: {e}")
 
-    return ChatResponse(
+    history_messages = None
+    if req.message is not None:
+        history_messages = CONVERSATIONS.append(
+            req.session_id, (req.message.role, req.message.content), ("assistant", reply)
+        )
+
+    return model_response(ChatResponse.model_construct(
         reply=reply,
         lead_fields=lead,
         completed=completion,
         contexts=ctx_models,
         auto_submitted=auto_submitted,
         submission_id=submission_id,
-    )
+        history_messages=history_messages,
+    ))
 
 
 @app.post("/api/submit", response_model=Dict[str, str])
-async def submit_lead(req: LeadSubmitRequest):
-    lead = req.lead
-    # Basic validation: PAN and Aadhaar presence
-    if not (lead.full_name and lead.business_type and lead.pan and lead.aadhaar):
-        raise HTTPException(status_code=400, detail="Missing required fields")
+async def submit_lead(req: LeadSubmitRequest, idempotency_key: str | None = Header(default=None)):
+    # The same checks as the bulk import: a PAN/Aadhaar that normalises to nothing has no blind index to dedupe on
+    try:
+        lead = validate_lead(req.lead.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid lead: {e}")
 
     try:
-        doc = {
-            "session_id": req.session_id,
-            "full_name": lead.full_name,
-            "business_type": lead.business_type,
-            "website": lead.website,
-            "pan": encrypt_sensitive(lead.pan),
-            "aadhaar": encrypt_sensitive(lead.aadhaar),
-        }
-        inserted_id = insert_lead(doc)
-        return {"id": inserted_id, "status": "ok"}
+        # Retries, double clicks and a submit after the chat auto-submit return the same lead
+        lead_id, created = upsert_lead(lead_document(req.session_id, lead), idempotency_key=idempotency_key)
+        return {"id": lead_id, "status": "ok", "duplicate": "false" if created else "true"}
     except ConnectionError as e:
         raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save lead: {str(e)}")
 
 
+def _store_bulk_batch(batch: List[Tuple[int, str, LeadFields]], pool: ThreadPoolExecutor,
+                      workers: int) -> List[BulkLeadResult]:
+    """Encrypt a batch of validated leads on ``pool`` and insert them in one round trip."""
+    try:
+        with metrics.stage("bulk", "encrypt"):
+            chunk = max(1, len(batch) // workers)
+            docs = list(pool.map(lambda item: lead_document(item[1], item[2]), batch, chunksize=chunk))
+        with metrics.stage("bulk", "insert"):
+            stored = insert_leads(docs)
+    except Exception as e:
+        print(f"Bulk batch of {len(batch)} leads failed: {e}")
+        return [BulkLeadResult(row=row, status="failed", error=str(e)) for row, _s, _l in batch]
+    return [
+        BulkLeadResult(row=row, status="duplicate" if error == "duplicate" else "failed" if error else "created",
+                       id=lead_id, error=error if error and error != "duplicate" else None)
+        for (row, _s, _l), (lead_id, error) in zip(batch, stored)
+    ]
+
+
+@app.post("/api/leads/bulk", response_model=BulkSubmitResponse)
+async def bulk_submit(request: Request, format: Literal["ndjson", "csv"] | None = None):
+    """Many leads in one request: an NDJSON or CSV body, one lead per line.
+
+    The body is parsed as it streams in. Valid rows are encrypted on a thread
+    pool and inserted ``BULK_BATCH_SIZE`` at a time with an unordered
+    ``insert_many``; while one batch is written the next is parsed. Leads whose
+    PAN/Aadhaar pair is already stored are reported as duplicates, not updated.
+    """
+    fmt = format or import_format(request.headers.get("content-type"))
+    max_rows = int(os.environ.get("BULK_MAX_ROWS", "10000"))
+    batch_size = max(1, int(os.environ.get("BULK_BATCH_SIZE", "500")))
+    workers = max(1, int(os.environ.get("BULK_ENCRYPT_WORKERS", "4")))
+    max_line_bytes = int(os.environ.get("BULK_MAX_LINE_BYTES", "65536"))
+    # Rows without a session_id still get one that ties them to this request
+    ingest_id = uuid.uuid4().hex[:12]
+
+    results: List[BulkLeadResult] = []
+    batch: List[Tuple[int, str, LeadFields]] = []
+    pending: asyncio.Future | None = None
+    rows = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-encrypt") as pool:
+        try:
+            async for row, record, error in iter_records(request.stream(), fmt, max_line_bytes):
+                if row > max_rows:
+                    # Earlier batches may already be stored, so report the cut-off rather than fail the request
+                    results.append(BulkLeadResult(
+                        row=row, status="invalid",
+                        error=f"over the limit of {max_rows} leads per request; this and later rows were not read",
+                    ))
+                    break
+                rows = row
+                if record is not None:
+                    try:
+                        lead = validate_lead(record)
+                    except ValueError as e:
+                        error = str(e)
+                if error is not None:
+                    results.append(BulkLeadResult(row=row, status="invalid", error=error))
+                    continue
+                session_id = str(record.get("session_id") or f"bulk:{ingest_id}:{row}")
+                batch.append((row, session_id, lead))
+                if len(batch) >= batch_size:
+                    # At most one batch in flight: parsing continues while it is stored
+                    if pending is not None:
+                        results.extend(await pending)
+                    pending = asyncio.ensure_future(asyncio.to_thread(_store_bulk_batch, batch, pool, workers))
+                    batch = []
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            if pending is not None:
+                results.extend(await pending)
+        if batch:
+            results.extend(await asyncio.to_thread(_store_bulk_batch, batch, pool, workers))
+    seconds = time.perf_counter() - start
+
+    results.sort(key=lambda r: r.row)
+    counts = {status: 0 for status in ("created", "duplicate", "invalid", "failed")}
+    for r in results:
+        counts[r.status] += 1
+    print(f"Bulk submit {ingest_id}: {rows} rows, {counts['created']} created, {counts['duplicate']} duplicates, "
+          f"{counts['invalid']} invalid, {counts['failed']} failed in {seconds:.2f}s")
+    return model_response(BulkSubmitResponse.model_construct(
+        rows=rows,
+        created=counts["created"],
+        duplicates=counts["duplicate"],
+        invalid=counts["invalid"],
+        failed=counts["failed"],
+        seconds=round(seconds, 4),
+        leads_per_sec=round(rows / seconds, 1) if seconds else 0.0,
+        results=results,
+    ))
+
+
 @app.post("/api/upload", response_model=UploadResponse)
-async def upload(files: List[UploadFile] = File(...)):
+async def upload(
+    files: List[UploadFile] = File(...),
+    tag: str | None = Form(None),
+    replace: bool = Form(False),
+    tenant: str | None = Form(None),
+):
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
-    
-    upload_dir = os.environ.get("UPLOAD_DIR", "./storage/uploads")
+    try:
+        tenant = normalize_tenant(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Each tenant gets its own upload folder so equal filenames do not collide
+    upload_dir = tenant_dir(os.environ.get("UPLOAD_DIR", "./storage/uploads"), tenant)
     texts: List[str] = []
     metas: List[dict] = []
     errors: List[str] = []
     count = 0
+    uploaded_at = time.time()
+    replaced_chunks = 0
 
     for f in files:
         # Starlette UploadFile does not always expose size; validate after read
@@ -280,10 +525,20 @@ async def upload(files: List[UploadFile] = File(...)):
             continue
         try:
             save_path = save_upload_to_disk(upload_dir, f.filename, data)
-            text = extract_text_from_pdf(save_path)
-            if text.strip():
-                texts.append(text)
-                metas.append({"source": f.filename})
+            with metrics.stage("upload", "extract"):
+                extracted = await asyncio.to_thread(extract_pdf, save_path)
+            # Pages that failed to parse are indexed without their text; say so
+            errors.extend(describe_failed_pages(f.filename, extracted))
+            # One text per page so every chunk carries its page number
+            page_texts, page_metas = build_page_documents(f.filename, extracted.pages, uploaded_at, tag)
+            if page_texts and replace:
+                # Swap out the previously indexed version of this file only
+                replaced_chunks += await asyncio.to_thread(replace_document, f.filename, page_texts, page_metas,
+                                                           tenant=tenant)
+                count += 1
+            elif page_texts:
+                texts.extend(page_texts)
+                metas.extend(page_metas)
                 count += 1
             else:
                 errors.append(f"{f.filename}: No extractable text")
@@ -292,21 +547,44 @@ async def upload(files: List[UploadFile] = File(...)):
 
     if texts:
         try:
-            chunks = index_texts(texts, metas)
+            # Embedding and the index write lock both block; keep them off the event loop
+            chunks = await asyncio.to_thread(index_texts, texts, metas, tenant=tenant)
         except Exception as e:
-            return UploadResponse(success=False, message=str(e), files_indexed=0, errors=errors)
-        return UploadResponse(success=True, message="Indexed", files_indexed=chunks, errors=errors)
+            return UploadResponse(success=False, message=str(e), files_indexed=replaced_chunks, errors=errors)
+        return UploadResponse(success=True, message="Indexed", files_indexed=chunks + replaced_chunks, errors=errors)
+    elif replaced_chunks:
+        return UploadResponse(success=True, message="Replaced", files_indexed=replaced_chunks, errors=errors)
     else:
         return UploadResponse(success=False, message="No valid files", files_indexed=0, errors=errors)
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+async def ready():
+    # Readiness, as opposed to liveness: 503 until heavy initialisation is done, and for good if a required step failed
+    if not WARMUP.ready:
+        return JSONResponse(status_code=503, content={"status": WARMUP.status, "warmup": WARMUP.report()})
+    return {"status": "ready", "warmup": WARMUP.report()}
+
+
 @app.get("/health")
 async def health():
-    mongo_status = "ok" if test_connection() else "failed"
+    # The ping blocks for up to the server-selection timeout; keep it off the event loop and bounded
+    try:
+        connected = await asyncio.wait_for(asyncio.to_thread(test_connection),
+                                           timeout=float(os.environ.get("HEALTH_MONGO_TIMEOUT_SECONDS", "2")))
+        mongo_status = "ok" if connected else "failed"
+    except asyncio.TimeoutError:
+        mongo_status = "timeout"
     return {
         "status": "ok",
         "mongodb": mongo_status,
-        "vector_db": "ok"  # FAISS is local, so always available
+        "vector_db": "ok",  # FAISS is local, so always available
+        "llm": llm_status(),
     }
 
 
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import bisect
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Equality-filterable chunk metadata; uploaded_at (epoch seconds) is range-filterable
+INDEXED_FIELDS = ("source", "page", "tag")
+FILTER_KEYS = INDEXED_FIELDS + ("uploaded_after", "uploaded_before")
+
+
+class MetadataIndex:
+    """Inverted index from chunk metadata to FAISS vector ids.
+
+    Lets ``similarity_search`` turn a filter into the exact set of ids to
+    search before touching any vectors, instead of over-fetching and dropping
+    results afterwards.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {f: {} for f in INDEXED_FIELDS}
+        self._by_time: List[Tuple[float, int]] = []
+        self._time_sorted = True
+        self.size = 0
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[int, Mapping[str, Any]]]) -> "MetadataIndex":
+        index = cls()
+        for vector_id, metadata in items:
+            index.add(vector_id, metadata)
+        return index
+
+    def add(self, vector_id: int, metadata: Mapping[str, Any]) -> None:
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            if value is not None:
+                self._postings[field].setdefault(value, set()).add(vector_id)
+        uploaded_at = metadata.get("uploaded_at")
+        if uploaded_at is not None:
+            self._by_time.append((float(uploaded_at), vector_id))
+            self._time_sorted = False
+        self.size += 1
+
+    def values(self, field: str) -> Dict[Any, int]:
+        """Distinct values of ``field`` with their chunk counts."""
+        return {value: len(ids) for value, ids in self._postings.get(field, {}).items()}
+
+    def ids_for(self, field: str, value: Any) -> Set[int]:
+        return self._postings.get(field, {}).get(value, set())
+
+    def select(self, filters: Mapping[str, Any]) -> np.ndarray | None:
+        """Vector ids matching every filter; list values match any of their items.
+
+        ``uploaded_after`` / ``uploaded_before`` take epoch seconds and are
+        inclusive. Returns None when no filter applies. Unknown keys raise
+        ``ValueError``.
+        """
+        import numpy as np
+
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unsupported filter keys: {', '.join(sorted(unknown))}")
+
+        selected: Set[int] | None = None
+        # Intersect the smallest posting lists first
+        candidate_sets: List[Set[int]] = []
+        for field in INDEXED_FIELDS:
+            if field not in filters or filters[field] is None:
+                continue
+            wanted = filters[field] if isinstance(filters[field], (list, tuple, set)) else [filters[field]]
+            ids: Set[int] = set()
+            for value in wanted:
+                ids |= self.ids_for(field, value)
+            candidate_sets.append(ids)
+
+        after, before = filters.get("uploaded_after"), filters.get("uploaded_before")
+        if after is not None or before is not None:
+            candidate_sets.append(self._time_range(after, before))
+
+        for ids in sorted(candidate_sets, key=len):
+            selected = set(ids) if selected is None else selected & ids
+            if not selected:
+                break
+        if selected is None:
+            return None
+        return np.fromiter(sorted(selected), dtype=np.int64, count=len(selected))
+
+    def _time_range(self, after: float | None, before: float | None) -> Set[int]:
+        if not self._time_sorted:
+            self._by_time.sort()
+            self._time_sorted = True
+        lo = bisect.bisect_left(self._by_time, (float(after), -1)) if after is not None else 0
+        hi = bisect.bisect_right(self._by_time, (float(before), float("inf"))) if before is not None else len(self._by_time)
+        return {vector_id for _ts, vector_id in self._by_time[lo:hi]}
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+
+# Latency buckets in seconds; covers sub-ms regex work up to slow LLM calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+ENABLED = _env_flag("METRICS_ENABLED", "true")
+SPAN_LOG = _env_flag("METRICS_SPAN_LOG", "false")
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[str, str] | None = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "app_stage_duration_seconds", "Time spent in each stage of a request, by path and stage."
+)
+REQUEST_SECONDS = Histogram(
+    "app_request_duration_seconds", "End-to-end handler time, by path and status."
+)
+ERRORS = Counter("app_errors_total", "Exceptions raised inside an instrumented stage.")
+CACHE = Counter("app_cache_requests_total", "Cache lookups, by cache name and result (hit|miss).")
+
+_REGISTRY = [REQUEST_SECONDS, STAGE_SECONDS, ERRORS, CACHE]
+
+
+def register(metric: Counter | Histogram) -> Counter | Histogram:
+    _REGISTRY.append(metric)
+    return metric
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE.inc(cache=cache, result="hit" if hit else "miss")
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def stage(path: str, name: str):
+    """Time a block as ``name`` within ``path`` (e.g. ``stage("chat", "llm")``).
+
+    Exceptions are counted in ``app_errors_total`` and re-raised. When metrics
+    are disabled this returns a shared no-op context manager.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _timed_stage(path, name)
+
+
+@contextlib.contextmanager
+def _timed_stage(path: str, name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        ERRORS.inc(path=path, stage=name, error=type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, path=path, stage=name)
+        if SPAN_LOG:
+            print(f"[span] {path}.{name} {elapsed * 1000:.1f}ms")
@@ -1,21 +1,278 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import hashlib
+import json
 import os
+import time
 from pathlib import Path
 
-from PyPDF2 import PdfReader
+
+PDF_BACKENDS = ("pypdf2", "pypdf", "pymupdf")
+
+# Bump when extraction output changes so stale cache entries are ignored
+_CACHE_FORMAT = 1
+
+
+@dataclass
+class ExtractedPdf:
+    pages: List[str]
+    # 1-based page number -> error, for pages whose text could not be extracted
+    failed_pages: Dict[int, str] = field(default_factory=dict)
+    backend: str = "pypdf2"
+    sha256: str = ""
+    cached: bool = False
+
+
+class PyPDF2Backend:
+    """Pure-Python PyPDF2 (the default; always installed)."""
+
+    name = "pypdf2"
+
+    def _reader(self, file_path: str):
+        from PyPDF2 import PdfReader
+
+        return PdfReader(file_path)
+
+    def extract(self, file_path: str) -> Tuple[List[str], Dict[int, str]]:
+        pages: List[str] = []
+        failed: Dict[int, str] = {}
+        for page_no, page in enumerate(self._reader(file_path).pages, start=1):
+            try:
+                pages.append(page.extract_text() or "")
+            except Exception as e:
+                pages.append("")
+                failed[page_no] = f"{type(e).__name__}: {e}"
+        return pages, failed
+
+
+class PypdfBackend(PyPDF2Backend):
+    """pypdf, PyPDF2's maintained successor (``pip install pypdf``)."""
+
+    name = "pypdf"
+
+    def __init__(self):
+        import pypdf  # noqa: F401
+
+    def _reader(self, file_path: str):
+        from pypdf import PdfReader
+
+        return PdfReader(file_path)
+
+
+class PyMuPDFBackend:
+    """MuPDF through PyMuPDF (``pip install pymupdf``); much faster on large files."""
+
+    name = "pymupdf"
+
+    def __init__(self):
+        import fitz  # noqa: F401  (fail at selection time, not on the first upload)
+
+    def extract(self, file_path: str) -> Tuple[List[str], Dict[int, str]]:
+        import fitz
+
+        pages: List[str] = []
+        failed: Dict[int, str] = {}
+        with fitz.open(file_path) as doc:
+            for page_no in range(1, doc.page_count + 1):
+                try:
+                    pages.append(doc.load_page(page_no - 1).get_text() or "")
+                except Exception as e:
+                    pages.append("")
+                    failed[page_no] = f"{type(e).__name__}: {e}"
+        return pages, failed
+
+
+_BACKEND_CLASSES = {cls.name: cls for cls in (PyPDF2Backend, PypdfBackend, PyMuPDFBackend)}
+
+
+def pdf_backend_name() -> str:
+    name = os.environ.get("PDF_BACKEND", "pypdf2").strip().lower()
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"PDF_BACKEND must be one of {', '.join(PDF_BACKENDS)}, got '{name}'")
+    return name
+
+
+@lru_cache(maxsize=len(PDF_BACKENDS))
+def _cached_backend(name: str):
+    try:
+        return _BACKEND_CLASSES[name]()
+    except ImportError as e:
+        # Faster backends are optional dependencies; PyPDF2 ships with the app
+        print(f"PDF backend '{name}' unavailable ({e}); using pypdf2")
+        return PyPDF2Backend()
+
+
+def get_pdf_backend(name: str | None = None):
+    if name is not None and name not in PDF_BACKENDS:
+        raise ValueError(f"PDF backend must be one of {', '.join(PDF_BACKENDS)}, got '{name}'")
+    return _cached_backend(name or pdf_backend_name())
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_enabled() -> bool:
+    return os.environ.get("PDF_EXTRACT_CACHE", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def extraction_cache_dir() -> Path:
+    return Path(os.environ.get("PDF_EXTRACT_CACHE_DIR", "./storage/extracted"))
+
+
+def extraction_cache_path(sha256: str, backend: str) -> Path:
+    """``<PDF_EXTRACT_CACHE_DIR>/<sha256>.<backend>.json``; shared by every tenant, as equal bytes extract equally."""
+    return extraction_cache_dir() / f"{sha256}.{backend}.json"
+
+
+def prune_extraction_cache(file_path: str) -> int:
+    """Drop the cached extractions of ``file_path``'s current bytes, for every backend; returns files removed.
+
+    Called before an upload is deleted or overwritten, so replaced versions do not linger in the cache.
+    """
+    try:
+        sha256 = file_sha256(file_path)
+    except OSError:
+        return 0
+    removed = 0
+    for path in extraction_cache_dir().glob(f"{sha256}.*.json"):
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _evict_cache(keep: Path) -> None:
+    """Remove the least recently used entries until the cache fits PDF_EXTRACT_CACHE_MAX_MB."""
+    max_bytes = float(os.environ.get("PDF_EXTRACT_CACHE_MAX_MB", "256")) * 1024 * 1024
+    entries = []
+    for path in keep.parent.glob("*.json"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _m, size, _p in entries)
+    for _mtime, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+def _read_cache(path: Path) -> ExtractedPdf | None:
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+        try:
+            # Reads refresh the mtime, which eviction treats as last use
+            os.utime(path)
+        except OSError:
+            pass
+        if raw.get("format") != _CACHE_FORMAT:
+            return None
+        return ExtractedPdf(
+            pages=list(raw["pages"]),
+            failed_pages={int(k): v for k, v in raw.get("failed_pages", {}).items()},
+            backend=raw["backend"],
+            sha256=raw["sha256"],
+            cached=True,
+        )
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable extraction cache {path}: {e}")
+        return None
+
+
+def _write_cache(path: Path, result: ExtractedPdf) -> None:
+    payload = {
+        "format": _CACHE_FORMAT,
+        "sha256": result.sha256,
+        "backend": result.backend,
+        "pages": result.pages,
+        "failed_pages": {str(k): v for k, v in result.failed_pages.items()},
+        "created_at": time.time(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+        _evict_cache(path)
+    except OSError as e:
+        # The cache is an optimisation; a read-only cache dir must not fail uploads
+        print(f"Could not write extraction cache {path}: {e}")
+
+
+def extract_pdf(file_path: str, backend: str | None = None, use_cache: bool | None = None) -> ExtractedPdf:
+    """Per-page text of a PDF, served from the extraction cache when the file is unchanged.
+
+    The cache is keyed by the file's sha256 and the backend name, so
+    re-uploading or re-indexing identical bytes never re-parses them.
+    """
+    extractor = get_pdf_backend(backend)
+    use_cache = _cache_enabled() if use_cache is None else use_cache
+    sha256 = file_sha256(file_path)
+    cache_path = extraction_cache_path(sha256, extractor.name)
+    if use_cache:
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            return cached
+
+    pages, failed = extractor.extract(file_path)
+    result = ExtractedPdf(pages=pages, failed_pages=failed, backend=extractor.name, sha256=sha256)
+    if use_cache:
+        _write_cache(cache_path, result)
+    return result
+
+
+def describe_failed_pages(source: str, result: ExtractedPdf) -> List[str]:
+    return [f"{source}: page {page_no} could not be extracted ({err})" for page_no, err in sorted(result.failed_pages.items())]
+
+
+def extract_pages_from_pdf(file_path: str) -> List[str]:
+    """Text of each page, in order; pages that fail to parse come back empty and are logged."""
+    result = extract_pdf(file_path)
+    for message in describe_failed_pages(os.path.basename(file_path), result):
+        print(message)
+    return result.pages
 
 
 def extract_text_from_pdf(file_path: str) -> str:
-    reader = PdfReader(file_path)
+    return "\n".join(p for p in extract_pages_from_pdf(file_path) if p)
+
+
+def build_page_documents(source: str, pages: List[str], uploaded_at: float | None = None,
+                         tag: str | None = None) -> Tuple[List[str], List[dict]]:
+    """One text per non-empty page, each with its source/page/uploaded_at/tag metadata."""
+    uploaded_at = time.time() if uploaded_at is None else uploaded_at
     texts: List[str] = []
-    for page in reader.pages:
-        try:
-            texts.append(page.extract_text() or "")
-        except Exception:
+    metas: List[dict] = []
+    for page_no, text in enumerate(pages, start=1):
+        if not text.strip():
             continue
-    return "\n".join(texts)
+        meta = {"source": source, "page": page_no, "uploaded_at": uploaded_at}
+        if tag:
+            meta["tag"] = tag
+        texts.append(text)
+        metas.append(meta)
+    return texts, metas
 
 
 def validate_pdf(file_name: str, file_size: int) -> Tuple[bool, str]:
@@ -30,6 +287,9 @@ def validate_pdf(file_name: str, file_size: int) -> Tuple[bool, str]:
 def save_upload_to_disk(upload_dir: str, filename: str, data: bytes) -> str:
     Path(upload_dir).mkdir(parents=True, exist_ok=True)
     save_path = os.path.join(upload_dir, filename)
+    if os.path.exists(save_path) and file_sha256(save_path) != hashlib.sha256(data).hexdigest():
+        # A new version of the file: its old extraction will not be asked for again
+        prune_extraction_cache(save_path)
     with open(save_path, "wb") as f:
         f.write(data)
     return save_path
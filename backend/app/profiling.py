@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def profile_dir() -> Path:
+    path = Path(os.environ.get("PROFILE_DIR", "./storage/profiles"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _frame_label(code) -> str:
+    # No spaces: collapsed-stack consumers split the count off at the last space
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+def write_collapsed(stacks: Dict[str, int], name: str) -> Path:
+    path = profile_dir() / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.collapsed"
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]):
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class SamplingProfiler:
+    """Wall-clock sampler over all threads using ``sys._current_frames``.
+
+    Each tick records every thread's stack (root first) as one sample, so the
+    output is flamegraph-compatible collapsed stacks. Overhead is one stack
+    walk per thread per interval and nothing at all while stopped.
+    """
+
+    def __init__(self) -> None:
+        self._stacks: Counter[str] = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.interval = 0.005
+        self.samples = 0
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.interval = max(0.001, interval)
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> Dict[str, int]:
+        with self._lock:
+            if self._thread is None:
+                return {}
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            return dict(self._stacks)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}").replace(" ", "_"))
+                self._stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+
+SAMPLER = SamplingProfiler()
+
+
+def pstats_to_collapsed(stats: pstats.Stats, max_depth: int = 64) -> Dict[str, int]:
+    """Approximate collapsed stacks (microseconds) from a cProfile call graph.
+
+    cProfile only keeps caller->callee edges, so each function's self time is
+    spread over the paths leading to it in proportion to the time each edge
+    contributed.
+    """
+    raw: Dict[Tuple, Tuple] = stats.stats  # type: ignore[attr-defined]
+    children: Dict[Tuple, List[Tuple]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller in callers:
+            children.setdefault(caller, []).append(func)
+
+    def label(func: Tuple) -> str:
+        filename, lineno, name = func
+        return f"{os.path.basename(filename)}:{name}:{lineno}".replace(" ", "_")
+
+    out: Counter[str] = Counter()
+
+    def visit(func: Tuple, path: List[Tuple], share: float) -> None:
+        _cc, _nc, tt, ct, _callers = raw[func]
+        stack = path + [func]
+        weight = int(tt * share * 1_000_000)
+        if weight:
+            out[";".join(label(f) for f in stack)] += weight
+        if len(stack) >= max_depth:
+            return
+        for callee in children.get(func, []):
+            if callee in stack:
+                continue
+            callee_ct = raw[callee][3]
+            edge_ct = raw[callee][4][func][3]
+            if callee_ct > 0 and edge_ct > 0:
+                visit(callee, stack, share * edge_ct / callee_ct)
+
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        if not callers:
+            visit(func, [], 1.0)
+    return dict(out)
+
+
+class RequestProfile:
+    """cProfile around one request, written as ``.prof`` and ``.collapsed`` files."""
+
+    def __init__(self, name: str):
+        self.name = name.strip("/").replace("/", "_") or "root"
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self) -> "RequestProfile":
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.profiler.disable()
+
+    def dump(self) -> Path:
+        stats = pstats.Stats(self.profiler)
+        collapsed = write_collapsed(pstats_to_collapsed(stats), self.name)
+        stats.dump_stats(str(collapsed.with_suffix(".prof")))
+        return collapsed
+
+
+class HeapTracker:
+    """tracemalloc snapshots, each diffed against the previous one."""
+
+    def __init__(self) -> None:
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 10) -> bool:
+        with self._lock:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start(frames)
+            self._previous = None
+            return True
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def snapshot(self, top: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running")
+            snap = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+            )
+            current, peak = tracemalloc.get_traced_memory()
+            compared = self._previous is not None
+            if compared:
+                stats = snap.compare_to(self._previous, "lineno")
+                top_stats = [
+                    {"location": str(s.traceback), "size_kb": round(s.size / 1024, 1),
+                     "size_diff_kb": round(s.size_diff / 1024, 1), "count_diff": s.count_diff}
+                    for s in stats[:top]
+                ]
+            else:
+                top_stats = [
+                    {"location": str(s.traceback), "size_kb": round(s.size / 1024, 1), "count": s.count}
+                    for s in snap.statistics("lineno")[:top]
+                ]
+            self._previous = snap
+        return {
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "compared_to_previous": compared,
+            "top": top_stats,
+        }
+
+
+HEAP = HeapTracker()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+
+RERANK_MODES = ("off", "lexical", "cross-encoder")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could do does for from has have how i in is it its me my of on or our "
+    "should so than that the their there this to us was we what when where which who why will with would you your".split()
+)
+
+
+@dataclass
+class ScoredChunk:
+    text: str
+    metadata: dict
+    distance: float
+    relevance: float | None = None
+
+
+def _terms(text: str) -> List[str]:
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS or len(token) < 2:
+            continue
+        # Cheap plural folding so "payments" matches "payment"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class LexicalReranker:
+    """BM25-style query-term coverage, normalised to [0, 1].
+
+    IDF is computed over the candidate set only, so no corpus statistics are
+    needed. A chunk scores 1.0 when it contains every query term several
+    times, and 0.0 when it shares none.
+    """
+
+    name = "lexical"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        query_terms = set(_terms(query))
+        if not query_terms or not texts:
+            return [0.0] * len(texts)
+        docs = [Counter(_terms(t)) for t in texts]
+        lengths = [sum(d.values()) for d in docs]
+        avg_len = (sum(lengths) / len(docs)) or 1.0
+        n = len(docs)
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for d in docs if term in d)
+            idf[term] = math.log(1 + (n + 1) / (df + 0.5))
+        total_idf = sum(idf.values())
+
+        scores = []
+        for doc, length in zip(docs, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_len)
+            matched = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    matched += idf[term] * tf * (self.k1 + 1) / (tf + norm) / (self.k1 + 1)
+            scores.append(min(1.0, matched / total_idf))
+        return scores
+
+
+class CrossEncoderReranker:
+    """Local cross-encoder (sentence-transformers) on CPU; scores squashed with a sigmoid."""
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+        raw = self.model.predict([(query, t) for t in texts])
+        return [1 / (1 + math.exp(-float(s))) for s in raw]
+
+
+def rerank_mode() -> str:
+    mode = os.environ.get("RERANK_MODE", "off").strip().lower()
+    if mode not in RERANK_MODES:
+        raise ValueError(f"RERANK_MODE must be one of {', '.join(RERANK_MODES)}, got '{mode}'")
+    return mode
+
+
+@lru_cache(maxsize=4)
+def _cached_reranker(mode: str, model_name: str):
+    if mode == "cross-encoder":
+        try:
+            return CrossEncoderReranker(model_name)
+        except Exception as e:
+            # sentence-transformers is optional; lexical scoring needs nothing extra
+            print(f"Cross-encoder reranker unavailable ({e}); using lexical reranking")
+    return LexicalReranker()
+
+
+def get_reranker():
+    mode = rerank_mode()
+    if mode == "off":
+        return None
+    return _cached_reranker(mode, os.environ.get("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+
+
+def candidate_count(k: int) -> int:
+    """How many chunks to fetch from the vector store so the reranker has room to choose."""
+    if rerank_mode() == "off":
+        return k
+    return max(k, int(os.environ.get("RERANK_CANDIDATES", "12")))
+
+
+def rerank(query: str, candidates: Sequence[Tuple[str, dict, float]], k: int) -> List[ScoredChunk]:
+    """Best ``k`` candidates scoring at least RERANK_THRESHOLD, best first.
+
+    With RERANK_MODE=off this is the vector order truncated to ``k``.
+    RERANK_MIN_CONTEXTS keeps that many of the best chunks even when they
+    score below the threshold.
+    """
+    reranker = get_reranker()
+    if reranker is None:
+        return [ScoredChunk(text, meta, distance) for text, meta, distance in candidates[:k]]
+
+    scores = reranker.score(query, [text for text, _m, _d in candidates])
+    ranked = sorted(
+        (ScoredChunk(text, meta, distance, round(score, 4)) for (text, meta, distance), score in zip(candidates, scores)),
+        key=lambda c: c.relevance,
+        reverse=True,
+    )
+    threshold = float(os.environ.get("RERANK_THRESHOLD", "0.2"))
+    keep_at_least = int(os.environ.get("RERANK_MIN_CONTEXTS", "0"))
+    kept = [c for i, c in enumerate(ranked) if c.relevance >= threshold or i < keep_at_least]
+    return kept[:k]
+
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from typing import List, Optional, Literal, Dict, Any
-from pydantic import BaseModel, Field, HttpUrl, field_validator
+from pydantic import BaseModel, Field, HttpUrl, field_validator, model_validator
+
+from .tenants import normalize_tenant
 
 
 Role = Literal["user", "assistant", "system"]
@@ -45,12 +47,31 @@ class LeadFields(BaseModel):
 
 class ChatRequest(BaseModel):
     session_id: str = Field(..., description="Client-generated session id")
-    messages: List[Message]
+    messages: List[Message] = Field(default_factory=list, description="Whole conversation so far, kept by the client")
+    message: Optional[Message] = Field(
+        None, description="Only the new message; the server keeps the conversation for session_id"
+    )
+    sources: Optional[List[str]] = Field(None, description="Limit retrieval to these uploaded files")
+    tenant: Optional[str] = Field(None, description="Namespace whose documents are searched; omit for the shared index")
+
+    @field_validator("tenant")
+    @classmethod
+    def validate_tenant(cls, v: Optional[str]) -> Optional[str]:
+        return normalize_tenant(v)
+
+    @model_validator(mode="after")
+    def check_history_mode(self) -> "ChatRequest":
+        if self.messages and self.message is not None:
+            raise ValueError("Send either the full 'messages' history or one new 'message', not both")
+        return self
 
 
 class RetrievedContext(BaseModel):
     content_preview: str
     source: Optional[str] = None
+    page: Optional[int] = None
+    distance: Optional[float] = Field(None, description="Squared L2 distance from the query embedding")
+    relevance: Optional[float] = Field(None, description="Reranker score in [0, 1], when reranking is enabled")
 
 
 class ChatResponse(BaseModel):
@@ -60,6 +81,9 @@ class ChatResponse(BaseModel):
     contexts: List[RetrievedContext] = []
     auto_submitted: bool = False
     submission_id: Optional[str] = None
+    history_messages: Optional[int] = Field(
+        None, description="Messages in the server-kept conversation (only for requests that send 'message')"
+    )
 
 
 class LeadSubmitRequest(BaseModel):
@@ -67,6 +91,24 @@ class LeadSubmitRequest(BaseModel):
     lead: LeadFields
 
 
+class BulkLeadResult(BaseModel):
+    row: int = Field(..., description="Data row of the request body, from 1")
+    status: Literal["created", "duplicate", "invalid", "failed"]
+    id: Optional[str] = Field(None, description="Stored lead; for a duplicate, the lead already holding the PAN/Aadhaar")
+    error: Optional[str] = None
+
+
+class BulkSubmitResponse(BaseModel):
+    rows: int
+    created: int
+    duplicates: int
+    invalid: int
+    failed: int
+    seconds: float
+    leads_per_sec: float
+    results: List[BulkLeadResult]
+
+
 class UploadResponse(BaseModel):
     success: bool
     message: str
@@ -1,41 +1,158 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import hmac
+import logging
 import os
-from cryptography.fernet import Fernet, InvalidToken
+import re
+import threading
+from typing import TYPE_CHECKING, List
 
+if TYPE_CHECKING:
+    from cryptography.fernet import MultiFernet
 
-def _load_key() -> bytes:
-    key_b64 = os.environ.get("PAN_AADHAAR_ENC_KEY")
-    if key_b64:
+logger = logging.getLogger(__name__)
+
+
+def _load_keys() -> List[bytes]:
+    """Key ring, newest first: PAN_AADHAAR_ENC_KEYS (comma-separated), else PAN_AADHAAR_ENC_KEY."""
+    configured = [k.strip() for k in os.environ.get("PAN_AADHAAR_ENC_KEYS", "").split(",") if k.strip()]
+    if not configured and os.environ.get("PAN_AADHAAR_ENC_KEY"):
+        configured = [os.environ["PAN_AADHAAR_ENC_KEY"]]
+    keys: List[bytes] = []
+    for position, key_b64 in enumerate(configured, start=1):
         try:
             # Accept both urlsafe base64 or raw 32-byte base64 per Fernet
             base64.urlsafe_b64decode(key_b64)
-            return key_b64.encode()
+            keys.append(key_b64.encode())
         except Exception:
-            pass
+            print(f"Ignoring malformed encryption key #{position}")
+    if keys:
+        return keys
     # Generate ephemeral key if not provided; NOT for production
+    from cryptography.fernet import Fernet
+
     key = Fernet.generate_key()
     os.environ["PAN_AADHAAR_ENC_KEY"] = key.decode()
-    return key
+    return [key]
+
+
+def key_id(key: bytes) -> str:
+    """Short public fingerprint of a key, stored with each lead as ``enc_key_id``."""
+    return hashlib.sha256(key).hexdigest()[:12]
+
+
+_FERNET: MultiFernet | None = None
+_KEY_IDS: List[str] = []
+_FERNET_LOCK = threading.Lock()
+
+
+def get_fernet() -> MultiFernet:
+    """Encrypts with the newest key of the ring and decrypts with any of them."""
+    # Built on first use so importing this module stays cheap
+    global _FERNET, _KEY_IDS
+    if _FERNET is None:
+        with _FERNET_LOCK:
+            if _FERNET is None:
+                from cryptography.fernet import Fernet, MultiFernet
 
+                keys = _load_keys()
+                _KEY_IDS = [key_id(k) for k in keys]
+                _FERNET = MultiFernet([Fernet(k) for k in keys])
+    return _FERNET
 
-_FERNET = Fernet(_load_key())
+
+def key_ids() -> List[str]:
+    """Fingerprints of the key ring, newest (the one new data is encrypted with) first."""
+    get_fernet()
+    return list(_KEY_IDS)
+
+
+def current_key_id() -> str:
+    return key_ids()[0]
 
 
 def encrypt_sensitive(value: str | None) -> str | None:
     if not value:
         return value
-    token = _FERNET.encrypt(value.encode("utf-8"))
+    token = get_fernet().encrypt(value.encode("utf-8"))
     return token.decode("utf-8")
 
 
 def decrypt_sensitive(token: str | None) -> str | None:
     if not token:
         return token
+    from cryptography.fernet import InvalidToken
+
     try:
-        return _FERNET.decrypt(token.encode("utf-8")).decode("utf-8")
+        return get_fernet().decrypt(token.encode("utf-8")).decode("utf-8")
     except InvalidToken:
         return None
 
 
+def rotate_sensitive(token: str | None) -> str | None:
+    """Re-encrypt ``token`` under the newest key; raises InvalidToken if no key in the ring opens it."""
+    if not token:
+        return token
+    return get_fernet().rotate(token.encode("utf-8")).decode("utf-8")
+
+
+# Blind index: a keyed HMAC of the normalised value, so equal PAN/Aadhaar
+# numbers can be found with an indexed equality lookup even though their
+# Fernet tokens are randomised. The key is separate from the encryption key
+# so the encryption key can be rotated without rewriting the index.
+_BLIND_INDEX_KEY: bytes | None = None
+
+
+def _blind_index_key() -> bytes:
+    global _BLIND_INDEX_KEY
+    if _BLIND_INDEX_KEY is None:
+        # get_fernet first: without a configured key it generates the ephemeral one derived from here
+        get_fernet()
+        with _FERNET_LOCK:
+            if _BLIND_INDEX_KEY is None:
+                key = os.environ.get("PAN_AADHAAR_INDEX_KEY")
+                if key:
+                    _BLIND_INDEX_KEY = key.encode("utf-8")
+                else:
+                    # The oldest key, so adding a key to the ring does not change the index
+                    logger.warning("PAN_AADHAAR_INDEX_KEY not set; deriving the blind index key from the oldest "
+                                   "encryption key, which must then never be removed")
+                    _BLIND_INDEX_KEY = hmac.new(_load_keys()[-1], b"pan-aadhaar-blind-index-v1",
+                                                hashlib.sha256).digest()
+    return _BLIND_INDEX_KEY
+
+
+def index_key_configured() -> bool:
+    """Whether the blind index has its own key, so encryption keys can be rotated and removed."""
+    return bool(os.environ.get("PAN_AADHAAR_INDEX_KEY"))
+
+
+def normalize_pan(value: str) -> str:
+    return re.sub(r"\s+", "", value).upper()
+
+
+def normalize_aadhaar(value: str) -> str:
+    return re.sub(r"\D", "", value)
+
+
+_NORMALIZERS = {"pan": normalize_pan, "aadhaar": normalize_aadhaar}
+
+
+def blind_index(kind: str, value: str | None) -> str | None:
+    """Deterministic HMAC-SHA256 (hex) of a normalised ``pan`` or ``aadhaar`` value."""
+    if not value:
+        return None
+    normalized = _NORMALIZERS[kind](value)
+    if not normalized:
+        return None
+    message = f"{kind}:{normalized}".encode("utf-8")
+    return hmac.new(_blind_index_key(), message, hashlib.sha256).hexdigest()
+
+
+def mask_sensitive(value: str | None, visible: int = 4) -> str | None:
+    """``value`` with all but its last ``visible`` characters replaced by ``*``."""
+    if not value:
+        return value
+    return "*" * max(0, len(value) - visible) + value[-visible:]
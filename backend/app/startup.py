@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+
+def _ping_mongo() -> None:
+    from .db import get_mongo_client
+
+    get_mongo_client().admin.command("ping")
+
+
+def _load_vector_store() -> None:
+    from . import index_snapshots
+    from .vectorstore import get_faiss_path, load_index
+
+    # No index yet (nothing uploaded) is fine; one that exists but does not load is not.
+    # load_index only logs why, so the step has to notice the None itself.
+    if load_index() is None and index_snapshots.read_manifest(get_faiss_path()) is not None:
+        raise RuntimeError("vector index exists but could not be loaded; see the log for the cause")
+
+
+def _warmup_steps() -> Dict[str, Callable[[], Any]]:
+    from .db import ensure_indexes
+    from .llm import get_llm
+    from .security import get_fernet
+    from .vectorstore import get_embeddings
+
+    return {
+        "vector_store": _load_vector_store,
+        "embeddings_client": get_embeddings,
+        "llm_client": get_llm,
+        "encryption_key": get_fernet,
+        "mongo": _ping_mongo,
+        "mongo_indexes": ensure_indexes,
+    }
+
+
+# Steps that must finish before /ready reports ready; the Mongo ping can take the
+# full server-selection timeout when the cluster is unreachable, and chat still
+# works without it, so it and the index creation are reported but not waited on.
+REQUIRED_STEPS = ("vector_store", "embeddings_client", "llm_client", "encryption_key")
+
+
+class WarmupState:
+    def __init__(self) -> None:
+        self.enabled = os.environ.get("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.started_at: float | None = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def status(self) -> str:
+        """``warming`` until every required step has run, then ``ready``, or ``degraded`` if one failed."""
+        if not self.enabled:
+            return "ready"
+        if not all(name in self.steps for name in REQUIRED_STEPS):
+            return "warming"
+        return "degraded" if any(not self.steps[name].get("ok") for name in REQUIRED_STEPS) else "ready"
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def report(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "steps": self.steps}
+
+
+def _run_step(state: WarmupState, name: str, fn: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    try:
+        fn()
+        state.steps[name] = {"ok": True, "seconds": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        state.steps[name] = {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+        print(f"Warm-up step '{name}' failed: {e}")
+
+
+async def warm_up(state: WarmupState) -> None:
+    """Run the heavy initialisation steps concurrently in worker threads."""
+    state.started_at = time.time()
+    steps: List[Any] = [
+        asyncio.to_thread(_run_step, state, name, fn) for name, fn in _warmup_steps().items()
+    ]
+    await asyncio.gather(*steps)
+    total = round(time.time() - state.started_at, 3)
+    print(f"Warm-up finished in {total}s: " + ", ".join(f"{k}={'ok' if v['ok'] else 'failed'}" for k, v in state.steps.items()))
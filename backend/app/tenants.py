@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import re
+
+
+# Letters, digits, '_', '-' and '.'; used as a directory name, so no separators
+_TENANT_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+def normalize_tenant(tenant: str | None) -> str | None:
+    """Validated tenant key, or None for the default (unpartitioned) namespace.
+
+    Raises ``ValueError`` for keys that are not safe to use as a directory name.
+    """
+    if tenant is None:
+        return None
+    tenant = tenant.strip()
+    if not tenant:
+        return None
+    if not _TENANT_RE.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant '{tenant}': use up to 64 letters, digits, '_', '-' or '.'")
+    return tenant
+
+
+def tenant_dir(base: str, tenant: str | None) -> str:
+    """``base`` for the default namespace, ``base/tenants/<tenant>`` otherwise."""
+    tenant = normalize_tenant(tenant)
+    return base if tenant is None else os.path.join(base, "tenants", tenant)
@@ -1,63 +1,639 @@
 from __future__ import annotations
 
 import os
-from typing import List, Tuple
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from . import index_snapshots, metrics
+from .chunking import ChunkingSpec, default_spec, split_documents
+from .metadata_index import MetadataIndex
+from .tenants import tenant_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+
+COMPRESSION_MODES = ("none", "fp16", "int8")
 
 
 def get_embeddings():
     # Use OpenAI embeddings for better quality and consistency with GPT-4.1
     model_name = os.environ.get("OPENAI_EMBEDDINGS_MODEL", "text-embedding-3-small")
+    # text-embedding-3 models can return shorter vectors (e.g. 512) at a small recall cost
+    dimensions = os.environ.get("EMBEDDING_DIMENSIONS")
+    return _cached_embeddings(model_name, int(dimensions) if dimensions else None)
+
+
+@lru_cache(maxsize=4)
+def _cached_embeddings(model_name: str, dimensions: int | None = None):
+    from langchain_openai import OpenAIEmbeddings
+
+    if dimensions:
+        return OpenAIEmbeddings(model=model_name, dimensions=dimensions)
     return OpenAIEmbeddings(model=model_name)
 
 
-def get_faiss_path() -> str:
-    base = os.environ.get("VECTOR_DB_DIR", "./storage/vector_db")
-    os.makedirs(base, exist_ok=True)
+def get_compression() -> str:
+    mode = os.environ.get("VECTOR_COMPRESSION", "none").strip().lower()
+    if mode not in COMPRESSION_MODES:
+        raise ValueError(f"VECTOR_COMPRESSION must be one of {', '.join(COMPRESSION_MODES)}, got '{mode}'")
+    return mode
+
+
+def get_faiss_path(tenant: str | None = None) -> str:
+    """Index location for ``tenant``; None is the original shared index.
+
+    Nothing is created here: searches for unknown tenants must not leave
+    directories behind. ``index_snapshots.writer_lock`` creates it on write.
+    """
+    base = tenant_dir(os.environ.get("VECTOR_DB_DIR", "./storage/vector_db"), tenant)
     return os.path.join(base, "faiss_index")
 
 
-def load_vector_store() -> FAISS | None:
-    path = get_faiss_path()
-    if os.path.exists(path):
+@dataclass
+class LoadedIndex:
+    store: FAISS
+    # manifest stat this copy was loaded for, and (snapshot version, manifest timestamp)
+    signature: Tuple[Any, ...]
+    generation: Tuple[int, float]
+    # float32 copies of the vectors of a quantized index, memory-mapped, used to
+    # re-rank the top candidates exactly; None for plain float32 indexes or
+    # with VECTOR_RERANK_FP32 off
+    exact: np.ndarray | None = None
+    metadata: MetadataIndex | None = None
+    # sorted ids of deleted vectors, skipped at query time until compaction
+    tombstones: np.ndarray | None = None
+    # estimated memory held by this copy, counted against VECTOR_CACHE_MAX_MB
+    resident_bytes: int = 0
+
+    @property
+    def live_count(self) -> int:
+        return int(self.store.index.ntotal) - (len(self.tombstones) if self.tombstones is not None else 0)
+
+
+# path -> index loaded for the current manifest, least recently used first. Each
+# tenant has its own index, loaded on its first query and evicted when the
+# resident set exceeds VECTOR_CACHE_MAX_MB. Snapshots are immutable and a writer
+# publishes a new object instead of mutating the cached one, so concurrent
+# readers never see a half-updated index. Other worker processes notice a new
+# manifest on their next search and reload in the background.
+_STORE_CACHE: OrderedDict[str, LoadedIndex] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_RELOADS: Dict[str, threading.Thread] = {}
+_COMPACTION: Dict[str, threading.Thread] = {}
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _tombstone_array(ids: List[int]) -> np.ndarray:
+    import numpy as np
+
+    return np.unique(np.asarray(ids, dtype=np.int64))
+
+
+def _is_quantized(index: Any) -> bool:
+    import faiss
+
+    return isinstance(index, faiss.IndexScalarQuantizer)
+
+
+def _load_from_disk(path: str, writable: bool = False) -> LoadedIndex | None:
+    """Load the snapshot the manifest points at.
+
+    The FAISS index is read into this process's memory. Read-only copies map
+    the float32 re-rank sidecar (VECTOR_INDEX_MMAP), which workers on one
+    host then share through the page cache; ``writable`` copies read it too.
+    A snapshot pruned by a writer between reading the manifest and loading
+    it is retried with the newer manifest.
+    """
+    mmap = not writable and _env_flag("VECTOR_INDEX_MMAP", "true")
+    for _attempt in range(3):
+        signature = index_snapshots.signature(path)
+        manifest = index_snapshots.read_manifest(path)
+        if signature is None or manifest is None:
+            return None
         try:
-            return FAISS.load_local(path, get_embeddings(), allow_dangerous_deserialization=True)
-        except Exception:
+            with metrics.stage("vectorstore", "load"):
+                store, exact = index_snapshots.load_snapshot(path, manifest, get_embeddings(), mmap=mmap,
+                                                             with_exact=_rerank_enabled())
+        except Exception as e:
+            if index_snapshots.signature(path) != signature:
+                continue
+            print(f"Failed to load vector index snapshot {manifest.snapshot}: {e}")
             return None
+        return _loaded_index(store, signature, manifest, exact)
+    print(f"Vector index at {path} kept changing while loading it; giving up for now")
     return None
 
 
-def save_vector_store(store: FAISS) -> None:
-    store.save_local(get_faiss_path())
+def _loaded_index(store: FAISS, signature: Tuple[Any, ...] | None, manifest: index_snapshots.Manifest,
+                  exact: np.ndarray | None) -> LoadedIndex:
+    import numpy as np
+
+    metadata = MetadataIndex()
+    text_bytes = 0
+    for vector_id, doc_id in store.index_to_docstore_id.items():
+        doc = store.docstore.search(doc_id)
+        metadata.add(vector_id, getattr(doc, "metadata", None) or {})
+        text_bytes += len(getattr(doc, "page_content", "") or "")
+    index = store.index
+    code_size = index.sa_code_size() if _is_quantized(index) else index.d * 4
+    # Vectors plus chunk text (with a rough allowance for docstore objects); a mapped
+    # sidecar lives in the page cache shared by every worker and is not counted
+    sidecar = exact.nbytes if exact is not None and not isinstance(exact, np.memmap) else 0
+    resident = int(index.ntotal) * code_size + sidecar + text_bytes + 400 * metadata.size
+    return LoadedIndex(store=store, signature=signature, generation=(manifest.version, manifest.created_at),
+                       exact=exact, metadata=metadata, tombstones=_tombstone_array(manifest.tombstones),
+                       resident_bytes=resident)
+
+
+def _cache_budget_bytes() -> int:
+    return int(float(os.environ.get("VECTOR_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+
 
+def _publish(path: str, loaded: LoadedIndex) -> None:
+    # A slow background reload must not replace a newer index a writer already published
+    with _CACHE_LOCK:
+        current = _STORE_CACHE.get(path)
+        if current is None or loaded.generation >= current.generation:
+            _STORE_CACHE[path] = loaded
+        _STORE_CACHE.move_to_end(path)
+        _evict_locked(keep=path)
 
-def index_texts(texts: List[str], metadatas: List[dict] | None = None) -> int:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    docs = splitter.create_documents(texts, metadatas=metadatas)
 
-    store = load_vector_store()
-    embeddings = get_embeddings()
+def _evict_locked(keep: str) -> None:
+    """Drop least recently used indexes until the resident set fits the budget.
 
-    if store is None:
-        store = FAISS.from_documents(docs, embeddings)
+    The index just used is always kept, so one tenant larger than the budget
+    still works; it simply holds the worker to itself.
+    """
+    budget = _cache_budget_bytes()
+    total = sum(entry.resident_bytes for entry in _STORE_CACHE.values())
+    for path in list(_STORE_CACHE):
+        if total <= budget:
+            break
+        if path == keep:
+            continue
+        evicted = _STORE_CACHE.pop(path)
+        total -= evicted.resident_bytes
+        print(f"Evicted vector index {path} ({evicted.resident_bytes / 1e6:.1f} MB) from memory")
+
+
+def _touch(path: str) -> None:
+    with _CACHE_LOCK:
+        if path in _STORE_CACHE:
+            _STORE_CACHE.move_to_end(path)
+
+
+def _reload(path: str) -> None:
+    loaded = _load_from_disk(path)
+    if loaded is not None:
+        _publish(path, loaded)
+
+
+def _reload_in_background(path: str) -> None:
+    with _CACHE_LOCK:
+        running = _RELOADS.get(path)
+        if running is not None and running.is_alive():
+            return
+        thread = threading.Thread(target=_reload, args=(path,), name="vector-reload", daemon=True)
+        _RELOADS[path] = thread
+        thread.start()
+
+
+def _load_index(tenant: str | None = None, wait: bool = False) -> LoadedIndex | None:
+    """Current index, reloaded when another process published a new version.
+
+    Change detection is a single stat of the manifest. A new snapshot is
+    loaded in a background thread while searches keep using the previous one
+    (VECTOR_RELOAD_BACKGROUND); ``wait`` forces a synchronous load, which
+    writers use so they never build on a stale copy.
+    """
+    path = get_faiss_path(tenant)
+    signature = index_snapshots.signature(path)
+    if signature is None:
+        return None
+    cached = _STORE_CACHE.get(path)
+    metrics.cache_lookup("vector_store", cached is not None and cached.signature == signature)
+    if cached is not None and cached.signature == signature:
+        _touch(path)
+        return cached
+    if cached is not None:
+        manifest = index_snapshots.read_manifest(path)
+        if manifest is not None and manifest.version == cached.generation[0]:
+            # Only the tombstones changed: reuse the loaded vectors
+            loaded = replace(cached, signature=signature, generation=(manifest.version, manifest.created_at),
+                             tombstones=_tombstone_array(manifest.tombstones))
+            _publish(path, loaded)
+            return loaded
+        if not wait and _env_flag("VECTOR_RELOAD_BACKGROUND", "true"):
+            _reload_in_background(path)
+            return cached
+    loaded = _load_from_disk(path)
+    if loaded is None:
+        # Searches keep the previous copy rather than finding no index; writers must not build on it
+        return None if wait else cached
+    _publish(path, loaded)
+    return loaded
+
+
+def load_vector_store(tenant: str | None = None) -> FAISS | None:
+    loaded = _load_index(tenant)
+    return loaded.store if loaded is not None else None
+
+
+def load_index(tenant: str | None = None) -> LoadedIndex | None:
+    """The latest published index with its tombstones, loaded synchronously (for offline tools)."""
+    return _load_index(tenant, wait=True)
+
+
+def _save(path: str, store: FAISS, exact: np.ndarray | None, tombstones: np.ndarray | None,
+          chunking: ChunkingSpec | None = None) -> LoadedIndex:
+    """Publish ``store`` as the next snapshot at ``path``; the caller holds the writer lock."""
+    import numpy as np
+
+    manifest = index_snapshots.write_snapshot(path, store, exact, tombstones.tolist() if tombstones is not None else [],
+                                              chunking.to_dict() if chunking is not None else None)
+    if exact is not None:
+        # Serve re-ranks from the mapped file rather than keeping a second copy in memory
+        exact = np.load(os.path.join(index_snapshots.snapshot_path(path, manifest), index_snapshots.EXACT_VECTORS_FILE),
+                        mmap_mode="r")
+    loaded = _loaded_index(store, index_snapshots.signature(path), manifest, exact)
+    _publish(path, loaded)
+    return loaded
+
+
+def _save_tombstones(tenant: str | None, tombstones: np.ndarray) -> LoadedIndex | None:
+    """Record a new tombstone list against the current snapshot; the caller holds the writer lock."""
+    path = get_faiss_path(tenant)
+    manifest = index_snapshots.read_manifest(path)
+    if manifest is None:
+        return None
+    index_snapshots.update_tombstones(path, manifest, tombstones.tolist())
+    return _load_index(tenant, wait=True)
+
+
+def save_vector_store(store: FAISS, tenant: str | None = None) -> None:
+    path = get_faiss_path(tenant)
+    with index_snapshots.writer_lock(path):
+        _save(path, store, None, None)
+
+
+def _new_store(embeddings: Any, sample: np.ndarray) -> FAISS:
+    """Empty store whose FAISS index follows VECTOR_COMPRESSION.
+
+    ``int8`` learns per-dimension ranges from ``sample`` (the first upload);
+    values outside that range in later uploads are clipped, which the float32
+    re-rank corrects for.
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    dim = sample.shape[1]
+    mode = get_compression()
+    if mode == "none":
+        index = faiss.IndexFlatL2(dim)
     else:
-        store.add_documents(docs)
+        qtype = faiss.ScalarQuantizer.QT_fp16 if mode == "fp16" else faiss.ScalarQuantizer.QT_8bit
+        index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+        index.train(sample)
+    return FAISS(embeddings, index, InMemoryDocstore(), {})
+
+
+def build_store(texts: List[str], vectors: np.ndarray,
+                metadatas: List[dict] | None = None) -> Tuple[FAISS, np.ndarray | None]:
+    """A new store holding ``vectors``, compressed per VECTOR_COMPRESSION.
+
+    Returns (store, exact vectors to publish for the float32 re-rank, or
+    None when the index is not quantized or VECTOR_RERANK_FP32 is off),
+    ready for ``write_snapshot``.
+    """
+    store = _new_store(get_embeddings(), vectors)
+    store.add_embeddings(list(zip(texts, vectors.tolist())), metadatas=metadatas)
+    return store, vectors if _is_quantized(store.index) and _rerank_enabled() else None
 
-    save_vector_store(store)
-    return len(docs)
 
+def index_chunking(tenant: str | None = None) -> ChunkingSpec:
+    """Chunking recorded for the index, or the CHUNK_* default for a new (or older) one."""
+    manifest = index_snapshots.read_manifest(get_faiss_path(tenant))
+    if manifest is not None and manifest.chunking:
+        return ChunkingSpec.from_dict(manifest.chunking)
+    return default_spec()
 
-def similarity_search(query: str, k: int = 5) -> List[Tuple[str, dict]]:
-    store = load_vector_store()
-    if store is None:
+
+@dataclass
+class EmbeddedChunks:
+    """Chunks of a write with their vectors, computed before taking the writer lock."""
+    spec: ChunkingSpec
+    pairs: List[Tuple[str, List[float]]]
+    metadatas: List[dict]
+    vectors: np.ndarray
+
+
+def _embed_chunks(texts: List[str], metadatas: List[dict] | None, tenant: str | None,
+                  chunking: ChunkingSpec | None = None) -> EmbeddedChunks | None:
+    """Chunk and embed ``texts`` the way ``tenant``'s index expects; None when nothing is left to index."""
+    import numpy as np
+
+    exists = index_snapshots.read_manifest(get_faiss_path(tenant)) is not None
+    spec = index_chunking(tenant)
+    if chunking is not None and exists and chunking != spec:
+        raise ValueError(f"Index uses chunking {spec}, not {chunking}; re-index to change it")
+    spec = chunking or spec
+
+    with metrics.stage("upload", "chunk"):
+        docs = split_documents(texts, metadatas, spec)
+    if not docs:
+        return None
+
+    # Embed explicitly so the provider round trips are timed apart from the index update
+    contents = [d.page_content for d in docs]
+    with metrics.stage("upload", "embed"):
+        vectors = np.asarray(get_embeddings().embed_documents(contents), dtype=np.float32)
+    return EmbeddedChunks(spec, list(zip(contents, vectors.tolist())), [d.metadata for d in docs], vectors)
+
+
+def _add_chunks(tenant: str | None, chunks: EmbeddedChunks) -> None:
+    """Add embedded chunks to the index as a new snapshot; takes the writer lock (re-entrant)."""
+    import numpy as np
+
+    path = get_faiss_path(tenant)
+    with index_snapshots.writer_lock(path):
+        # Start from a private copy of the latest snapshot; readers keep the cached one
+        loaded = _load_from_disk(path, writable=True)
+        if loaded is None:
+            store, exact, tombstones = _new_store(get_embeddings(), chunks.vectors), None, None
+        else:
+            store, exact, tombstones = loaded.store, loaded.exact, loaded.tombstones
+        store.add_embeddings(chunks.pairs, metadatas=chunks.metadatas)
+        # The sidecar must cover every vector: one missing from an existing index stays missing
+        if _is_quantized(store.index) and _rerank_enabled() and (loaded is None or exact is not None):
+            exact = chunks.vectors if exact is None else np.vstack([exact, chunks.vectors])
+
+        with metrics.stage("upload", "save"):
+            _save(path, store, exact, tombstones, chunking=chunks.spec)
+
+
+def index_texts(texts: List[str], metadatas: List[dict] | None = None, tenant: str | None = None,
+                chunking: ChunkingSpec | None = None) -> int:
+    """Chunk, embed and add ``texts`` to the index; returns the number of chunks.
+
+    Every write to an index uses the chunking it was created with, so all of
+    its chunks are comparable. ``chunking`` picks the strategy for a new
+    index and must match an existing one. The writer lock is only held for
+    the index update, not the embedding calls.
+    """
+    chunks = _embed_chunks(texts, metadatas, tenant, chunking)
+    if chunks is None:
+        return 0
+    _add_chunks(tenant, chunks)
+    return len(chunks.pairs)
+
+
+def _rerank_enabled() -> bool:
+    return os.environ.get("VECTOR_RERANK_FP32", "true").lower() in ("1", "true", "yes")
+
+
+def _vector_matrix(loaded: LoadedIndex) -> np.ndarray | None:
+    """float32 (ntotal, d) view of the stored vectors, if one exists without copying."""
+    import faiss
+    import numpy as np
+
+    index = loaded.store.index
+    if loaded.exact is not None:
+        return loaded.exact
+    if isinstance(index, faiss.IndexFlat):
+        return faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+    return None
+
+
+def _search(loaded: LoadedIndex, query_vec: np.ndarray, k: int,
+            allowed: np.ndarray | None = None) -> List[Tuple[Document, float]]:
+    """Top-k (document, squared L2 distance) pairs for one query vector.
+
+    ``allowed`` restricts the search to those vector ids before any distance
+    is computed. A small scope is scored directly on its own rows (a per-filter
+    sub-index); a large one is passed to FAISS as an id selector.
+    """
+    import faiss
+    import numpy as np
+
+    index = loaded.store.index
+    tombstones = loaded.tombstones if loaded.tombstones is not None and len(loaded.tombstones) else None
+    if allowed is not None and tombstones is not None:
+        allowed = np.setdiff1d(allowed, tombstones, assume_unique=True)
+    if loaded.live_count <= 0 or (allowed is not None and len(allowed) == 0):
         return []
-    results = store.similarity_search_with_score(query, k=k)
-    pairs: List[Tuple[str, dict]] = []
-    for doc, _score in results:
-        pairs.append((doc.page_content, doc.metadata or {}))
-    return pairs
+    if query_vec.shape[1] != index.d:
+        raise ValueError(
+            f"Query embedding has {query_vec.shape[1]} dimensions but the index has {index.d}; "
+            "re-index after changing OPENAI_EMBEDDINGS_MODEL or EMBEDDING_DIMENSIONS"
+        )
+
+    matrix = _vector_matrix(loaded) if allowed is not None else None
+    if matrix is not None and len(allowed) * 8 <= index.ntotal:
+        rows = np.asarray(matrix[allowed], dtype=np.float32)
+        dists = ((rows - query_vec[0]) ** 2).sum(axis=1)
+        order = np.argsort(dists, kind="stable")[:k]
+        return _to_documents(loaded, allowed[order].tolist(), dists[order])
+
+    rerank = loaded.exact is not None and _rerank_enabled()
+    fetch = max(k, int(os.environ.get("VECTOR_RERANK_CANDIDATES", "20"))) if rerank else k
+    limit = loaded.live_count if allowed is None else len(allowed)
+    # Keep the selector objects referenced until the search returns
+    selector = None
+    if allowed is not None:
+        selector = faiss.IDSelectorBatch(allowed)
+    elif tombstones is not None:
+        deleted = faiss.IDSelectorBatch(tombstones)
+        selector = faiss.IDSelectorNot(deleted)
+    params = faiss.SearchParameters(sel=selector) if selector is not None else None
+    distances, ids = index.search(query_vec, min(fetch, limit), params=params)
+    found = [int(i) for i in ids[0] if i != -1]
+    dists = distances[0][: len(found)]
+    if rerank and found:
+        # Fancy indexing on the memory-mapped sidecar reads only the candidate rows
+        exact = np.asarray(loaded.exact[found], dtype=np.float32)
+        dists = ((exact - query_vec[0]) ** 2).sum(axis=1)
+        order = np.argsort(dists, kind="stable")
+        found = [found[j] for j in order]
+        dists = dists[order]
+    return _to_documents(loaded, found[:k], dists[:k])
+
+
+def _to_documents(loaded: LoadedIndex, ids: List[int], dists: Any) -> List[Tuple[Document, float]]:
+    results: List[Tuple[Document, float]] = []
+    for i, dist in zip(ids, dists):
+        doc = loaded.store.docstore.search(loaded.store.index_to_docstore_id[i])
+        results.append((doc, float(dist)))
+    return results
+
+
+def similarity_search(query: str, k: int = 5, filters: Dict[str, Any] | None = None,
+                      tenant: str | None = None) -> List[Tuple[str, dict]]:
+    """Top-k (text, metadata) chunks for ``query`` within ``tenant``'s documents.
+
+    ``filters`` is applied before the vector search, e.g.
+    ``{"source": "a.pdf"}``, ``{"source": ["a.pdf", "b.pdf"], "page": 3}``,
+    ``{"tag": "pricing", "uploaded_after": 1718000000}``.
+    """
+    return [(text, metadata) for text, metadata, _d in similarity_search_with_scores(query, k, filters, tenant)]
+
+
+def similarity_search_with_scores(query: str, k: int = 5, filters: Dict[str, Any] | None = None,
+                                  tenant: str | None = None) -> List[Tuple[str, dict, float]]:
+    """Like ``similarity_search`` but keeps each chunk's squared L2 distance (lower is closer)."""
+    import numpy as np
+
+    loaded = _load_index(tenant)
+    if loaded is None:
+        return []
+    allowed = loaded.metadata.select(filters) if filters else None
+    query_vec = np.asarray([get_embeddings().embed_query(query)], dtype=np.float32)
+    results: List[Tuple[str, dict, float]] = []
+    for doc, distance in _search(loaded, query_vec, k, allowed):
+        results.append((doc.page_content, doc.metadata or {}, distance))
+    return results
+
+
+def _live_ids(loaded: LoadedIndex, source: str) -> np.ndarray:
+    import numpy as np
+
+    ids = np.fromiter(sorted(loaded.metadata.ids_for("source", source)), dtype=np.int64)
+    if loaded.tombstones is not None and len(loaded.tombstones):
+        ids = np.setdiff1d(ids, loaded.tombstones, assume_unique=True)
+    return ids
+
+
+def document_sources(tenant: str | None = None) -> Dict[str, int]:
+    """Indexed (not deleted) source files with their chunk counts."""
+    loaded = _load_index(tenant)
+    if loaded is None:
+        return {}
+    counts = {source: len(_live_ids(loaded, source)) for source in loaded.metadata.values("source")}
+    return {source: n for source, n in counts.items() if n}
+
+
+def delete_document(source: str, tenant: str | None = None) -> int:
+    """Tombstone every chunk of ``source``; returns the number of chunks removed.
+
+    Only the tombstone list is rewritten, so the cost is proportional to the
+    document, not the corpus. Deleted vectors are skipped at query time and
+    physically dropped by ``compact_index``, which starts in the background
+    once tombstones exceed VECTOR_COMPACT_RATIO of the index.
+    """
+    import numpy as np
+
+    with index_snapshots.writer_lock(get_faiss_path(tenant)):
+        loaded = _load_index(tenant, wait=True)
+        if loaded is None:
+            return 0
+        ids = _live_ids(loaded, source)
+        if len(ids) == 0:
+            return 0
+        current = loaded.tombstones if loaded.tombstones is not None else np.empty(0, dtype=np.int64)
+        loaded = _save_tombstones(tenant, np.union1d(current, ids))
+    _maybe_compact(loaded, tenant)
+    return int(len(ids))
+
+
+def replace_document(source: str, texts: List[str], metadatas: List[dict] | None = None,
+                     tenant: str | None = None) -> int:
+    """Index the new version of ``source`` and then tombstone the old chunks.
+
+    Searches see the old version until the new one is saved, never neither.
+    The new version is embedded before the writer lock is taken.
+    """
+    import numpy as np
+
+    chunks = _embed_chunks(texts, metadatas, tenant)
+    with index_snapshots.writer_lock(get_faiss_path(tenant)):
+        loaded = _load_index(tenant, wait=True)
+        old_ids = _live_ids(loaded, source) if loaded is not None else np.empty(0, dtype=np.int64)
+        if chunks is not None:
+            _add_chunks(tenant, chunks)
+        loaded = _load_index(tenant, wait=True)
+        if len(old_ids):
+            loaded = _save_tombstones(tenant, np.union1d(loaded.tombstones, old_ids))
+    _maybe_compact(loaded, tenant)
+    return len(chunks.pairs) if chunks is not None else 0
+
+
+def compact_index(tenant: str | None = None) -> Dict[str, int]:
+    """Physically remove tombstoned vectors and rewrite the index."""
+    import numpy as np
+
+    path = get_faiss_path(tenant)
+    with index_snapshots.writer_lock(path):
+        loaded = _load_from_disk(path, writable=True)
+        if loaded is None or loaded.tombstones is None or len(loaded.tombstones) == 0:
+            return {"removed": 0, "vectors": loaded.live_count if loaded is not None else 0}
+        store, tombstones = loaded.store, loaded.tombstones
+        doc_ids = [store.index_to_docstore_id[int(i)] for i in tombstones]
+        with metrics.stage("vectorstore", "compact"):
+            # FAISS.delete removes the vectors and renumbers the remaining ids in order
+            store.delete(doc_ids)
+            exact = None
+            if loaded.exact is not None:
+                exact = np.delete(np.asarray(loaded.exact), tombstones, axis=0)
+            _save(path, store, exact, None)
+        print(f"Compacted vector index: removed {len(tombstones)} vectors, {store.index.ntotal} remain")
+        return {"removed": int(len(tombstones)), "vectors": int(store.index.ntotal)}
+
+
+def _maybe_compact(loaded: LoadedIndex | None, tenant: str | None = None) -> None:
+    if loaded is None or loaded.tombstones is None or not len(loaded.tombstones):
+        return
+    ratio = float(os.environ.get("VECTOR_COMPACT_RATIO", "0.2"))
+    if len(loaded.tombstones) < ratio * loaded.store.index.ntotal:
+        return
+    path = get_faiss_path(tenant)
+    running = _COMPACTION.get(path)
+    if running is not None and running.is_alive():
+        return
+    thread = threading.Thread(target=compact_index, args=(tenant,), name="vector-compaction", daemon=True)
+    _COMPACTION[path] = thread
+    thread.start()
+
+
+def index_stats(tenant: str | None = None) -> Dict[str, Any]:
+    """Size of the loaded index in memory, for reports and /health-style checks."""
+    loaded = _load_index(tenant)
+    if loaded is None:
+        return {"vectors": 0}
+    import faiss
+
+    index = loaded.store.index
+    compression = "none"
+    if _is_quantized(index):
+        compression = "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    code_size = index.sa_code_size() if _is_quantized(index) else index.d * 4
+    return {
+        "vectors": int(index.ntotal),
+        "deleted": int(len(loaded.tombstones)) if loaded.tombstones is not None else 0,
+        "dimensions": int(index.d),
+        "compression": compression,
+        "index_bytes": int(index.ntotal * code_size),
+        "exact_sidecar_bytes": int(loaded.exact.nbytes) if loaded.exact is not None else 0,
+        "resident_bytes": loaded.resident_bytes,
+        "chunking": str(index_chunking(tenant)),
+    }
 
 
+def resident_indexes() -> Dict[str, Any]:
+    """Indexes currently held in this worker, least recently used first."""
+    with _CACHE_LOCK:
+        entries = [(path, loaded.store.index.ntotal, loaded.resident_bytes) for path, loaded in _STORE_CACHE.items()]
+    return {
+        "budget_bytes": _cache_budget_bytes(),
+        "resident_bytes": sum(size for _p, _n, size in entries),
+        "indexes": [{"path": path, "vectors": int(n), "resident_bytes": size} for path, n, size in entries],
+    }
@@ -0,0 +1,186 @@
+"""
+Offline throughput/latency benchmark for /api/chat, /api/upload and similarity_search.
+
+Runs entirely in-process against local fakes (see benchmarks/fakes.py), so it
+needs no OpenAI key, MongoDB or network access:
+
+    python -m benchmarks.bench_backend --concurrency 1 4 16 --requests 200
+    python -m benchmarks.bench_backend --compare benchmarks/results/backend-<rev>.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from . import fakes
+from .common import UPLOADS_DIR, compare, latency_summary, rss_mb, run_metadata, write_results
+
+
+CHAT_FLOW = [
+    "Hi, I want to onboard",
+    "Asha Rao",
+    "I am registering as a company",
+    "my website is example-shop.in",
+    "PAN is ABCDE1234F",
+    "Aadhaar 123456789012",
+]
+QUESTIONS = [
+    "How do cross-border payments settle?",
+    "What is exploratory data analysis?",
+    "Explain polymorphism in object oriented programming",
+    "What fees apply to FX conversion?",
+]
+
+
+async def _drive(request: Callable[[int], Awaitable[bool]], concurrency: int, total: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            start = time.perf_counter()
+            ok = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - start, errors)
+
+
+def _chat_payload(i: int, concurrency: int) -> Dict[str, Any]:
+    session, step = divmod(i, len(CHAT_FLOW) + 1)
+    if step == len(CHAT_FLOW):
+        content = QUESTIONS[session % len(QUESTIONS)]
+        history = CHAT_FLOW
+    else:
+        content = CHAT_FLOW[step]
+        history = CHAT_FLOW[:step]
+    messages = []
+    for h in history:
+        messages.append({"role": "user", "content": h})
+        messages.append({"role": "assistant", "content": "Noted, thank you."})
+    messages.append({"role": "user", "content": content})
+    return {"session_id": f"bench-c{concurrency}-{session}", "messages": messages}
+
+
+async def bench_chat(client, concurrency: int, total: int) -> Dict[str, Any]:
+    async def request(i: int) -> bool:
+        resp = await client.post("/api/chat", json=_chat_payload(i, concurrency))
+        return resp.status_code == 200
+
+    return await _drive(request, concurrency, total)
+
+
+async def bench_upload(client, concurrency: int, total: int, pdfs: List[Path]) -> Dict[str, Any]:
+    blobs = [(p.name, p.read_bytes()) for p in pdfs]
+
+    async def request(i: int) -> bool:
+        name, data = blobs[i % len(blobs)]
+        resp = await client.post("/api/upload", files={"files": (name, data, "application/pdf")})
+        return resp.status_code == 200 and resp.json().get("success", False)
+
+    return await _drive(request, concurrency, total)
+
+
+def bench_search(concurrency: int, total: int) -> Dict[str, Any]:
+    from app.vectorstore import similarity_search
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        similarity_search(QUESTIONS[i % len(QUESTIONS)], k=4)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+def seed_index(pdfs: List[Path]) -> int:
+    from app.pdf_processing import extract_pages_from_pdf
+    from app.vectorstore import index_texts
+
+    # Same per-page layout and metadata as /api/upload
+    texts, metas = [], []
+    uploaded_at = time.time()
+    for p in pdfs:
+        for page_no, text in enumerate(extract_pages_from_pdf(str(p)), start=1):
+            if text.strip():
+                texts.append(text)
+                metas.append({"source": p.name, "page": page_no, "uploaded_at": uploaded_at})
+    return index_texts(texts, metas) if texts else 0
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fakes.install(
+        llm_latency_ms=args.llm_latency_ms,
+        llm_jitter_ms=args.llm_jitter_ms,
+        embed_latency_ms=args.embed_latency_ms,
+        mongo_latency_ms=args.mongo_latency_ms,
+    )
+    import httpx
+    from app.main import app
+
+    pdfs = sorted(Path(args.uploads).glob("*.pdf"))
+    chunks = seed_index(pdfs)
+    print(f"Seeded index with {chunks} chunks from {len(pdfs)} PDFs")
+
+    runs: List[Dict[str, Any]] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for c in args.concurrency:
+            if "chat" in args.scenarios:
+                runs.append({"name": f"chat@c{c}", "scenario": "chat", "concurrency": c,
+                             **await bench_chat(client, c, args.requests), **rss_mb()})
+            if "search" in args.scenarios:
+                runs.append({"name": f"search@c{c}", "scenario": "search", "concurrency": c,
+                             **bench_search(c, args.requests), **rss_mb()})
+            if "upload" in args.scenarios and pdfs:
+                runs.append({"name": f"upload@c{c}", "scenario": "upload", "concurrency": c,
+                             **await bench_upload(client, c, args.upload_requests, pdfs), **rss_mb()})
+            for r in runs[-len(args.scenarios):]:
+                print(f"{r['name']:>12}: {r['throughput_rps']:>8} req/s  p50 {r['p50_ms']}ms  "
+                      f"p95 {r['p95_ms']}ms  p99 {r['p99_ms']}ms  rss {r['rss_mb']}MiB")
+
+    return {"meta": run_metadata(vars(args)), "runs": runs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="requests per chat/search run")
+    parser.add_argument("--upload-requests", type=int, default=8, help="requests per upload run")
+    parser.add_argument("--scenarios", nargs="+", default=["chat", "search", "upload"],
+                        choices=["chat", "search", "upload"])
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mongo-latency-ms", type=float, default=0.0)
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR), help="directory of PDFs to seed and upload")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/backend-<rev>.json)")
+    parser.add_argument("--compare", help="previous result JSON to diff against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    path = write_results("backend", result, args.output)
+    print(f"Results written to {path}")
+    if args.compare:
+        for line in compare(json.loads(Path(args.compare).read_text()), result):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Lead ingestion throughput: one /api/submit per lead vs /api/leads/bulk.
+
+Generates --leads synthetic leads (a share of them invalid or repeating an
+earlier PAN/Aadhaar pair), then ingests them into an empty fake Mongo
+collection with a simulated round trip of --mongo-latency-ms:
+
+    single       one POST /api/submit per lead, --concurrency in flight
+    bulk-ndjson  one POST /api/leads/bulk with an NDJSON body
+    bulk-csv     the same as CSV
+
+and reports leads/sec with the created/duplicate/invalid counts. Both
+endpoints validate leads the same way, so the invalid counts match.
+
+    python -m benchmarks.bench_bulk_submit
+    python -m benchmarks.bench_bulk_submit --leads 5000 --batch-sizes 100 500 1000 --workers 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from . import fakes
+from .common import run_metadata, write_results
+
+FIELDS = ("full_name", "business_type", "website", "pan", "aadhaar")
+
+
+def make_leads(n: int, duplicate_ratio: float, invalid_ratio: float, seed: int = 7) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    leads: List[Dict[str, str]] = []
+    for i in range(n):
+        roll = rng.random()
+        if leads and roll < duplicate_ratio:
+            lead = dict(rng.choice(leads), full_name=f"Repeat Lead {i}")
+        else:
+            lead = {
+                "full_name": f"Bulk Lead {i}",
+                "business_type": rng.choice(["company", "freelancer"]),
+                "website": f"https://lead{i}.example",
+                "pan": "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=5)) + f"{i % 10000:04d}" + "Z",
+                "aadhaar": f"{rng.randrange(10**11, 10**12)}",
+            }
+            if roll > 1 - invalid_ratio:
+                lead["aadhaar"] = lead["aadhaar"][:8]
+        leads.append(lead)
+    return leads
+
+
+def ndjson_body(leads: List[Dict[str, str]]) -> bytes:
+    return "".join(json.dumps(lead) + "\n" for lead in leads).encode()
+
+
+def csv_body(leads: List[Dict[str, str]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(leads)
+    return buffer.getvalue().encode()
+
+
+async def run_single(client, leads: List[Dict[str, str]], concurrency: int) -> Dict[str, int]:
+    counts = {"created": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(i: int, lead: Dict[str, str]) -> None:
+        async with semaphore:
+            resp = await client.post("/api/submit", json={"session_id": f"bench-single-{i}", "lead": lead})
+        if resp.status_code in (400, 422):
+            counts["invalid"] += 1
+        elif resp.status_code != 200:
+            counts["failed"] += 1
+        else:
+            counts["duplicate" if resp.json()["duplicate"] == "true" else "created"] += 1
+
+    await asyncio.gather(*(submit(i, lead) for i, lead in enumerate(leads)))
+    return counts
+
+
+async def run_bulk(client, body: bytes, fmt: str) -> Dict[str, Any]:
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    resp = await client.post("/api/leads/bulk", content=body, headers={"content-type": content_type})
+    resp.raise_for_status()
+    report = resp.json()
+    return {"created": report["created"], "duplicate": report["duplicates"], "invalid": report["invalid"],
+            "failed": report["failed"], "server_leads_per_sec": report["leads_per_sec"]}
+
+
+async def bench(args: argparse.Namespace, leads_collection) -> List[Dict[str, Any]]:
+    import httpx
+    from app.main import app
+
+    leads = make_leads(args.leads, args.duplicate_ratio, args.invalid_ratio)
+    bodies = {"ndjson": ndjson_body(leads), "csv": csv_body(leads)}
+    runs: List[Dict[str, Any]] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        plans: List[Dict[str, Any]] = []
+        if "single" in args.modes:
+            plans.append({"mode": "single", "concurrency": args.concurrency})
+        for mode in ("bulk-ndjson", "bulk-csv"):
+            if mode in args.modes:
+                plans.extend({"mode": mode, "batch_size": b, "workers": w}
+                             for b in args.batch_sizes for w in args.workers)
+        for plan in plans:
+            leads_collection.delete_many({})
+            if "batch_size" in plan:
+                os.environ["BULK_BATCH_SIZE"] = str(plan["batch_size"])
+                os.environ["BULK_ENCRYPT_WORKERS"] = str(plan["workers"])
+            start = time.perf_counter()
+            if plan["mode"] == "single":
+                counts = await run_single(client, leads, args.concurrency)
+            else:
+                fmt = plan["mode"].split("-", 1)[1]
+                counts = await run_bulk(client, bodies[fmt], fmt)
+            elapsed = time.perf_counter() - start
+            run = {**plan, **counts, "leads": len(leads), "seconds": round(elapsed, 3),
+                   "leads_per_sec": round(len(leads) / elapsed, 1), "stored": leads_collection.count_documents({})}
+            if plan["mode"] != "single":
+                run["request_bytes"] = len(bodies[plan["mode"].split("-", 1)[1]])
+            runs.append(run)
+            label = plan["mode"] + (f" batch={plan['batch_size']} workers={plan['workers']}" if "batch_size" in plan
+                                    else f" concurrency={plan['concurrency']}")
+            print(f"{label:<40} {run['leads_per_sec']:>9} leads/s  {run['seconds']:>7}s  created {run['created']}  "
+                  f"duplicate {run['duplicate']}  invalid {run['invalid']}  failed {run['failed']}")
+    return runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--invalid-ratio", type=float, default=0.05)
+    parser.add_argument("--modes", nargs="+", default=["single", "bulk-ndjson", "bulk-csv"],
+                        choices=["single", "bulk-ndjson", "bulk-csv"])
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight for the single mode")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[4], help="BULK_ENCRYPT_WORKERS values")
+    parser.add_argument("--mongo-latency-ms", type=float, default=2.0, help="simulated Mongo round trip")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/bulk-submit-<rev>.json)")
+    args = parser.parse_args()
+
+    os.environ["BULK_MAX_ROWS"] = str(max(args.leads, 1))
+    f = fakes.install(llm_latency_ms=0.0, mongo_latency_ms=args.mongo_latency_ms)
+    runs = asyncio.run(bench(args, f["mongo"]["ai_hackathon"].leads))
+
+    path = write_results("bulk-submit", {"meta": run_metadata(vars(args)), "runs": runs}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Request size and parse cost of /api/chat with client-held vs server-kept history.
+
+"full" is the original mode, where every request carries the whole
+``messages`` list. "session" sends only the new ``message`` and lets the
+server keep the transcript for the session_id.
+
+1. Parse: for conversations of increasing length it reports the request body
+   size and the time to validate the body into a ChatRequest and assemble the
+   (role, content) history the LLM call needs.
+2. End to end: one conversation per mode through the app (offline fakes, no
+   LLM latency), reporting bytes sent and per-turn server latency.
+
+    python -m benchmarks.bench_chat_history
+    python -m benchmarks.bench_chat_history --turns 1 10 40 --reply-chars 600 --e2e-turns 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from . import fakes
+from .bench_backend import CHAT_FLOW, QUESTIONS
+from .common import latency_summary, percentile, run_metadata, write_results
+
+
+def _user_turn(i: int) -> str:
+    script = CHAT_FLOW + QUESTIONS
+    return script[i % len(script)]
+
+
+def _transcript(turns: int, reply_chars: int) -> List[Dict[str, str]]:
+    """``turns`` user messages with assistant replies between them, ending on the new user message."""
+    reply = ("Thanks, noted. " * (reply_chars // 15 + 1))[:reply_chars]
+    messages: List[Dict[str, str]] = []
+    for i in range(turns):
+        if i:
+            messages.append({"role": "assistant", "content": reply})
+        messages.append({"role": "user", "content": _user_turn(i)})
+    return messages
+
+
+def bench_parse(turns: int, reply_chars: int, repeat: int) -> List[Dict[str, Any]]:
+    from app.conversations import ConversationStore
+    from app.schemas import ChatRequest
+
+    messages = _transcript(turns, reply_chars)
+    store = ConversationStore(max_sessions=10, max_messages=10_000, ttl_seconds=3600)
+    store.append("s", *((m["role"], m["content"]) for m in messages[:-1]))
+    bodies = {
+        "full": json.dumps({"session_id": "s", "messages": messages}).encode(),
+        "session": json.dumps({"session_id": "s", "message": messages[-1]}).encode(),
+    }
+
+    runs = []
+    for mode, body in bodies.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            req = ChatRequest.model_validate_json(body)
+            if req.message is not None:
+                history = store.history(req.session_id)
+                history.append((req.message.role, req.message.content))
+            else:
+                history = [(m.role, m.content) for m in req.messages]
+            samples.append(time.perf_counter() - start)
+        runs.append({
+            "mode": mode,
+            "turns": turns,
+            "messages": len(history),
+            "request_bytes": len(body),
+            "parse_p50_us": round(percentile(samples, 0.50) * 1e6, 2),
+            "parse_p99_us": round(percentile(samples, 0.99) * 1e6, 2),
+        })
+    return runs
+
+
+async def bench_conversation(turns: int) -> List[Dict[str, Any]]:
+    import httpx
+    from app.main import app
+
+    runs = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for mode in ("full", "session"):
+            session_id = f"bench-history-{mode}"
+            messages: List[Dict[str, str]] = []
+            sent = 0
+            latencies: List[float] = []
+            start_all = time.perf_counter()
+            for i in range(turns):
+                new = {"role": "user", "content": _user_turn(i)}
+                if mode == "full":
+                    messages.append(new)
+                    payload: Dict[str, Any] = {"session_id": session_id, "messages": messages}
+                else:
+                    payload = {"session_id": session_id, "message": new}
+                body = json.dumps(payload).encode()
+                sent += len(body)
+                start = time.perf_counter()
+                resp = await client.post("/api/chat", content=body, headers={"content-type": "application/json"})
+                latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+                if mode == "full":
+                    messages.append({"role": "assistant", "content": resp.json()["reply"]})
+            summary = latency_summary(latencies, time.perf_counter() - start_all)
+            runs.append({
+                "mode": mode,
+                "turns": turns,
+                "request_bytes_total": sent,
+                "last_request_bytes": len(body),
+                "p50_ms": summary["p50_ms"],
+                "p99_ms": summary["p99_ms"],
+                "last_turn_ms": round(latencies[-1] * 1000, 3),
+            })
+    return runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 5, 10, 20, 40],
+                        help="conversation lengths (user turns) for the parse benchmark")
+    parser.add_argument("--reply-chars", type=int, default=400, help="length of each assistant reply in the history")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--e2e-turns", type=int, default=40, help="turns of the end-to-end conversation")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/chat-history-<rev>.json)")
+    args = parser.parse_args()
+
+    fakes.install(llm_latency_ms=0.0)
+
+    parse_runs: List[Dict[str, Any]] = []
+    for turns in args.turns:
+        parse_runs.extend(bench_parse(turns, args.reply_chars, args.repeat))
+        for r in parse_runs[-2:]:
+            print(f"parse {r['mode']:>7} turns={r['turns']:<3}: {r['request_bytes']:>7} B  "
+                  f"p50 {r['parse_p50_us']}us  p99 {r['parse_p99_us']}us")
+
+    e2e_runs = asyncio.run(bench_conversation(args.e2e_turns))
+    for r in e2e_runs:
+        print(f"chat  {r['mode']:>7} turns={r['turns']:<3}: {r['request_bytes_total']:>8} B sent  "
+              f"p50 {r['p50_ms']}ms  p99 {r['p99_ms']}ms  last turn {r['last_turn_ms']}ms")
+
+    path = write_results("chat-history", {"meta": run_metadata(vars(args)), "parse": parse_runs, "chat": e2e_runs},
+                         args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compare chunking strategies for index_texts on the PDFs in storage/uploads.
+
+Builds one index per strategy (same per-page input as /api/upload) and
+reports chunk count, embedding tokens and cost, index size, build time and
+retrieval hit rate on a local question set. A question is a hit when one of
+the top-k chunks comes from an expected page of the expected file.
+
+    python -m benchmarks.bench_chunking
+    python -m benchmarks.bench_chunking --strategies character:1000:150 character:1000:0 sentence page
+    python -m benchmarks.bench_chunking --openai   # real embeddings, needs OPENAI_API_KEY
+
+Strategies are ``strategy[:size[:overlap]]`` (see app/chunking.py). The
+default question set is benchmarks/questions.jsonl, one
+{"question", "source", "pages"} object per line.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import fakes
+from .common import UPLOADS_DIR, run_metadata, token_counter, write_results
+
+
+QUESTIONS_FILE = Path(__file__).parent / "questions.jsonl"
+DEFAULT_STRATEGIES = ["character:1000:150", "character:1000:0", "token", "sentence", "page"]
+
+
+def _dir_size(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def load_pages(uploads: str) -> tuple[List[str], List[dict]]:
+    from app.pdf_processing import build_page_documents, extract_pages_from_pdf
+
+    texts: List[str] = []
+    metas: List[dict] = []
+    for p in sorted(Path(uploads).glob("*.pdf")):
+        page_texts, page_metas = build_page_documents(p.name, extract_pages_from_pdf(str(p)))
+        texts.extend(page_texts)
+        metas.extend(page_metas)
+    return texts, metas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR))
+    parser.add_argument("--strategies", nargs="+", default=DEFAULT_STRATEGIES)
+    parser.add_argument("--questions", default=str(QUESTIONS_FILE))
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--price-per-1m-tokens", type=float, default=0.02,
+                        help="embedding price in USD (text-embedding-3-small: 0.02)")
+    parser.add_argument("--openai", action="store_true", help="use OpenAI embeddings instead of the offline ones")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/chunking-<rev>.json)")
+    args = parser.parse_args()
+
+    from app import vectorstore
+    from app.chunking import ChunkingSpec, split_documents
+
+    original_get_embeddings = vectorstore.get_embeddings
+    fakes.install()
+    if args.openai:
+        vectorstore.get_embeddings = original_get_embeddings
+
+    texts, metas = load_pages(args.uploads)
+    with open(args.questions) as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    tokenizer, count_tokens = token_counter()
+    workdir = tempfile.mkdtemp(prefix="bench-chunking-")
+    print(f"{len(texts)} pages, {len(questions)} questions, tokens counted with {tokenizer}")
+
+    runs: List[Dict[str, Any]] = []
+    for value in args.strategies:
+        try:
+            spec = ChunkingSpec.parse(value)
+            # Counted up front: the index only stores what it was given
+            docs = split_documents(texts, metas, spec)
+        except Exception as e:
+            print(f"{value:>20}: skipped ({e})")
+            continue
+        os.environ["VECTOR_DB_DIR"] = os.path.join(workdir, str(spec).replace(":", "_"))
+        start = time.perf_counter()
+        chunks = vectorstore.index_texts(texts, metas, chunking=spec)
+        build_s = time.perf_counter() - start
+
+        hits = 0
+        reciprocal_ranks = 0.0
+        for q in questions:
+            found = vectorstore.similarity_search(q["question"], k=args.k)
+            for rank, (_text, meta) in enumerate(found, start=1):
+                if meta.get("source") == q["source"] and meta.get("page") in q["pages"]:
+                    hits += 1
+                    reciprocal_ranks += 1 / rank
+                    break
+
+        tokens = sum(count_tokens(d.page_content) for d in docs)
+        stats = vectorstore.index_stats()
+        run = {
+            "strategy": str(spec),
+            "chunks": chunks,
+            "avg_chunk_tokens": round(tokens / max(1, chunks), 1),
+            "embedding_tokens": tokens,
+            "embedding_cost_usd": round(tokens / 1_000_000 * args.price_per_1m_tokens, 6),
+            "index_bytes": stats["index_bytes"],
+            "disk_bytes": _dir_size(os.environ["VECTOR_DB_DIR"]),
+            "build_seconds": round(build_s, 3),
+            f"hit@{args.k}": round(hits / max(1, len(questions)), 4),
+            "mrr": round(reciprocal_ranks / max(1, len(questions)), 4),
+        }
+        runs.append(run)
+        print(f"{run['strategy']:>20}: {chunks:>5} chunks, {tokens:>7} tokens (${run['embedding_cost_usd']}), "
+              f"{run['disk_bytes'] / 1024:.0f} KiB on disk, hit@{args.k} {run[f'hit@{args.k}']:.3f}, mrr {run['mrr']:.3f}")
+
+    vectorstore.get_embeddings = original_get_embeddings
+    meta = run_metadata(vars(args))
+    meta["tokenizer"] = tokenizer
+    path = write_results("chunking", {"meta": meta, "runs": runs}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
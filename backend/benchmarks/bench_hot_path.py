@@ -0,0 +1,210 @@
+"""
+Per-request CPU time and allocations of the /api/chat hot path.
+
+Requests are sent straight to the ASGI app (no HTTP client or server in the
+measurement) with the offline fakes, an index seeded from storage/uploads and
+no LLM latency, so what remains is the app's own work: parsing, lead
+inference, retrieval, building and serialising the response.
+
+1. infer: infer_lead_fields_from_message over the chat script.
+2. encode: a typical ChatResponse through each JSON encoder the app can use.
+3. chat: whole /api/chat requests (a conversation per session, cycling
+   through the script), in "messages" and "message" history modes.
+
+CPU is process time per call, measured without tracing; allocations are the
+tracemalloc peak per call and the bytes still held afterwards, measured in a
+second pass. Run it on two revisions to compare (results are named by rev):
+
+    python -m benchmarks.bench_hot_path
+    python -m benchmarks.bench_hot_path --requests 2000 --repeat 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from . import fakes
+from .bench_backend import CHAT_FLOW, QUESTIONS, seed_index
+from .common import UPLOADS_DIR, run_metadata, write_results
+
+
+def measure(fn: Callable[[int], Any], n: int, reset: Callable[[], None] | None = None) -> Dict[str, Any]:
+    """CPU microseconds per call, then tracemalloc peak/retained bytes per call in a traced pass.
+
+    ``reset`` runs before each pass, so both passes see the same state.
+    """
+    reset = reset or (lambda: None)
+    reset()
+    for i in range(min(n, 50)):
+        fn(i)
+    reset()
+    gc.collect()
+    start = time.process_time()
+    for i in range(n):
+        fn(i)
+    cpu = time.process_time() - start
+
+    peaks: List[int] = []
+    reset()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        "calls": n,
+        "cpu_us": round(cpu / n * 1e6, 2),
+        "peak_alloc_bytes": int(sum(peaks) / n),
+        "retained_bytes": int(retained / n),
+    }
+
+
+def asgi_post(app, path: str, body: bytes) -> Callable[[], Any]:
+    """A coroutine factory that POSTs ``body`` to ``app`` and returns (status, response body)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def call():
+        sent = False
+        out: Dict[str, Any] = {"body": b""}
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                out["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                out["body"] += message.get("body", b"")
+
+        await app(dict(scope), receive, send)
+        return out["status"], out["body"]
+
+    return call
+
+
+def bench_infer(repeat: int) -> Dict[str, Any]:
+    from app.chat_logic import infer_lead_fields_from_message
+    from app.schemas import LeadFields
+
+    script = CHAT_FLOW + QUESTIONS
+    partial = LeadFields(full_name="Asha Rao", business_type="company")
+    return measure(lambda i: infer_lead_fields_from_message(script[i % len(script)], partial), repeat)
+
+
+def bench_encode(repeat: int) -> List[Dict[str, Any]]:
+    from fastapi.responses import JSONResponse
+
+    from app.schemas import ChatResponse, LeadFields, RetrievedContext
+
+    response = ChatResponse(
+        reply="Thanks Asha Rao! " * 20,
+        lead_fields=LeadFields(full_name="Asha Rao", business_type="company", pan="ABCDE1234F"),
+        completed={"full_name": True, "business_type": True, "website": False, "pan": True, "aadhaar": False},
+        contexts=[RetrievedContext(content_preview="x" * 200, source="doc.pdf", page=i, distance=0.5, relevance=None)
+                  for i in range(4)],
+    )
+    payload = response.model_dump(mode="json")
+    encoders: Dict[str, Callable[[int], Any]] = {
+        "json (JSONResponse)": lambda i: JSONResponse(payload).body,
+        "pydantic model_dump_json": lambda i: response.model_dump_json().encode(),
+    }
+    try:
+        from fastapi.responses import ORJSONResponse
+        import orjson  # noqa: F401
+
+        encoders["orjson (ORJSONResponse)"] = lambda i: ORJSONResponse(payload).body
+    except ImportError:
+        pass
+    return [{"encoder": name, **measure(fn, repeat)} for name, fn in encoders.items()]
+
+
+def bench_chat(requests: int) -> List[Dict[str, Any]]:
+    from app.main import CONVERSATIONS, SESSION_STATE, app
+
+    script = CHAT_FLOW + QUESTIONS
+    runs = []
+    for mode in ("messages", "message"):
+        bodies = []
+        sessions = set()
+        for i in range(requests):
+            session, step = divmod(i, len(script))
+            session_id = f"hot-{mode}-{session}"
+            sessions.add(session_id)
+            if mode == "messages":
+                history = [{"role": "user", "content": m} for m in script[: step + 1]]
+                bodies.append(json.dumps({"session_id": session_id, "messages": history}).encode())
+            else:
+                bodies.append(json.dumps({"session_id": session_id,
+                                          "message": {"role": "user", "content": script[step]}}).encode())
+        loop = asyncio.new_event_loop()
+
+        def reset() -> None:
+            # Every pass replays the same conversations from their first turn
+            for session_id in sessions:
+                SESSION_STATE.pop(session_id, None)
+                CONVERSATIONS.clear(session_id)
+
+        def one(i: int) -> None:
+            status, _body = loop.run_until_complete(asgi_post(app, "/api/chat", bodies[i % len(bodies)])())
+            if status != 200:
+                raise RuntimeError(f"/api/chat returned {status}")
+
+        try:
+            runs.append({"mode": mode, **measure(one, requests, reset)})
+        finally:
+            loop.close()
+    return runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="chat requests per mode")
+    parser.add_argument("--repeat", type=int, default=10000, help="calls per infer/encode measurement")
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR), help="PDFs to seed the index with")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/hot-path-<rev>.json)")
+    args = parser.parse_args()
+
+    os.environ["METRICS_SPAN_LOG"] = "false"
+    fakes.install(llm_latency_ms=0.0)
+    chunks = seed_index(sorted(Path(args.uploads).glob("*.pdf"))[:2])
+    print(f"Seeded {chunks} chunks")
+
+    infer = bench_infer(args.repeat)
+    print(f"infer  : {infer['cpu_us']}us cpu  {infer['peak_alloc_bytes']} B peak alloc")
+    encode = bench_encode(args.repeat)
+    for r in encode:
+        print(f"encode : {r['encoder']:<26} {r['cpu_us']}us cpu  {r['peak_alloc_bytes']} B peak alloc")
+    chat = bench_chat(args.requests)
+    for r in chat:
+        print(f"chat   : {r['mode']:<9} {r['cpu_us']}us cpu  {r['peak_alloc_bytes']} B peak alloc  "
+              f"{r['retained_bytes']} B retained")
+
+    path = write_results("hot-path", {"meta": run_metadata(vars(args)), "infer": infer, "encode": encode,
+                                      "chat": chat}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
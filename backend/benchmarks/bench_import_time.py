@@ -0,0 +1,91 @@
+"""
+Cold-start import cost of the app, measured with ``python -X importtime``.
+
+Each repetition imports the module in a fresh interpreter and parses the
+importtime report. The run records the cumulative import time, the slowest
+modules and whether any heavy dependency was loaded eagerly.
+
+    python -m benchmarks.bench_import_time --repeat 5
+    python -m benchmarks.bench_import_time --compare benchmarks/results/import-<rev>.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .common import compare, run_metadata, write_results
+
+
+HEAVY_MODULES = ["langchain", "langchain_openai", "langchain_community", "faiss", "PyPDF2", "pymongo", "cryptography"]
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_once(module: str) -> Dict[str, Any]:
+    backend_dir = Path(__file__).parent.parent
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            cumulative[m.group(4)] = int(m.group(2))
+    loaded = set(cumulative)
+    return {
+        "wall_s": wall,
+        "target_cumulative_us": cumulative.get(module, 0),
+        "slowest": sorted(cumulative.items(), key=lambda kv: -kv[1])[:15],
+        "heavy_loaded": [h for h in HEAVY_MODULES if h in loaded],
+        "modules_loaded": len(loaded),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/import-<rev>.json)")
+    parser.add_argument("--compare", help="previous result JSON to diff against")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so every measured run sees the same .pyc state
+    measure_once(args.module)
+    samples: List[Dict[str, Any]] = [measure_once(args.module) for _ in range(args.repeat)]
+    import_ms = [s["target_cumulative_us"] / 1000 for s in samples]
+    wall_ms = [s["wall_s"] * 1000 for s in samples]
+    run = {
+        "name": f"import:{args.module}",
+        "import_median_ms": round(statistics.median(import_ms), 1),
+        "import_min_ms": round(min(import_ms), 1),
+        "process_wall_median_ms": round(statistics.median(wall_ms), 1),
+        "modules_loaded": samples[-1]["modules_loaded"],
+        "heavy_loaded": samples[-1]["heavy_loaded"],
+        "slowest_us": samples[-1]["slowest"],
+    }
+    print(f"{run['name']}: median {run['import_median_ms']}ms (min {run['import_min_ms']}ms), "
+          f"process wall {run['process_wall_median_ms']}ms, {run['modules_loaded']} modules")
+    print(f"heavy modules loaded at import: {run['heavy_loaded'] or 'none'}")
+    result = {"meta": run_metadata(vars(args)), "runs": [run]}
+    path = write_results("import", result, args.output)
+    print(f"Results written to {path}")
+    if args.compare:
+        keys = ["import_median_ms", "process_wall_median_ms", "modules_loaded"]
+        for line in compare(json.loads(Path(args.compare).read_text()), result, keys):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
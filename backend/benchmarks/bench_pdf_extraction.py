@@ -0,0 +1,107 @@
+"""
+Compare PDF text-extraction backends on the PDFs in storage/uploads.
+
+For every backend that is installed (see PDF_BACKEND in app/pdf_processing.py)
+it parses each file without the cache and reports pages/sec, characters
+extracted, failed and empty pages and files that could not be opened, then
+the same files again through the sha256-keyed extraction cache (cold fill and
+warm hit). The PDFs and the cache live in a temp dir, so every run starts cold.
+
+    python -m benchmarks.bench_pdf_extraction
+    python -m benchmarks.bench_pdf_extraction --backends pypdf2 pymupdf --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .common import UPLOADS_DIR, run_metadata, write_results
+
+
+def main() -> None:
+    from app.pdf_processing import PDF_BACKENDS, _BACKEND_CLASSES, extract_pdf
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR))
+    parser.add_argument("--backends", nargs="+", default=list(PDF_BACKENDS), choices=PDF_BACKENDS)
+    parser.add_argument("--repeat", type=int, default=3, help="uncached passes over the corpus per backend")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/pdf-extraction-<rev>.json)")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-pdf-"))
+    os.environ["PDF_EXTRACT_CACHE_DIR"] = str(workdir / "extracted")
+    pdfs = []
+    for p in sorted(Path(args.uploads).glob("*.pdf")):
+        pdfs.append(workdir / p.name)
+        shutil.copyfile(p, pdfs[-1])
+    print(f"{len(pdfs)} PDFs, {sum(p.stat().st_size for p in pdfs) / 1e6:.1f} MB")
+
+    runs: List[Dict[str, Any]] = []
+    for name in args.backends:
+        try:
+            _BACKEND_CLASSES[name]()
+        except ImportError as e:
+            print(f"{name:>8}: skipped ({e})")
+            continue
+
+        pages = failed = empty = chars = 0
+        file_errors: List[str] = []
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            pages = failed = empty = chars = 0
+            file_errors = []
+            for pdf in pdfs:
+                try:
+                    result = extract_pdf(str(pdf), backend=name, use_cache=False)
+                except Exception as e:
+                    file_errors.append(f"{pdf.name}: {type(e).__name__}: {e}")
+                    continue
+                pages += len(result.pages)
+                failed += len(result.failed_pages)
+                empty += sum(1 for i, text in enumerate(result.pages, start=1)
+                             if not text.strip() and i not in result.failed_pages)
+                chars += sum(len(text) for text in result.pages)
+        uncached_s = (time.perf_counter() - start) / max(1, args.repeat)
+
+        timings = {}
+        for phase in ("cold", "warm"):
+            start = time.perf_counter()
+            for pdf in pdfs:
+                try:
+                    extract_pdf(str(pdf), backend=name, use_cache=True)
+                except Exception:
+                    pass
+            timings[phase] = time.perf_counter() - start
+
+        run = {
+            "backend": name,
+            "files": len(pdfs),
+            "file_errors": file_errors,
+            "pages": pages,
+            "pages_per_sec": round(pages / uncached_s, 1) if uncached_s else None,
+            "failed_pages": failed,
+            "failure_rate": round(failed / max(1, pages), 4),
+            "empty_pages": empty,
+            "chars": chars,
+            "uncached_seconds": round(uncached_s, 4),
+            "cache_fill_seconds": round(timings["cold"], 4),
+            "cache_hit_seconds": round(timings["warm"], 4),
+            "cache_hit_pages_per_sec": round(pages / timings["warm"], 1) if timings["warm"] else None,
+        }
+        runs.append(run)
+        print(f"{name:>8}: {pages} pages at {run['pages_per_sec']} pages/s, {failed} failed "
+              f"({run['failure_rate']:.2%}), {empty} empty, {len(file_errors)} unreadable files, "
+              f"{chars} chars; cached {run['cache_hit_pages_per_sec']} pages/s")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    path = write_results("pdf-extraction", {"meta": run_metadata(vars(args)), "runs": runs}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Rerank cost vs. prompt tokens saved for the retrieval stage of /api/chat.
+
+Indexes the PDFs in storage/uploads, then runs two kinds of queries:
+word windows sampled from indexed chunks (the chunk they came from is the
+"target"), and the small-talk/onboarding turns of a chat session, for which
+any retrieved context is wasted prompt. For each reranker and threshold it
+reports rerank latency, contexts and context tokens sent to the LLM, the
+tokens saved against the plain top-k, the estimated prefill time saved, and
+how often the target chunk still reaches the prompt.
+
+    python -m benchmarks.bench_rerank --thresholds 0.1 0.2 0.3
+    python -m benchmarks.bench_rerank --cross-encoder   # needs sentence-transformers
+    python -m benchmarks.bench_rerank --openai          # real embeddings, needs OPENAI_API_KEY
+
+The offline hashing embeddings are themselves lexical, so they flatter the
+lexical reranker's hit rate; use --openai for representative numbers.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import fakes
+from .bench_backend import CHAT_FLOW, seed_index
+from .common import UPLOADS_DIR, latency_summary, run_metadata, token_counter, write_results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR))
+    parser.add_argument("--queries", type=int, default=200, help="sampled in-corpus queries")
+    parser.add_argument("-k", type=int, default=4, help="contexts sent to the LLM")
+    parser.add_argument("--candidates", type=int, default=12, help="RERANK_CANDIDATES")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.1, 0.2, 0.3])
+    parser.add_argument("--cross-encoder", action="store_true", help="also measure RERANK_MODE=cross-encoder")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40.0,
+                        help="LLM prefill cost used to turn saved tokens into saved latency")
+    parser.add_argument("--openai", action="store_true", help="use OpenAI embeddings instead of the offline ones")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/rerank-<rev>.json)")
+    args = parser.parse_args()
+
+    from app import rerank, vectorstore
+
+    original_get_embeddings = vectorstore.get_embeddings
+    fakes.install()
+    if args.openai:
+        vectorstore.get_embeddings = original_get_embeddings
+    chunks = seed_index(sorted(Path(args.uploads).glob("*.pdf")))
+    print(f"Seeded index with {chunks} chunks")
+
+    rng = random.Random(args.seed)
+    contents = [d.page_content for d in vectorstore._load_index().store.docstore._dict.values()]
+    queries: List[Dict[str, Any]] = []
+    for _ in range(args.queries):
+        target = rng.choice(contents)
+        words = target.split()
+        start = rng.randrange(max(1, len(words) - 12))
+        queries.append({"text": " ".join(words[start:start + 12]), "target": target})
+    queries.extend({"text": turn, "target": None} for turn in CHAT_FLOW)
+
+    tokenizer, count_tokens = token_counter()
+    os.environ["RERANK_CANDIDATES"] = str(args.candidates)
+    candidates = [
+        vectorstore.similarity_search_with_scores(q["text"], k=max(args.k, args.candidates)) for q in queries
+    ]
+
+    modes = ["off", "lexical"] + (["cross-encoder"] if args.cross_encoder else [])
+    runs: List[Dict[str, Any]] = []
+    baseline_tokens = None
+    for mode in modes:
+        os.environ["RERANK_MODE"] = mode
+        for threshold in ([0.0] if mode == "off" else args.thresholds):
+            os.environ["RERANK_THRESHOLD"] = str(threshold)
+            latencies: List[float] = []
+            tokens: List[int] = []
+            contexts = 0
+            hits = targets = 0
+            off_topic_tokens = 0
+            for query, found in zip(queries, candidates):
+                pool = found if mode != "off" else found[: args.k]
+                start = time.perf_counter()
+                kept = rerank.rerank(query["text"], pool, args.k)
+                latencies.append(time.perf_counter() - start)
+                n_tokens = sum(count_tokens(c.text) for c in kept)
+                tokens.append(n_tokens)
+                contexts += len(kept)
+                if query["target"] is None:
+                    off_topic_tokens += n_tokens
+                else:
+                    targets += 1
+                    hits += any(c.text == query["target"] for c in kept)
+            total_tokens = sum(tokens)
+            if baseline_tokens is None:
+                baseline_tokens = total_tokens
+            saved = baseline_tokens - total_tokens
+            summary = latency_summary(latencies, sum(latencies))
+            run = {
+                "mode": mode,
+                "threshold": threshold,
+                "rerank_p50_ms": summary["p50_ms"],
+                "rerank_p99_ms": summary["p99_ms"],
+                "avg_contexts": round(contexts / len(queries), 2),
+                "avg_context_tokens": round(total_tokens / len(queries), 1),
+                "off_topic_context_tokens": off_topic_tokens,
+                "tokens_saved_pct": round(100 * saved / max(1, baseline_tokens), 1),
+                "est_prefill_saved_ms": round(saved / len(queries) / 1000 * args.ms_per_1k_tokens, 2),
+                "target_hit_rate": round(hits / max(1, targets), 4),
+            }
+            runs.append(run)
+            print(f"{mode:>13} t={threshold:<4}: rerank p50 {run['rerank_p50_ms']}ms p99 {run['rerank_p99_ms']}ms, "
+                  f"{run['avg_contexts']} ctx / {run['avg_context_tokens']} tok per turn "
+                  f"({run['tokens_saved_pct']}% saved, ~{run['est_prefill_saved_ms']}ms prefill), "
+                  f"target hit {run['target_hit_rate']:.3f}")
+
+    meta = run_metadata(vars(args))
+    meta["tokenizer"] = tokenizer
+    path = write_results("rerank", {"meta": meta, "runs": runs}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Memory / recall / latency of the vector compression modes in app/vectorstore.py.
+
+Indexes the PDFs in storage/uploads once per configuration and compares each
+one against an uncompressed full-dimension float32 index. Recall@k is the
+overlap of each configuration's top-k chunks with the baseline's top-k for
+the same queries. Queries are word windows sampled from the indexed chunks.
+
+    python -m benchmarks.bench_vector_compression --dim 1536 --reduced-dims 512 256
+    python -m benchmarks.bench_vector_compression --openai   # real embeddings, needs OPENAI_API_KEY
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .common import UPLOADS_DIR, latency_summary, run_metadata, write_results
+
+
+def _dir_size(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def _configs(reduced_dims: List[int]) -> List[Dict[str, Any]]:
+    configs = [
+        {"name": "float32", "compression": "none", "rerank": False, "dims": None},
+        {"name": "fp16", "compression": "fp16", "rerank": False, "dims": None},
+        {"name": "fp16+rerank", "compression": "fp16", "rerank": True, "dims": None},
+        {"name": "int8", "compression": "int8", "rerank": False, "dims": None},
+        {"name": "int8+rerank", "compression": "int8", "rerank": True, "dims": None},
+    ]
+    for d in reduced_dims:
+        configs.append({"name": f"float32@{d}d", "compression": "none", "rerank": False, "dims": d})
+        configs.append({"name": f"int8+rerank@{d}d", "compression": "int8", "rerank": True, "dims": d})
+    return configs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=str(UPLOADS_DIR))
+    parser.add_argument("--dim", type=int, default=1536, help="full embedding size for the offline embeddings")
+    parser.add_argument("--reduced-dims", type=int, nargs="*", default=[512])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--candidates", type=int, default=20, help="VECTOR_RERANK_CANDIDATES")
+    parser.add_argument("--openai", action="store_true", help="use OpenAI embeddings instead of the offline ones")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/compression-<rev>.json)")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    from app import vectorstore
+    from app.pdf_processing import extract_text_from_pdf
+    from .fakes import HashingEmbeddings
+
+    pdfs = sorted(Path(args.uploads).glob("*.pdf"))
+    texts, metas = [], []
+    for p in pdfs:
+        text = extract_text_from_pdf(str(p))
+        if text.strip():
+            texts.append(text)
+            metas.append({"source": p.name})
+
+    workdir = tempfile.mkdtemp(prefix="bench-compression-")
+    os.environ["VECTOR_RERANK_CANDIDATES"] = str(args.candidates)
+    original_get_embeddings = vectorstore.get_embeddings
+    rng = random.Random(args.seed)
+    queries: List[str] = []
+    baseline: List[List[str]] = []
+    runs: List[Dict[str, Any]] = []
+
+    for cfg in _configs(args.reduced_dims):
+        os.environ["VECTOR_DB_DIR"] = os.path.join(workdir, cfg["name"])
+        os.environ["VECTOR_COMPRESSION"] = cfg["compression"]
+        os.environ["VECTOR_RERANK_FP32"] = "true" if cfg["rerank"] else "false"
+        if args.openai:
+            if cfg["dims"]:
+                os.environ["EMBEDDING_DIMENSIONS"] = str(cfg["dims"])
+            else:
+                os.environ.pop("EMBEDDING_DIMENSIONS", None)
+            vectorstore.get_embeddings = original_get_embeddings
+        else:
+            embeddings = HashingEmbeddings(dim=cfg["dims"] or args.dim)
+            vectorstore.get_embeddings = lambda embeddings=embeddings: embeddings
+
+        chunks = vectorstore.index_texts(texts, metas)
+        loaded = vectorstore._load_index()
+        if not queries:
+            contents = [d.page_content for d in loaded.store.docstore._dict.values()]
+            for _ in range(args.queries):
+                words = rng.choice(contents).split()
+                start = rng.randrange(max(1, len(words) - 12))
+                queries.append(" ".join(words[start:start + 12]))
+        query_vecs = np.asarray(vectorstore.get_embeddings().embed_documents(queries), dtype=np.float32)
+
+        latencies: List[float] = []
+        results: List[List[str]] = []
+        for qv in query_vecs:
+            start = time.perf_counter()
+            hits = vectorstore._search(loaded, qv[None, :], args.k)
+            latencies.append(time.perf_counter() - start)
+            results.append([doc.page_content for doc, _ in hits])
+        if not baseline:
+            baseline = results
+        recall = sum(len(set(r) & set(b)) / max(1, len(b)) for r, b in zip(results, baseline)) / len(results)
+
+        stats = vectorstore.index_stats()
+        summary = latency_summary(latencies, sum(latencies))
+        run = {
+            "name": cfg["name"],
+            "chunks": chunks,
+            "dimensions": stats["dimensions"],
+            "index_bytes": stats["index_bytes"],
+            "bytes_per_vector": round(stats["index_bytes"] / max(1, stats["vectors"]), 1),
+            "exact_sidecar_bytes": stats["exact_sidecar_bytes"],
+            "sidecar_bytes_per_vector": round(stats["exact_sidecar_bytes"] / max(1, stats["vectors"]), 1),
+            "disk_bytes": _dir_size(os.environ["VECTOR_DB_DIR"]),
+            f"recall@{args.k}": round(recall, 4),
+            "search_p50_ms": summary["p50_ms"],
+            "search_p95_ms": summary["p95_ms"],
+            "search_p99_ms": summary["p99_ms"],
+        }
+        runs.append(run)
+        # The sidecar is memory-mapped (shared page cache), but it is still memory the host has to hold
+        print(f"{run['name']:>18}: {run['bytes_per_vector']:>7} B/vec index + {run['sidecar_bytes_per_vector']:>6} B/vec "
+              f"float32 sidecar, recall@{args.k} {run[f'recall@{args.k}']:.3f}, "
+              f"p50 {run['search_p50_ms']}ms p99 {run['search_p99_ms']}ms")
+
+    vectorstore.get_embeddings = original_get_embeddings
+    path = write_results("compression", {"meta": run_metadata(vars(args)), "runs": runs}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Shared helpers for the benchmark scripts: percentiles, RSS and result files.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+UPLOADS_DIR = Path(__file__).parent.parent / "storage" / "uploads"
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def latency_summary(latencies_s: Sequence[float], wall_s: float, errors: int = 0) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies_s),
+        "errors": errors,
+        "throughput_rps": round(len(latencies_s) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": round(percentile(latencies_s, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies_s, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies_s, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies_s) * 1000, 3) if latencies_s else 0.0,
+    }
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """(name, counter) using tiktoken's cl100k_base, or a chars/4 estimate without it."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "cl100k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        # tiktoken downloads its encoding on first use, so offline runs land here
+        return "chars/4", lambda text: max(1, len(text) // 4)
+
+
+def rss_mb() -> Dict[str, float]:
+    """Current and peak resident set size of this process, in MiB."""
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb /= 1024  # macOS reports bytes
+    current = 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    return {"rss_mb": round(current, 1), "peak_rss_mb": round(peak_kb / 1024, 1)}
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def run_metadata(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+    }
+
+
+def write_results(name: str, payload: Dict[str, Any], output: str | None = None) -> Path:
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{name}-{payload.get('meta', {}).get('git_revision', 'unknown')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    return path
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], keys: List[str] | None = None) -> List[str]:
+    """Human-readable deltas between two result files with the same scenario names."""
+    keys = keys or ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+    lines: List[str] = []
+    base_runs = {r["name"]: r for r in baseline.get("runs", [])}
+    for run in current.get("runs", []):
+        base = base_runs.get(run["name"])
+        if not base:
+            continue
+        parts = []
+        for key in keys:
+            old, new = base.get(key), run.get(key)
+            if old is None or new is None:
+                continue
+            delta = ((new - old) / old * 100) if old else 0.0
+            parts.append(f"{key} {old} -> {new} ({delta:+.1f}%)")
+        lines.append(f"{run['name']}: " + ", ".join(parts))
+    return lines
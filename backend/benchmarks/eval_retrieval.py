@@ -0,0 +1,218 @@
+"""
+Offline retrieval quality/latency evaluation over the stored corpus.
+
+Reads the chunks of an existing index (default storage/vector_db/faiss_index),
+re-embeds them with deterministic local embeddings (or OpenAI's), builds one
+temporary index per index type and runs the labelled questions through
+vectorstore.similarity_search_with_scores under each configuration:
+
+    flat            float32 IndexFlatL2 (what the app builds by default)
+    fp16, int8      scalar-quantized indexes, no re-rank
+    int8+fp32       int8 with the float32 sidecar re-rank
+    hybrid          flat, then reciprocal-rank fusion of the vector order with a
+                    lexical (BM25-style) order over the same candidates
+    rerank-lexical  flat, then app.rerank's lexical reranker
+    rerank-cross-encoder  flat, then the local cross-encoder (needs sentence-transformers)
+    as-is           the stored index itself, unchanged (needs the embeddings it was built with)
+
+For every configuration and k it reports recall@k (share of questions with a
+relevant chunk in the top k), MRR and p50/p99 latency of the whole retrieval
+step (query embedding, vector search and any rerank/fusion), and writes JSON:
+
+    python -m benchmarks.eval_retrieval
+    python -m benchmarks.eval_retrieval -k 1 4 10 --configs flat int8+fp32 hybrid rerank-lexical --json
+    python -m benchmarks.eval_retrieval --embeddings openai --configs as-is flat
+
+Questions are JSON lines with "question", "source" (or "sources") and
+optionally "pages"; see benchmarks/questions.jsonl.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .common import percentile, run_metadata, write_results
+
+
+CONFIGS = ("flat", "fp16", "int8", "int8+fp32", "hybrid", "rerank-lexical", "rerank-cross-encoder", "as-is")
+DEFAULT_CONFIGS = ["flat", "int8", "int8+fp32", "hybrid", "rerank-lexical"]
+INDEX_TYPES = {"flat": ("none", False), "fp16": ("fp16", False), "int8": ("int8", False), "int8+fp32": ("int8", True)}
+RRF_K = 60
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    questions = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                q = json.loads(line)
+                q["sources"] = q.get("sources") or [q["source"]]
+                questions.append(q)
+    return questions
+
+
+def stored_chunks(index_dir: str, tenant: str | None) -> Tuple[List[str], List[dict], str]:
+    """Live (text, metadata) chunks of the stored index, in vector id order."""
+    from app import index_snapshots
+    from app.tenants import tenant_dir
+    from .fakes import HashingEmbeddings
+
+    base = os.path.join(tenant_dir(index_dir, tenant), "faiss_index")
+    manifest = index_snapshots.read_manifest(base)
+    if manifest is None:
+        raise SystemExit(f"No index found at {base}")
+    # Only the documents are needed, so the embeddings object is never called
+    store, _exact = index_snapshots.load_snapshot(base, manifest, HashingEmbeddings(), mmap=True)
+    deleted = set(manifest.tombstones)
+    texts, metas = [], []
+    for vector_id in sorted(store.index_to_docstore_id):
+        if vector_id in deleted:
+            continue
+        doc = store.docstore.search(store.index_to_docstore_id[vector_id])
+        texts.append(doc.page_content)
+        metas.append(dict(doc.metadata or {}))
+    return texts, metas, base
+
+
+def is_relevant(meta: dict, question: Dict[str, Any], match: str) -> bool:
+    if meta.get("source") not in question["sources"]:
+        return False
+    return match == "source" or not question.get("pages") or meta.get("page") in question["pages"]
+
+
+def hybrid_order(query: str, candidates: Sequence[Tuple[str, dict, float]]) -> List[Tuple[str, dict, float]]:
+    """Reciprocal-rank fusion of the vector order with the lexical scorer's order."""
+    from app.rerank import LexicalReranker
+
+    scores = LexicalReranker().score(query, [text for text, _m, _d in candidates])
+    lexical_rank = {i: r for r, i in enumerate(sorted(range(len(candidates)), key=lambda i: -scores[i]))}
+    fused = sorted(range(len(candidates)), key=lambda i: -(1 / (RRF_K + i) + 1 / (RRF_K + lexical_rank[i])))
+    return [candidates[i] for i in fused]
+
+
+def retrieve(config: str, query: str, k: int, candidates: int) -> List[dict]:
+    from app import rerank, vectorstore
+
+    if config in ("hybrid", "rerank-lexical", "rerank-cross-encoder"):
+        found = vectorstore.similarity_search_with_scores(query, k=max(k, candidates))
+        if config == "hybrid":
+            return [meta for _t, meta, _d in hybrid_order(query, found)[:k]]
+        return [chunk.metadata for chunk in rerank.rerank(query, found, k)]
+    return [meta for _t, meta, _d in vectorstore.similarity_search_with_scores(query, k=k)]
+
+
+def evaluate(config: str, questions: List[Dict[str, Any]], ks: List[int], candidates: int,
+             match: str, repeat: int) -> List[Dict[str, Any]]:
+    k_max = max(ks)
+    latencies: List[float] = []
+    first_hit: List[int | None] = []
+    for q in questions:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            metas = retrieve(config, q["question"], k_max, candidates)
+            latencies.append(time.perf_counter() - start)
+        rank = next((i for i, meta in enumerate(metas, start=1) if is_relevant(meta, q, match)), None)
+        first_hit.append(rank)
+
+    n = max(1, len(questions))
+    mrr = sum(1 / r for r in first_hit if r) / n
+    return [
+        {
+            "config": config,
+            "k": k,
+            "recall": round(sum(1 for r in first_hit if r and r <= k) / n, 4),
+            "mrr": round(mrr, 4),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        }
+        for k in ks
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default=str(Path(__file__).parent / "questions.jsonl"))
+    parser.add_argument("--index-dir", default=os.environ.get("VECTOR_DB_DIR", "./storage/vector_db"),
+                        help="VECTOR_DB_DIR holding the index to evaluate")
+    parser.add_argument("--tenant")
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, choices=CONFIGS)
+    parser.add_argument("-k", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--candidates", type=int, default=20, help="vector candidates for hybrid/rerank")
+    parser.add_argument("--embeddings", choices=("fake", "openai"), default="fake",
+                        help="fake: deterministic local hashing embeddings (no network)")
+    parser.add_argument("--dim", type=int, default=384, help="dimensions of the fake embeddings")
+    parser.add_argument("--match", choices=("auto", "source", "page"), default="auto",
+                        help="relevance by source file, or by source and page (auto: page when chunks have one)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per question")
+    parser.add_argument("--json", action="store_true", help="print the result JSON to stdout")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/retrieval-<rev>.json)")
+    args = parser.parse_args()
+
+    from app import vectorstore
+    from app.chunking import ChunkingSpec
+    from .fakes import HashingEmbeddings
+
+    questions = load_questions(args.questions)
+    texts, metas, source_index = stored_chunks(args.index_dir, args.tenant)
+    match = args.match
+    if match == "auto":
+        match = "page" if metas and all("page" in m for m in metas) else "source"
+    log = sys.stderr if args.json else sys.stdout
+    print(f"{len(texts)} chunks from {source_index}, {len(questions)} questions, relevance by {match}", file=log)
+
+    if args.embeddings == "fake":
+        embeddings = HashingEmbeddings(dim=args.dim)
+        vectorstore.get_embeddings = lambda: embeddings
+    # Stored chunks are re-indexed one-to-one: "page" chunking with no size limit never splits them
+    as_is = ChunkingSpec("page", size=10**9, overlap=0)
+    workdir = tempfile.mkdtemp(prefix="eval-retrieval-")
+    os.environ["RERANK_THRESHOLD"] = "0"
+    os.environ["RERANK_CANDIDATES"] = str(args.candidates)
+
+    runs: List[Dict[str, Any]] = []
+    built: Dict[str, str] = {}
+    for config in args.configs:
+        if config == "as-is":
+            os.environ["VECTOR_DB_DIR"] = args.index_dir
+            os.environ["VECTOR_RERANK_FP32"] = "true"
+            try:
+                results = evaluate(config, questions, args.k, args.candidates, match, args.repeat)
+            except ValueError as e:
+                print(f"{config:>20}: skipped ({e})", file=log)
+                continue
+        else:
+            index_type = INDEX_TYPES.get(config, ("none", False))
+            name = config if config in INDEX_TYPES else "flat"
+            compression, fp32 = index_type
+            if name not in built:
+                built[name] = os.path.join(workdir, name)
+                os.environ["VECTOR_DB_DIR"] = built[name]
+                os.environ["VECTOR_COMPRESSION"] = compression
+                vectorstore.index_texts(texts, metas, chunking=as_is)
+            os.environ["VECTOR_DB_DIR"] = built[name]
+            os.environ["VECTOR_RERANK_FP32"] = "true" if fp32 else "false"
+            os.environ["RERANK_MODE"] = {"rerank-lexical": "lexical", "rerank-cross-encoder": "cross-encoder"}.get(config, "off")
+            results = evaluate(config, questions, args.k, args.candidates, match, args.repeat)
+        runs.extend(results)
+        for r in results:
+            print(f"{r['config']:>20} k={r['k']:<3} recall {r['recall']:.3f}  mrr {r['mrr']:.3f}  "
+                  f"p50 {r['p50_ms']}ms  p99 {r['p99_ms']}ms", file=log)
+
+    meta = run_metadata(vars(args))
+    meta.update({"source_index": source_index, "chunks": len(texts), "questions": len(questions), "match": match})
+    payload = {"meta": meta, "runs": runs}
+    path = write_results("retrieval", payload, args.output)
+    print(f"Results written to {path}", file=log)
+    if args.json:
+        json.dump(payload, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Local stand-ins for OpenAI and MongoDB so benchmarks run without network access.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+_TOKEN_RE = re.compile(r"\w+")
+_NAME_RE = re.compile(r"^[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3}$")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings via feature hashing.
+
+    Texts sharing words land close together, which is enough to exercise
+    retrieval realistically without calling the embeddings API.
+    """
+
+    def __init__(self, dim: int = 256, latency_ms: float = 0.0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:8], "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with configurable latency that follows the onboarding script.
+
+    It confirms names with "Thanks <Name>!" the way the real prompt asks the
+    model to, so name extraction in ``/api/chat`` behaves as in production.
+    """
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _sleep(self) -> None:
+        if self._rng is None:
+            object.__setattr__(self, "_rng", random.Random(self.seed))
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._sleep()
+        text = str(messages[-1].content).strip() if messages else ""
+        if "onboard" in text.lower():
+            reply = "Great! Let's get started. What's your full name?"
+        elif _NAME_RE.match(text):
+            reply = f"Thanks {text}! Are you registering as a company or freelancer?"
+        else:
+            reply = "Noted, thank you. Could you share the next detail?"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+
+class _InsertOneResult:
+    def __init__(self, inserted_id: ObjectId):
+        self.inserted_id = inserted_id
+
+
+class _InsertManyResult:
+    def __init__(self, inserted_ids: List[ObjectId]):
+        self.inserted_ids = inserted_ids
+
+
+class _DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+
+class _UpdateResult:
+    def __init__(self, matched_count: int, upserted_id: Optional[ObjectId] = None):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+        self.upserted_id = upserted_id
+
+
+_MISSING = object()
+
+
+def _matches(doc: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Equality and the comparison operators the app uses ($gt/$gte/$lt/$lte/$in/$ne/$exists)."""
+    for key, cond in filter.items():
+        value = doc.get(key, _MISSING)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                if op == "$exists":
+                    ok = (value is not _MISSING) == bool(arg)
+                elif op == "$in":
+                    ok = value in arg
+                elif op == "$ne":
+                    ok = value != arg
+                elif value is _MISSING or value is None:
+                    ok = False
+                else:
+                    ok = {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg}[op]
+                if not ok:
+                    return False
+        elif value is _MISSING or value != cond:
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return dict(doc)
+    if any(v for k, v in projection.items() if k != "_id"):
+        out = {k: doc[k] for k, v in projection.items() if v and k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+class _BulkWriteResult:
+    def __init__(self, matched_count: int, upserted_count: int = 0):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+        self.upserted_count = upserted_count
+
+
+class FakeCursor:
+    """Result of ``find``: a snapshot of the matching documents with sort/limit."""
+
+    def __init__(self, docs: List[Dict[str, Any]], latency_ms: float = 0.0):
+        self._docs = docs
+        self._limit = 0
+        self.latency_ms = latency_ms
+
+    def sort(self, key: str, direction: int = 1) -> "FakeCursor":
+        self._docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, n: int) -> "FakeCursor":
+        self._limit = n
+        return self
+
+    def __iter__(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return iter(self._docs[: self._limit] if self._limit else self._docs)
+
+
+class FakeCollection:
+    def __init__(self, latency_ms: float = 0.0):
+        self.docs: Dict[ObjectId, Dict[str, Any]] = {}
+        self.latency_ms = latency_ms
+        self.indexes: Dict[str, Dict[str, Any]] = {}
+        # unique index name -> key -> _id, so uniqueness checks do not scan every document
+        self._unique: Dict[str, Dict[tuple, ObjectId]] = {}
+        self._lock = threading.Lock()
+
+    def _sleep(self) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def create_index(self, keys: Any, name: Optional[str] = None, unique: bool = False,
+                     partialFilterExpression: Optional[Dict[str, Any]] = None, **kwargs: Any) -> str:
+        fields = [keys] if isinstance(keys, str) else [k for k, _direction in keys]
+        name = name or "_".join(f"{f}_1" for f in fields)
+        with self._lock:
+            self.indexes[name] = {"fields": fields, "unique": unique, "partial": partialFilterExpression or {}}
+            self._reindex_locked()
+        return name
+
+    def _reindex_locked(self) -> None:
+        self._unique = {name: {} for name, index in self.indexes.items() if index["unique"]}
+        for doc in self.docs.values():
+            self._add_keys_locked(doc)
+
+    def _unique_keys(self, doc: Dict[str, Any]):
+        for name, index in self.indexes.items():
+            if index["unique"] and _matches(doc, index["partial"]):
+                yield name, tuple(doc.get(f) for f in index["fields"])
+
+    def _check_unique_locked(self, doc: Dict[str, Any]) -> None:
+        from pymongo.errors import DuplicateKeyError
+
+        for name, key in self._unique_keys(doc):
+            if self._unique[name].get(key, doc["_id"]) != doc["_id"]:
+                raise DuplicateKeyError(f"E11000 duplicate key error index: {name}")
+
+    def _add_keys_locked(self, doc: Dict[str, Any]) -> None:
+        for name, key in self._unique_keys(doc):
+            self._unique[name][key] = doc["_id"]
+
+    def _remove_keys_locked(self, doc: Dict[str, Any]) -> None:
+        for name, key in self._unique_keys(doc):
+            self._unique[name].pop(key, None)
+
+    def _insert_locked(self, doc: Dict[str, Any]) -> None:
+        self._check_unique_locked(doc)
+        self.docs[doc["_id"]] = dict(doc)
+        self._add_keys_locked(doc)
+
+    def insert_one(self, doc: Dict[str, Any]) -> _InsertOneResult:
+        self._sleep()
+        # pymongo sets _id on the caller's dict; mirror that
+        doc.setdefault("_id", ObjectId())
+        with self._lock:
+            self._insert_locked(doc)
+        return _InsertOneResult(doc["_id"])
+
+    def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True) -> _InsertManyResult:
+        """One round trip; duplicate keys are collected into a BulkWriteError like the server's."""
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+        self._sleep()
+        inserted: List[ObjectId] = []
+        errors: List[Dict[str, Any]] = []
+        with self._lock:
+            for i, doc in enumerate(documents):
+                doc.setdefault("_id", ObjectId())
+                try:
+                    self._insert_locked(doc)
+                except DuplicateKeyError as e:
+                    errors.append({"index": i, "code": 11000, "errmsg": str(e), "op": doc})
+                    if ordered:
+                        break
+                    continue
+                inserted.append(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted),
+                                  "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []})
+        return _InsertManyResult(inserted)
+
+    def find_one(self, filter: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        self._sleep()
+        with self._lock:
+            for doc in self.docs.values():
+                if _matches(doc, filter):
+                    return _project(doc, projection)
+        return None
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> FakeCursor:
+        with self._lock:
+            docs = [_project(d, projection) for d in self.docs.values() if _matches(d, filter or {})]
+        return FakeCursor(docs, self.latency_ms)
+
+    def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> _UpdateResult:
+        self._sleep()
+        with self._lock:
+            return self._update_locked(filter, update, upsert)
+
+    def _update_locked(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool) -> _UpdateResult:
+        if isinstance(filter.get("_id"), ObjectId):
+            candidates = [self.docs[filter["_id"]]] if filter["_id"] in self.docs else []
+        else:
+            candidates = self.docs.values()
+        for doc in candidates:
+            if _matches(doc, filter):
+                changed = {**doc, **update.get("$set", {})}
+                self._check_unique_locked(changed)
+                self._remove_keys_locked(doc)
+                doc.update(update.get("$set", {}))
+                self._add_keys_locked(doc)
+                return _UpdateResult(1)
+        if not upsert:
+            return _UpdateResult(0)
+        doc = {k: v for k, v in filter.items() if not isinstance(v, dict)}
+        doc.update(update.get("$setOnInsert", {}))
+        doc.update(update.get("$set", {}))
+        doc.setdefault("_id", ObjectId())
+        self._check_unique_locked(doc)
+        self.docs[doc["_id"]] = doc
+        self._add_keys_locked(doc)
+        return _UpdateResult(0, doc["_id"])
+
+    def bulk_write(self, requests: List[Any], ordered: bool = True) -> _BulkWriteResult:
+        """UpdateOne requests only, applied one by one; duplicate keys are collected into a BulkWriteError."""
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+        self._sleep()
+        matched = upserted = 0
+        errors: List[Dict[str, Any]] = []
+        with self._lock:
+            for i, op in enumerate(requests):
+                try:
+                    res = self._update_locked(op._filter, op._doc, op._upsert)
+                except DuplicateKeyError as e:
+                    errors.append({"index": i, "code": 11000, "errmsg": str(e)})
+                    if ordered:
+                        break
+                    continue
+                matched += res.matched_count
+                upserted += res.upserted_id is not None
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": 0,
+                                  "nUpserted": upserted, "nMatched": matched, "nModified": matched, "nRemoved": 0,
+                                  "upserted": []})
+        return _BulkWriteResult(matched, upserted)
+
+    def delete_many(self, filter: Dict[str, Any]) -> _DeleteResult:
+        self._sleep()
+        with self._lock:
+            doomed = [key for key, doc in self.docs.items() if _matches(doc, filter)]
+            for key in doomed:
+                self._remove_keys_locked(self.docs.pop(key))
+        return _DeleteResult(len(doomed))
+
+    def count_documents(self, filter: Dict[str, Any]) -> int:
+        with self._lock:
+            return sum(1 for d in self.docs.values() if _matches(d, filter))
+
+
+class FakeDatabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self._collections: Dict[str, FakeCollection] = {}
+        self.latency_ms = latency_ms
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self.latency_ms)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+class _FakeAdmin:
+    def command(self, name: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return {"ok": 1.0}
+
+
+class FakeMongoClient:
+    """In-process replacement for ``pymongo.MongoClient`` covering what the app uses."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.admin = _FakeAdmin()
+        self.latency_ms = latency_ms
+        self._dbs: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._dbs:
+            self._dbs[name] = FakeDatabase(self.latency_ms)
+        return self._dbs[name]
+
+
+def install(llm_latency_ms: float = 50.0, llm_jitter_ms: float = 0.0, embed_latency_ms: float = 0.0,
+            mongo_latency_ms: float = 0.0, workdir: str | None = None) -> Dict[str, Any]:
+    """Point the app at the local fakes and a scratch storage directory.
+
+    Must run before the first request is served. Returns the fake objects so
+    callers can inspect them (e.g. count inserted leads).
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="bench-")
+    os.environ["VECTOR_DB_DIR"] = os.path.join(workdir, "vector_db")
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    # Cached extractions of the scratch uploads stay out of the real storage/extracted
+    os.environ["PDF_EXTRACT_CACHE_DIR"] = os.path.join(workdir, "extracted")
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("MONGODB_URI", "mongodb://offline-benchmark")
+
+    from app import db, llm, vectorstore
+
+    embeddings = HashingEmbeddings(latency_ms=embed_latency_ms)
+    chat_model = FakeChatModel(latency_ms=llm_latency_ms, jitter_ms=llm_jitter_ms)
+    mongo = FakeMongoClient(latency_ms=mongo_latency_ms)
+
+    vectorstore.get_embeddings = lambda: embeddings
+    llm.get_llm = lambda model=None: chat_model
+    db.get_mongo_client = lambda: mongo
+    return {"embeddings": embeddings, "chat_model": chat_model, "mongo": mongo, "workdir": workdir}
@@ -0,0 +1,238 @@
+"""
+Synthetic onboarding sessions replayed against the app at a target arrival rate.
+
+Sessions follow the multi-turn onboarding flow the chat endpoint expects
+(name, business type, website, PAN, Aadhaar, auto-submit) mixed with RAG
+questions. Values are generated to match the patterns in app/chat_logic.py.
+Sessions arrive as a Poisson process and each turn waits a think time.
+
+    python -m benchmarks.load_scenarios --sessions 200 --rate 5 --think-scale 0.01
+    python -m benchmarks.load_scenarios --base-url http://localhost:8000 --sessions 50 --rate 1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .common import latency_summary, percentile, rss_mb, run_metadata, write_results
+
+
+FIRST_NAMES = ["Asha", "Rahul", "Priya", "Vikram", "Neha", "Arjun", "Kavya", "Rohan", "Meera", "Sanjay"]
+LAST_NAMES = ["Rao", "Sharma", "Iyer", "Das", "Menon", "Gupta", "Nair", "Kapoor", "Reddy", "Joshi"]
+RAG_QUESTIONS = [
+    "How do cross-border payments settle?",
+    "What fees apply to FX conversion?",
+    "What is exploratory data analysis used for?",
+    "Explain polymorphism in object oriented programming",
+    "How long does an international transfer take?",
+    "What documents do I need for onboarding?",
+]
+
+
+@dataclass
+class Turn:
+    message: str
+    think_time_s: float
+
+
+@dataclass
+class Session:
+    session_id: str
+    onboarding: bool
+    turns: List[Turn] = field(default_factory=list)
+
+
+def _pan(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=5)) + "".join(rng.choices(string.digits, k=4)) + rng.choice(string.ascii_uppercase)
+
+
+def _aadhaar(rng: random.Random) -> str:
+    return str(rng.randint(2, 9)) + "".join(rng.choices(string.digits, k=11))
+
+
+def generate_sessions(count: int, seed: int = 0, onboarding_ratio: float = 0.7,
+                      rag_per_session: float = 1.0, mean_think_s: float = 8.0) -> List[Session]:
+    """Build ``count`` sessions; the same seed always yields the same traffic."""
+    from app.chat_logic import RE_AADHAAR, RE_PAN
+
+    rng = random.Random(seed)
+    sessions: List[Session] = []
+
+    def think() -> float:
+        return rng.expovariate(1.0 / mean_think_s) if mean_think_s > 0 else 0.0
+
+    def questions() -> List[Turn]:
+        n = int(rng.expovariate(1.0 / rag_per_session)) if rag_per_session > 0 else 0
+        return [Turn(rng.choice(RAG_QUESTIONS), think()) for _ in range(n)]
+
+    for i in range(count):
+        s = Session(session_id=f"load-{seed}-{i}", onboarding=rng.random() < onboarding_ratio)
+        if not s.onboarding:
+            s.turns = questions() or [Turn(rng.choice(RAG_QUESTIONS), think())]
+            sessions.append(s)
+            continue
+
+        pan, aadhaar = _pan(rng), _aadhaar(rng)
+        assert RE_PAN.fullmatch(pan) and RE_AADHAAR.fullmatch(aadhaar)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        steps = [
+            rng.choice(["Hi, I want to onboard", "onboarding please", "I'd like to onboard my business"]),
+            name,
+            rng.choice(["I am a freelancer", "company", "We are a private limited company", "FREELANCER"]),
+        ]
+        if rng.random() < 0.6:
+            steps.append(f"my website is {name.split()[1].lower()}{rng.randint(1, 999)}.in")
+        else:
+            steps.append("no website yet")
+        steps.append(rng.choice([f"PAN is {pan}", f"my pan: {pan.lower()}", pan]))
+        steps.append(rng.choice([f"Aadhaar {aadhaar}", aadhaar]))
+
+        turns = [Turn(m, think()) for m in steps]
+        # Interleave RAG questions at random points after the greeting
+        for q in questions():
+            turns.insert(rng.randint(1, len(turns)), q)
+        s.turns = turns
+        sessions.append(s)
+    return sessions
+
+
+@dataclass
+class SessionResult:
+    session_id: str
+    onboarding: bool
+    duration_s: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    auto_submitted: bool = False
+    time_to_submit_s: Optional[float] = None
+    latencies_s: List[float] = field(default_factory=list)
+
+
+async def replay_session(client, session: Session, think_scale: float) -> SessionResult:
+    result = SessionResult(session.session_id, session.onboarding)
+    history: List[Dict[str, str]] = []
+    start = time.perf_counter()
+    for turn in session.turns:
+        if turn.think_time_s and think_scale:
+            await asyncio.sleep(turn.think_time_s * think_scale)
+        history.append({"role": "user", "content": turn.message})
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post("/api/chat", json={"session_id": session.session_id, "messages": history})
+            ok = resp.status_code == 200
+            body = resp.json() if ok else {}
+        except Exception:
+            ok, body = False, {}
+        result.latencies_s.append(time.perf_counter() - t0)
+        result.requests += 1
+        if not ok:
+            result.errors += 1
+            continue
+        history.append({"role": "assistant", "content": body.get("reply", "")})
+        if body.get("auto_submitted") and not result.auto_submitted:
+            result.auto_submitted = True
+            result.time_to_submit_s = time.perf_counter() - start
+    result.duration_s = time.perf_counter() - start
+    return result
+
+
+async def replay(client, sessions: List[Session], rate: float, think_scale: float, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed + 1)
+    tasks = []
+    start = time.perf_counter()
+    for s in sessions:
+        tasks.append(asyncio.create_task(replay_session(client, s, think_scale)))
+        if rate > 0:
+            await asyncio.sleep(rng.expovariate(rate))
+    results: List[SessionResult] = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    latencies = [x for r in results for x in r.latencies_s]
+    onboarding = [r for r in results if r.onboarding]
+    submitted = [r for r in onboarding if r.auto_submitted]
+    durations = [r.duration_s for r in results]
+    to_submit = [r.time_to_submit_s for r in submitted if r.time_to_submit_s is not None]
+    return {
+        "sessions": len(results),
+        "wall_s": round(wall, 3),
+        "achieved_session_rate": round(len(results) / wall, 3) if wall else 0.0,
+        "onboarding_sessions": len(onboarding),
+        "auto_submits": len(submitted),
+        "auto_submit_rate": round(len(submitted) / len(onboarding), 3) if onboarding else 0.0,
+        "auto_submit_throughput_per_s": round(len(submitted) / wall, 3) if wall else 0.0,
+        "session_p50_s": round(percentile(durations, 0.50), 3),
+        "session_p95_s": round(percentile(durations, 0.95), 3),
+        "session_p99_s": round(percentile(durations, 0.99), 3),
+        "time_to_submit_p50_s": round(percentile(to_submit, 0.50), 3),
+        "time_to_submit_p95_s": round(percentile(to_submit, 0.95), 3),
+        "request": latency_summary(latencies, wall, sum(r.errors for r in results)),
+    }
+
+
+async def run(args: argparse.Namespace, sessions: List[Session]) -> Dict[str, Any]:
+    import httpx
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        from . import fakes
+        from .bench_backend import seed_index
+        from .common import UPLOADS_DIR
+
+        fakes.install(llm_latency_ms=args.llm_latency_ms, llm_jitter_ms=args.llm_jitter_ms,
+                      mongo_latency_ms=args.mongo_latency_ms)
+        from app.main import app
+
+        seed_index(sorted(UPLOADS_DIR.glob("*.pdf")))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=None)
+    async with client:
+        summary = await replay(client, sessions, args.rate, args.think_scale, args.seed)
+    summary.update(rss_mb())
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=2.0, help="target session arrivals per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--onboarding-ratio", type=float, default=0.7)
+    parser.add_argument("--rag-per-session", type=float, default=1.0, help="mean RAG questions per session")
+    parser.add_argument("--mean-think-s", type=float, default=8.0)
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiply think times (0 disables)")
+    parser.add_argument("--base-url", help="replay against a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--mongo-latency-ms", type=float, default=5.0)
+    parser.add_argument("--dump", help="write the generated sessions to this JSON file and exit")
+    parser.add_argument("--scenarios-file", help="replay sessions from a file written by --dump")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/load-<rev>.json)")
+    args = parser.parse_args()
+
+    if args.scenarios_file:
+        raw = json.loads(Path(args.scenarios_file).read_text())
+        sessions = [Session(s["session_id"], s["onboarding"], [Turn(**t) for t in s["turns"]]) for s in raw]
+    else:
+        sessions = generate_sessions(args.sessions, args.seed, args.onboarding_ratio,
+                                     args.rag_per_session, args.mean_think_s)
+    if args.dump:
+        Path(args.dump).write_text(json.dumps([asdict(s) for s in sessions], indent=2))
+        print(f"Wrote {len(sessions)} sessions to {args.dump}")
+        return
+
+    summary = asyncio.run(run(args, sessions))
+    print(json.dumps(summary, indent=2))
+    path = write_results("load", {"meta": run_metadata(vars(args)), "summary": summary}, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
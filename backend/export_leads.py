@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Export leads from MongoDB as NDJSON or CSV.
+
+Leads are read in _id order one page at a time and PAN/Aadhaar are
+decrypted on a thread pool, so memory stays flat for any collection size.
+PAN/Aadhaar are masked unless --pii plain is given; --pii none leaves
+them out. Progress goes to stderr; an interrupted export can continue
+with --after <last exported id>.
+
+    python export_leads.py > leads.ndjson
+    python export_leads.py --format csv --since 2025-01-01 --business-type company -o leads.csv
+    python export_leads.py --fields id,full_name,pan --pii plain --after 665f1c...
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / ".env")
+
+from app.lead_export import EXPORT_FORMATS, PII_MODES, export_fields, export_rows, format_rows, lead_filter  # noqa: E402
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created at or after (ISO date/time, UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created before (ISO date/time, UTC)")
+    parser.add_argument("--business-type", choices=("company", "freelancer"))
+    parser.add_argument("--fields", help="comma-separated columns (default: all)")
+    parser.add_argument("--pii", choices=PII_MODES, default="masked")
+    parser.add_argument("--after", help="resume after this lead id")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, help="decryption threads (default: EXPORT_DECRYPT_WORKERS or 4)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    columns = export_fields(args.fields.split(",") if args.fields else None, args.pii)
+    query = lead_filter(args.since, args.until, args.business_type)
+    stats: Dict[str, Any] = {"rows": 0, "last_id": None}
+
+    def counted(pages: Iterator[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        for page in pages:
+            stats["rows"] += len(page)
+            stats["last_id"] = page[-1].get("id", stats["last_id"])
+            print(f"  {stats['rows']} leads", end="\r", file=sys.stderr, flush=True)
+            yield page
+
+    start = time.perf_counter()
+    rows = counted(export_rows(query, columns, args.pii, args.batch_size, args.after, args.workers))
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for chunk in format_rows(rows, columns, args.format):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    if stats["rows"]:
+        print(file=sys.stderr)
+    print(f"Exported {stats['rows']} leads in {elapsed:.2f}s ({stats['rows'] / elapsed if elapsed else 0:.0f} leads/s)"
+          + (f", last id {stats['last_id']}" if stats["last_id"] else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Rebuild the vector index offline from the uploaded PDFs.
+
+Use after changing OPENAI_EMBEDDINGS_MODEL, EMBEDDING_DIMENSIONS,
+VECTOR_COMPRESSION or the chunking. PDFs are extracted and chunked on a
+process pool (through the extraction cache), chunks are embedded in large
+batches with several requests in flight, and every finished batch is
+checkpointed in a staging directory next to the index, so an interrupted
+run continues with --resume. The new index is published as the next
+snapshot in one atomic manifest switch; running servers pick it up on
+their next search.
+
+    python reindex.py
+    python reindex.py --chunking sentence --batch-size 512 --concurrency 8
+    python reindex.py --tenant acme --resume
+    python reindex.py --manifest files.txt   # one PDF path (or {"path", "source", "tag"} JSON) per line
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / ".env")
+
+from app import index_snapshots  # noqa: E402
+from app.chunking import ChunkingSpec, default_spec, split_documents  # noqa: E402
+from app.pdf_processing import build_page_documents, describe_failed_pages, extract_pdf  # noqa: E402
+from app.tenants import normalize_tenant, tenant_dir  # noqa: E402
+
+
+def _extract_file(job: Tuple[str, str, float, str | None, ChunkingSpec]) -> Dict[str, Any]:
+    """Extract and chunk one PDF; runs in a worker process."""
+    path, source, uploaded_at, tag, spec = job
+    try:
+        result = extract_pdf(path)
+        texts, metas = build_page_documents(source, result.pages, uploaded_at, tag)
+        docs = split_documents(texts, metas, spec)
+    except Exception as e:
+        return {"source": source, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "source": source,
+        "sha256": result.sha256,
+        "pages": len(result.pages),
+        "errors": describe_failed_pages(source, result),
+        "chunks": [(d.page_content, d.metadata) for d in docs],
+    }
+
+
+def _read_manifest_file(manifest: str) -> List[Dict[str, Any]]:
+    entries = []
+    with open(manifest) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if line.startswith("{") else {"path": line}
+            entry.setdefault("source", os.path.basename(entry["path"]))
+            entries.append(entry)
+    return entries
+
+
+def _indexed_metadata(tenant: str | None) -> Dict[str, Dict[str, Any]]:
+    """uploaded_at/tag per source in the current index, so a rebuild keeps them."""
+    from app.vectorstore import load_index
+
+    loaded = load_index(tenant)
+    if loaded is None:
+        return {}
+    tombstoned = set(loaded.tombstones.tolist()) if loaded.tombstones is not None else set()
+    found: Dict[str, Dict[str, Any]] = {}
+    for vector_id, doc_id in loaded.store.index_to_docstore_id.items():
+        if vector_id in tombstoned:
+            continue
+        meta = loaded.store.docstore.search(doc_id).metadata or {}
+        if meta.get("source") and meta["source"] not in found:
+            found[meta["source"]] = {k: meta[k] for k in ("uploaded_at", "tag") if k in meta}
+    return found
+
+
+def _batch_file(staging: Path, texts: List[str]) -> Path:
+    # Named by content, so a resumed run reuses every batch whose chunks are unchanged
+    return staging / f"batch-{hashlib.sha256(json.dumps(texts).encode()).hexdigest()[:32]}.npy"
+
+
+def _embed_batches(chunks: List[str], staging: Path, batch_size: int, concurrency: int) -> Tuple[List[Path], int, int]:
+    """Embed ``chunks`` into checkpoint files in ``staging``; returns (files in order, embedded, resumed)."""
+    import numpy as np
+
+    from app.vectorstore import get_embeddings
+
+    embeddings = get_embeddings()
+    batches = [chunks[start:start + batch_size] for start in range(0, len(chunks), batch_size)]
+    files = [_batch_file(staging, texts) for texts in batches]
+    pending = [(path, texts) for path, texts in zip(files, batches) if not path.exists()]
+    resumed = len(batches) - len(pending)
+
+    def embed(path: Path, texts: List[str]) -> int:
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        # Written aside and renamed, so a killed run never leaves a partial checkpoint
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, vectors)
+        os.replace(tmp, path)
+        return len(texts)
+
+    done = 0
+    total = sum(len(texts) for _p, texts in pending)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(embed, path, texts) for path, texts in pending]
+        for future in as_completed(futures):
+            done += future.result()
+            print(f"  embedded {done}/{total} chunks", end="\r", flush=True)
+    if pending:
+        print()
+    return files, len(pending), resumed
+
+
+def _state(manifest: index_snapshots.Manifest | None) -> Tuple[int, Tuple[int, ...]] | None:
+    return (manifest.version, tuple(manifest.tombstones)) if manifest is not None else None
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=os.environ.get("UPLOAD_DIR", "./storage/uploads"))
+    parser.add_argument("--manifest", help="file listing the PDFs to index instead of every PDF in --uploads")
+    parser.add_argument("--tenant", help="rebuild this tenant's index from its upload folder")
+    parser.add_argument("--chunking", help="strategy[:size[:overlap]] for the new index (default: CHUNK_* settings)")
+    parser.add_argument("--indexed-only", action="store_true",
+                        help="only re-index files that are in the current index (skips deleted documents)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--batch-size", type=int, default=256, help="chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=4, help="embedding requests in flight")
+    parser.add_argument("--resume", action="store_true", help="reuse embedded batches checkpointed by an earlier run")
+    parser.add_argument("--force", action="store_true", help="publish even if the index changed during the rebuild")
+    parser.add_argument("--keep-staging", action="store_true")
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from app.vectorstore import build_store, get_embeddings, get_faiss_path
+
+    tenant = normalize_tenant(args.tenant)
+    spec = ChunkingSpec.parse(args.chunking) if args.chunking else default_spec()
+    path = get_faiss_path(tenant)
+    staging = Path(f"{path}.reindex")
+    started = time.perf_counter()
+
+    # --- Inputs -------------------------------------------------------------
+    if args.manifest:
+        entries = _read_manifest_file(args.manifest)
+    else:
+        uploads = Path(tenant_dir(args.uploads, tenant))
+        entries = [{"path": str(p), "source": p.name} for p in sorted(uploads.glob("*.pdf"))]
+    current = index_snapshots.read_manifest(path)
+    indexed = _indexed_metadata(tenant) if current is not None else {}
+    if args.indexed_only:
+        entries = [e for e in entries if e["source"] in indexed]
+    if not entries:
+        print("No PDFs to index")
+        return 1
+    dropped = sorted(set(indexed) - {e["source"] for e in entries})
+    if dropped:
+        print(f"Warning: {len(dropped)} indexed documents have no file to re-index and will be dropped: "
+              f"{', '.join(dropped)}")
+    jobs = []
+    errors: List[str] = []
+    for e in entries:
+        kept = indexed.get(e["source"], {})
+        try:
+            uploaded_at = kept["uploaded_at"] if "uploaded_at" in kept else os.path.getmtime(e["path"])
+        except OSError as err:
+            errors.append(f"{e['source']}: {type(err).__name__}: {err}")
+            continue
+        jobs.append((e["path"], e["source"], uploaded_at, e.get("tag", kept.get("tag")), spec))
+    print(f"Re-indexing {len(jobs)} files into {path} with chunking {spec} on {args.workers} processes")
+
+    # --- Extract and chunk --------------------------------------------------
+    start = time.perf_counter()
+    texts: List[str] = []
+    metas: List[dict] = []
+    pages = files = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for result in pool.map(_extract_file, jobs, chunksize=1):
+            if "error" in result:
+                errors.append(f"{result['source']}: {result['error']}")
+                continue
+            files += 1
+            pages += result["pages"]
+            errors.extend(result["errors"])
+            for text, meta in result["chunks"]:
+                texts.append(text)
+                metas.append(meta)
+    extract_s = time.perf_counter() - start
+    for err in errors:
+        print(f"  {err}")
+    if not texts:
+        print("No extractable text")
+        return 1
+
+    # --- Embed, checkpointing each batch ------------------------------------
+    embeddings = get_embeddings()
+    plan = {
+        "chunking": spec.to_dict(),
+        "embeddings": f"{type(embeddings).__name__}:{getattr(embeddings, 'model', '')}:"
+                      f"{getattr(embeddings, 'dimensions', '')}",
+    }
+    plan_path = staging / "plan.json"
+    if staging.exists():
+        previous = json.loads(plan_path.read_text()) if plan_path.exists() else None
+        if not args.resume or previous != plan:
+            if args.resume:
+                print("Checkpoint was made with other embeddings or chunking; starting over")
+            shutil.rmtree(staging)
+    staging.mkdir(parents=True, exist_ok=True)
+    plan_path.write_text(json.dumps(plan, indent=2))
+
+    start = time.perf_counter()
+    files_done, embedded, resumed = _embed_batches(texts, staging, args.batch_size, max(1, args.concurrency))
+    embed_s = time.perf_counter() - start
+    vectors = np.concatenate([np.load(p) for p in files_done])
+
+    # --- Build and publish --------------------------------------------------
+    start = time.perf_counter()
+    store, exact = build_store(texts, vectors, metas)
+    with index_snapshots.writer_lock(path):
+        # Uploads and deletes made since the start are not in the rebuilt index
+        if _state(index_snapshots.read_manifest(path)) != _state(current) and not args.force:
+            print("The index changed while re-indexing (an upload or delete); re-run with --resume "
+                  "to pick it up, or --force to publish anyway")
+            return 2
+        manifest = index_snapshots.write_snapshot(path, store, exact, [], spec.to_dict())
+    build_s = time.perf_counter() - start
+    if not args.keep_staging:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    total_s = time.perf_counter() - started
+    print(f"Published snapshot v{manifest.version}: {files} files, {pages} pages, {len(texts)} chunks, "
+          f"dim {vectors.shape[1]}, {len(errors)} errors")
+    print(f"  extract+chunk {extract_s:8.2f}s  {pages / extract_s if extract_s else 0:9.1f} pages/s")
+    print(f"  embed         {embed_s:8.2f}s  {len(texts) / embed_s if embed_s else 0:9.1f} chunks/s "
+          f"({embedded} batches embedded, {resumed} resumed)")
+    print(f"  build+publish {build_s:8.2f}s")
+    print(f"  total         {total_s:8.2f}s  {files / total_s:9.2f} files/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
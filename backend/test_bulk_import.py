@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Check bulk lead ingestion with partial duplicates and bad rows, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no MongoDB is needed.
+
+    python test_bulk_import.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+EXISTING = {"full_name": "Asha Rao", "business_type": "company", "pan": "ABCDE1234F", "aadhaar": "123456789012"}
+NEW_A = {"full_name": "Ravi Kumar", "business_type": "freelancer", "pan": "FGHIJ5678K", "aadhaar": "234567890123"}
+NEW_B = {"full_name": "Meera Iyer", "business_type": "Company", "pan": "LMNOP9012Q", "aadhaar": "345678901234"}
+NEW_C = {"full_name": "Kiran Das", "business_type": "company", "pan": "RSTUV3456W", "aadhaar": "456789012345"}
+
+
+async def post(client, path, **kwargs):
+    resp = await client.post(path, **kwargs)
+    assert resp.status_code == 200, f"{path} returned {resp.status_code}: {resp.text}"
+    return resp.json()
+
+
+async def check_ndjson(client, leads):
+    existing_id = (await post(client, "/api/submit", json={"session_id": "before-bulk", "lead": EXISTING}))["id"]
+    lines = [
+        json.dumps(NEW_A),
+        json.dumps({**EXISTING, "full_name": "Someone Else"}),
+        json.dumps({**NEW_B, "aadhaar": "12345"}),
+        "{not json",
+        json.dumps(NEW_B),
+        "",
+        json.dumps({**NEW_A, "full_name": "Ravi K"}),
+        json.dumps(NEW_C),
+        json.dumps({**NEW_C, "full_name": "K. Das"}),
+    ]
+    report = await post(client, "/api/leads/bulk", content="\n".join(lines).encode(),
+                        headers={"content-type": "application/x-ndjson"})
+    statuses = {r["row"]: r["status"] for r in report["results"]}
+    assert statuses == {1: "created", 2: "duplicate", 3: "invalid", 4: "invalid", 5: "created", 6: "duplicate",
+                        7: "created", 8: "duplicate"}, statuses
+    counts = (report["rows"], report["created"], report["duplicates"], report["invalid"], report["failed"])
+    assert counts == (8, 3, 3, 2, 0), counts
+    ids = {r["row"]: r["id"] for r in report["results"]}
+    assert ids[2] == existing_id, "a duplicate of a stored lead must point at it"
+    assert ids[6] == ids[1], "a pair repeated in a later batch must point at its first row"
+    assert ids[8] == ids[7], "a pair repeated within one batch must point at its first row"
+    assert leads.count_documents({}) == 4
+    assert leads.find_one({"full_name": "Someone Else"}) is None, "bulk import overwrote an existing lead"
+    print("✓ NDJSON: new rows stored; repeats of stored or earlier rows reported as duplicates; bad rows as invalid")
+    return existing_id
+
+
+async def check_csv(client, leads, existing_id):
+    body = "\n".join([
+        "full_name,business_type,website,pan,aadhaar",
+        "Nisha Shah,company,https://nisha.example,XYZAB1234C,567890123456",
+        f"Asha Again,company,,{EXISTING['pan'].lower()},{EXISTING['aadhaar']}",
+        "Too,many,columns,in,this,row",
+        '"Rao, Vikram",freelancer,,DEFGH5678I,678901234567',
+    ])
+    report = await post(client, "/api/leads/bulk", content=body.encode(), headers={"content-type": "text/csv"})
+    statuses = [(r["row"], r["status"]) for r in report["results"]]
+    assert statuses == [(1, "created"), (2, "duplicate"), (3, "invalid"), (4, "created")], statuses
+    assert report["results"][1]["id"] == existing_id
+    assert leads.count_documents({}) == 6
+    print("✓ CSV: quoted fields parse; a PAN in another case is still a duplicate")
+
+    resp = await client.post("/api/leads/bulk", content=b"full_name,pan\nX,ABCDE1234F\n",
+                             headers={"content-type": "text/csv"})
+    assert resp.status_code == 400 and "missing" in resp.json()["detail"], resp.text
+    print("✓ CSV: a header without the required columns is rejected with 400")
+
+
+async def check_row_limit(client, leads):
+    os.environ["BULK_MAX_ROWS"] = "2"
+    body = "\n".join(json.dumps({**NEW_A, "pan": f"LIMIT{i:04d}Z", "aadhaar": f"9{i:011d}"}) for i in range(4))
+    report = await post(client, "/api/leads/bulk", content=body.encode(),
+                        headers={"content-type": "application/x-ndjson"})
+    assert report["created"] == 2 and report["results"][-1]["status"] == "invalid", report
+    assert "limit" in report["results"][-1]["error"]
+    assert leads.count_documents({}) == 8
+    print("✓ Rows past BULK_MAX_ROWS are reported, and the rows before them are kept")
+
+
+async def check_line_limit(client, leads):
+    os.environ.update(BULK_MAX_ROWS="10000", BULK_MAX_LINE_BYTES="300")
+    rows = [json.dumps({**NEW_A, "pan": "LINEA1234Z", "aadhaar": "811111111111"}),
+            json.dumps({**NEW_A, "pan": "LINEB1234Z", "aadhaar": "822222222222", "website": "x" * 1000}),
+            json.dumps({**NEW_A, "pan": "LINEC1234Z", "aadhaar": "833333333333"})]
+    report = await post(client, "/api/leads/bulk", content="\n".join(rows).encode(),
+                        headers={"content-type": "application/x-ndjson"})
+    assert [(r["row"], r["status"]) for r in report["results"]] == [(1, "created"), (2, "invalid")], report
+    assert "longer than 300 bytes" in report["results"][1]["error"]
+    assert leads.count_documents({}) == 9
+    print("✓ A row past BULK_MAX_LINE_BYTES ends the import there, keeping the rows before it")
+
+    report = await post(client, "/api/leads/bulk", content=b"{" * 100_000,
+                        headers={"content-type": "application/x-ndjson"})
+    assert [r["status"] for r in report["results"]] == ["invalid"], report
+    resp = await client.post("/api/leads/bulk", content=("full_name," * 100).encode(),
+                             headers={"content-type": "text/csv"})
+    assert resp.status_code == 400 and "longer than" in resp.json()["detail"], resp.text
+    print("✓ A body without newlines is rejected instead of being buffered whole")
+
+
+async def main(leads):
+    import httpx
+
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+        existing_id = await check_ndjson(client, leads)
+        await check_csv(client, leads, existing_id)
+        await check_row_limit(client, leads)
+        await check_line_limit(client, leads)
+
+
+if __name__ == "__main__":
+    print("🔍 Testing bulk lead ingestion...")
+    f = fakes.install(llm_latency_ms=0.0)
+    # Small batches so duplicates fall both inside one insert_many and across batches
+    os.environ["BULK_BATCH_SIZE"] = "2"
+    try:
+        asyncio.run(main(f["mongo"]["ai_hackathon"].leads))
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Bulk ingestion checks passed!")
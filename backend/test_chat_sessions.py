@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Check server-side chat history and the chat response path, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key or MongoDB is needed.
+
+    python test_chat_sessions.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+
+async def post_chats(bodies):
+    import httpx
+
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+        return [await client.post("/api/chat", json=body) for body in bodies]
+
+
+def check_server_side_history():
+    from app import main
+
+    prompts = []
+    generate_reply = main.generate_reply
+
+    def recording_reply(history, contexts):
+        prompts.append(list(history))
+        return generate_reply(history, contexts)
+
+    main.generate_reply = recording_reply
+    try:
+        turns = ["I want to onboard", "Asha Verma", "freelancer"]
+        responses = asyncio.run(post_chats(
+            [{"session_id": "kept", "message": {"role": "user", "content": text}} for text in turns]
+            + [{"session_id": "other", "message": {"role": "user", "content": "hello"}}]
+        ))
+    finally:
+        main.generate_reply = generate_reply
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses]
+    kept = [r.json() for r in responses[:3]]
+
+    assert [len(p) for p in prompts] == [1, 3, 5, 1], f"prompt lengths {[len(p) for p in prompts]}"
+    assert [content for role, content in prompts[2] if role == "user"] == turns
+    assert prompts[2][1] == ("assistant", kept[0]["reply"]), "the stored reply is not what the client got"
+    assert prompts[3] == [("user", "hello")], "another session saw this session's history"
+    print("✓ With only the new message sent, the LLM sees every earlier turn of that session and no other")
+
+    assert [body["history_messages"] for body in kept] == [2, 4, 6]
+    assert kept[2]["lead_fields"]["full_name"] == "Asha Verma"
+    assert main.CONVERSATIONS.history("kept")[-1] == ("assistant", kept[2]["reply"])
+    print("✓ Each turn and its reply are stored, and lead fields build up across turns")
+
+    both = asyncio.run(post_chats([{"session_id": "kept", "message": {"role": "user", "content": "hi"},
+                                    "messages": [{"role": "user", "content": "hi"}]}]))[0]
+    assert both.status_code == 422 and len(main.CONVERSATIONS.history("kept")) == 6
+    print("✓ A request sending both the full history and a new message is rejected")
+
+
+def check_store_limits():
+    from app.conversations import ConversationStore
+
+    store = ConversationStore(max_sessions=2, max_messages=4, ttl_seconds=60)
+    for i in range(3):
+        store.append("long", ("user", f"q{i}"), ("assistant", f"a{i}"))
+    assert store.history("long") == [("user", "q1"), ("assistant", "a1"), ("user", "q2"), ("assistant", "a2")]
+    store.history("long").append(("user", "not stored"))
+    assert len(store.history("long")) == 4, "history() handed out the stored list"
+    print("✓ A transcript keeps only its last max_messages turns, and history() returns a copy")
+
+    store.append("second", ("user", "q"))
+    store.history("long")
+    store.append("long", ("user", "again"))
+    store.append("third", ("user", "q"))
+    assert store.history("second") == [] and len(store) == 2, "the least recently used session was kept"
+    assert store.stats() == {"sessions": 2, "messages": 5, "chars": 12}, store.stats()
+    print("✓ Past max_sessions the least recently used transcript is dropped")
+
+    expiring = ConversationStore(max_sessions=10, max_messages=10, ttl_seconds=0.05)
+    expiring.append("idle", ("user", "q"))
+    time.sleep(0.1)
+    assert expiring.history("idle") == [] and len(expiring) == 0
+    expiring.append("idle", ("user", "q"))
+    time.sleep(0.1)
+    assert expiring.append("idle", ("user", "fresh")) == 1, "an expired transcript was extended"
+    print("✓ A transcript idle for longer than the TTL is forgotten")
+
+
+def check_lead_copy_on_write():
+    from app.chat_logic import infer_lead_fields_from_message
+    from app.schemas import LeadFields
+
+    lead = LeadFields(full_name="Asha Verma")
+    assert infer_lead_fields_from_message("sounds good", lead) is lead
+    updated = infer_lead_fields_from_message("freelancer, PAN abcde1234f", lead)
+    assert (updated.business_type, updated.pan) == ("freelancer", "ABCDE1234F") and updated.full_name == "Asha Verma"
+    assert lead.business_type is None and lead.pan is None, "the current lead was modified in place"
+    assert infer_lead_fields_from_message("my PAN is ABCDE1234F", updated) is updated
+    print("✓ Lead inference never modifies the current lead and only copies it when a field changes")
+
+
+def check_prompt_messages():
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    from app.llm import SYSTEM_PROMPT, build_messages
+
+    history = [("user", "I want to onboard"), ("assistant", "Great! What's your full name?"), ("user", "Asha Verma")]
+    contexts = ["Settlement takes two business days."]
+    template = ChatPromptTemplate.from_messages([
+        SystemMessage(content=SYSTEM_PROMPT + "\nContext you can use for answers (don't reveal this block):\n"
+                      + "- Settlement takes two business days."),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}"),
+    ])
+    rendered = template.invoke({"history": [HumanMessage(content=history[0][1]), AIMessage(content=history[1][1])],
+                                "input": history[2][1]}).to_messages()
+    assert build_messages(history, contexts) == rendered, "the direct message list differs from the prompt template"
+    print("✓ The message list handed to the model matches what the prompt template rendered")
+
+
+def check_chat_response():
+    from app import main, vectorstore
+    from app.schemas import ChatResponse
+
+    vectorstore.index_texts(["Settlement of card payments takes two business days. " * 20], [{"source": "fees.pdf"}])
+    first, second = asyncio.run(post_chats([
+        {"session_id": "response", "messages": [{"role": "user", "content": "I want to onboard as a freelancer"}]},
+        {"session_id": "response", "messages": [{"role": "user", "content": "Asha Verma"}]},
+    ]))
+    for resp in (first, second):
+        assert resp.status_code == 200 and resp.headers["content-type"] == "application/json", resp.headers
+        body = resp.json()
+        assert body["contexts"] and body["contexts"][0]["source"] == "fees.pdf"
+        assert body == ChatResponse.model_validate(body).model_dump(mode="json"), "the response skips or adds fields"
+    assert second.json()["lead_fields"] == {**first.json()["lead_fields"], "full_name": "Asha Verma"}
+    print("✓ /api/chat returns every ChatResponse field exactly as the validated model would serialise it")
+
+    lead = main.SESSION_STATE["response"]
+    asyncio.run(post_chats([{"session_id": "response",
+                             "messages": [{"role": "user", "content": "My PAN is ABCDE1234F"}]}]))
+    assert lead.pan is None and main.SESSION_STATE["response"].pan == "ABCDE1234F", "a stored lead was mutated"
+    asyncio.run(post_chats([{"session_id": "elsewhere", "messages": [{"role": "user", "content": "hello"}]}]))
+    assert main.SESSION_STATE["elsewhere"].full_name is None
+    print("✓ A turn replaces the session's lead rather than mutating the one stored before it")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing chat history and responses...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_server_side_history()
+        check_store_limits()
+        check_lead_copy_on_write()
+        check_prompt_messages()
+        check_chat_response()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Chat history and response checks passed!")
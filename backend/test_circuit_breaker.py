@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Check the LLM circuit breaker state machine and fallback routing, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed.
+
+    python test_circuit_breaker.py
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+
+class FailingModel:
+    """Stands in for a chat model whose provider is down."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        raise TimeoutError("provider timed out")
+
+
+class SlowModel:
+    """A healthy chat model that takes ``seconds`` per reply."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def invoke(self, prompt):
+        time.sleep(self.seconds)
+        return SimpleNamespace(content="Noted, thank you.")
+
+
+def check_state_machine():
+    from app.resilience import CircuitBreaker
+
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.2)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed", "opened before the failure threshold"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    print("✓ Opens after failure_threshold consecutive failures and rejects calls")
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    assert breaker.allow(), "half-open breaker must let one probe through"
+    assert not breaker.allow(), "half-open breaker let a second probe through"
+    breaker.record_failure()
+    assert breaker.state == "open", "a failed probe must re-open the breaker"
+    print("✓ Half-open lets exactly one probe through; a failed probe re-opens it")
+
+    time.sleep(0.25)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed", "success must reset the failure count"
+    print("✓ A successful probe closes the breaker and resets the failure count")
+
+
+def check_fallback_routing(chat_model):
+    from app import llm
+    from app.resilience import CircuitOpenError
+
+    os.environ.update(OPENAI_MODEL="primary-model", OPENAI_FAST_MODEL="fast-model",
+                      LLM_BREAKER_FAILURES="2", LLM_BREAKER_RESET_SECONDS="60")
+    llm._BREAKERS.clear()
+    llm._LATENCY.clear()
+    primary = FailingModel()
+    models = {"primary-model": primary, "fast-model": chat_model}
+    llm.get_llm = lambda model=None: models[model]
+    messages = [("user", "I want to onboard")]
+
+    for _ in range(2):
+        try:
+            llm.generate_reply(messages, [])
+            raise AssertionError("a failing primary call must raise, not retry on the fallback")
+        except TimeoutError:
+            pass
+    assert llm.llm_status()["primary-model"]["breaker"] == "open"
+    reply = llm.generate_reply(messages, [])
+    assert "full name" in reply and primary.calls == 2, "open breaker did not route to the fast model"
+    print("✓ An open breaker on the primary model sends requests to the fast model")
+
+    models["fast-model"] = FailingModel()
+    for _ in range(2):
+        try:
+            llm.generate_reply(messages, [])
+        except TimeoutError:
+            pass
+    try:
+        llm.generate_reply(messages, [])
+        raise AssertionError("expected CircuitOpenError with every breaker open")
+    except CircuitOpenError:
+        pass
+    print("✓ With every breaker open, calls fail fast with CircuitOpenError")
+
+
+def check_status_is_read_only():
+    from app import llm
+
+    os.environ.update(LLM_P95_THRESHOLD_MS="100", LLM_PROBE_EVERY="3")
+    llm._LATENCY.clear()
+    for _ in range(50):
+        llm._latency("primary-model").observe(0.5)
+    before = next(llm._ROUTE_COUNTER)
+    for _ in range(10):
+        llm.llm_status()
+    assert next(llm._ROUTE_COUNTER) == before + 1, "llm_status advanced the probe counter"
+    routes = [llm.candidate_models()[0] for _ in range(30)]
+    assert routes.count("primary-model") == 10, f"expected every 3rd request to probe the primary, got {routes}"
+    print("✓ Slow primary: every LLM_PROBE_EVERY-th request probes it, and llm_status does not count as one")
+
+
+def check_slow_llm_does_not_block_worker():
+    import httpx
+
+    from app import llm
+    from app.main import app
+
+    os.environ.pop("OPENAI_FAST_MODEL", None)
+    llm._BREAKERS.clear()
+    llm._LATENCY.clear()
+    llm.get_llm = lambda model=None: SlowModel(0.3)
+
+    async def chats(n):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/api/chat", json={"session_id": f"concurrent-{i}",
+                                               "messages": [{"role": "user", "content": "any question"}]})
+                for i in range(n)
+            ))
+            return time.perf_counter() - start, [r.status_code for r in responses]
+
+    elapsed, statuses = asyncio.run(chats(8))
+    assert statuses == [200] * 8, statuses
+    # One at a time would take 8 x 0.3s; the event loop must keep serving while a reply is generated
+    assert elapsed < 1.2, f"8 concurrent chats with a 0.3s LLM took {elapsed:.2f}s; the LLM call blocks the event loop"
+    print(f"✓ 8 concurrent chats against a 0.3s LLM finish in {elapsed:.2f}s, not one after another")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing the LLM circuit breaker...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_state_machine()
+        check_fallback_routing(f["chat_model"])
+        check_status_is_read_only()
+        check_slow_llm_does_not_block_worker()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Circuit breaker checks passed!")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check the shared index's writer lock and cross-process hot reload, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed. A
+second process stands in for another uvicorn worker on the same index.
+
+    python test_index_lock.py
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+TENANT = "shared"
+
+
+def other_worker(workdir, ready, loaded, events):
+    """Another worker process: waits for the writer lock, then watches for a new snapshot."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    fakes.install(llm_latency_ms=0.0, workdir=workdir)
+    from app import index_snapshots, vectorstore
+
+    ready.set()
+    start = time.perf_counter()
+    with index_snapshots.writer_lock(vectorstore.get_faiss_path(TENANT)):
+        events.put(("lock_wait", time.perf_counter() - start))
+    assert "a.pdf" in vectorstore.document_sources(TENANT)
+    loaded.set()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if "b.pdf" in vectorstore.document_sources(TENANT):
+            events.put(("reloaded", True))
+            return
+        time.sleep(0.05)
+    events.put(("reloaded", False))
+
+
+def texts(source, topic):
+    return [f"{topic}. " * 40], [{"source": source, "page": 1}]
+
+
+def check_per_path_lock():
+    from app import index_snapshots, vectorstore
+
+    a, b = vectorstore.get_faiss_path("tenant-a"), vectorstore.get_faiss_path("tenant-b")
+    held = threading.Event()
+
+    def hold():
+        with index_snapshots.writer_lock(a):
+            with index_snapshots.writer_lock(a):
+                held.set()
+                time.sleep(0.5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    start = time.perf_counter()
+    with index_snapshots.writer_lock(b):
+        other = time.perf_counter() - start
+    with index_snapshots.writer_lock(a):
+        same = time.perf_counter() - start
+    holder.join()
+    assert other < 0.1, f"a writer on another tenant's index waited {other:.2f}s"
+    assert same > 0.3, f"a second writer on the same index only waited {same:.2f}s"
+    print("✓ The writer lock is re-entrant and per index: other tenants' writers do not wait")
+
+
+def check_across_processes(workdir):
+    from app import index_snapshots, vectorstore
+
+    vectorstore.index_texts(*texts("a.pdf", "Cross-border payments"), tenant=TENANT)
+    ctx = multiprocessing.get_context("spawn")
+    ready, loaded, events = ctx.Event(), ctx.Event(), ctx.Queue()
+    worker = ctx.Process(target=other_worker, args=(workdir, ready, loaded, events))
+    with index_snapshots.writer_lock(vectorstore.get_faiss_path(TENANT)):
+        worker.start()
+        assert ready.wait(60), "worker process did not start"
+        time.sleep(0.5)
+    name, waited = events.get(timeout=30)
+    assert name == "lock_wait" and waited > 0.3, f"the other process took the lock after {waited:.2f}s"
+    print("✓ A writer in another process waits for the lock held here")
+
+    assert loaded.wait(30)
+    vectorstore.index_texts(*texts("b.pdf", "Exploratory data analysis"), tenant=TENANT)
+    name, reloaded = events.get(timeout=60)
+    worker.join(timeout=30)
+    assert name == "reloaded" and reloaded, "the other process never saw the new snapshot"
+    print("✓ The other process picks up the snapshot published here without a restart")
+
+
+def check_snapshot_pruned_while_loading():
+    from app import index_snapshots, vectorstore
+
+    tenant = "pruned"
+    os.environ["VECTOR_SNAPSHOTS_KEEP"] = "1"
+    vectorstore.index_texts(*texts("a.pdf", "Cross-border payments"), tenant=tenant)
+    path = vectorstore.get_faiss_path(tenant)
+    vectorstore._STORE_CACHE.pop(path, None)
+    original = index_snapshots.load_snapshot
+    raced = []
+
+    def load_after_prune(base, manifest, embeddings, mmap, **kwargs):
+        # Another worker publishes twice (pruning this version) between reading the manifest and loading it
+        if not raced:
+            raced.append(manifest.snapshot)
+            index_snapshots.load_snapshot = original
+            vectorstore.index_texts(*texts("b.pdf", "Exploratory data analysis"), tenant=tenant)
+            vectorstore.index_texts(*texts("c.pdf", "Onboarding checklist"), tenant=tenant)
+            vectorstore._STORE_CACHE.pop(path, None)
+        return original(base, manifest, embeddings, mmap, **kwargs)
+
+    index_snapshots.load_snapshot = load_after_prune
+    try:
+        loaded = vectorstore.load_index(tenant)
+    finally:
+        index_snapshots.load_snapshot = original
+        os.environ.pop("VECTOR_SNAPSHOTS_KEEP")
+    assert raced and not os.path.exists(os.path.join(os.path.dirname(path), raced[0])), "snapshot was not pruned"
+    assert loaded is not None, "a snapshot pruned mid-load left the worker without an index"
+    assert set(vectorstore.document_sources(tenant)) == {"a.pdf", "b.pdf", "c.pdf"}
+    print("✓ A worker loading a snapshot that gets pruned retries with the newer one")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing the shared index writer lock and hot reload...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_per_path_lock()
+        check_across_processes(f["workdir"])
+        check_snapshot_pruned_while_loading()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Writer lock and hot reload checks passed!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Check per-document delete/replace (tombstones) and compaction of the vector index, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed.
+
+    python test_index_tombstones.py
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+TENANT = "tombstones"
+
+
+def pages(source, topic, n):
+    texts = [f"{topic} page {i}: " + f"{topic} details for section {i}. " * 20 for i in range(n)]
+    return texts, [{"source": source, "page": i + 1} for i in range(n)]
+
+
+def sources_found(query):
+    from app.vectorstore import similarity_search_with_scores
+
+    return {meta["source"] for _text, meta, _dist in similarity_search_with_scores(query, k=10, tenant=TENANT)}
+
+
+def check_delete(embeddings):
+    from app import vectorstore
+
+    vectorstore.index_texts(*pages("a.pdf", "Cross-border payments", 3), tenant=TENANT)
+    vectorstore.index_texts(*pages("b.pdf", "Exploratory data analysis", 3), tenant=TENANT)
+    total = vectorstore.load_index(TENANT).store.index.ntotal
+    chunks_a = vectorstore.document_sources(TENANT)["a.pdf"]
+
+    def no_embedding(texts):
+        raise AssertionError("delete re-embedded chunks")
+
+    embeddings.embed_documents = no_embedding
+    try:
+        removed = vectorstore.delete_document("a.pdf", tenant=TENANT)
+    finally:
+        del embeddings.embed_documents
+    loaded = vectorstore.load_index(TENANT)
+    assert removed == chunks_a, f"deleted {removed} chunks, a.pdf had {chunks_a}"
+    assert "a.pdf" not in vectorstore.document_sources(TENANT)
+    assert loaded.store.index.ntotal == total, "delete rewrote the index instead of tombstoning"
+    assert len(loaded.tombstones) == removed
+    assert "a.pdf" not in sources_found("Cross-border payments details"), "search returned a deleted chunk"
+    assert vectorstore.delete_document("a.pdf", tenant=TENANT) == 0, "deleting twice removed chunks again"
+    print("✓ Delete tombstones a document's chunks without re-embedding, and search skips them")
+
+
+def check_replace():
+    from app import vectorstore
+
+    before = len(vectorstore.load_index(TENANT).tombstones)
+    old_chunks = vectorstore.document_sources(TENANT)["b.pdf"]
+    new_chunks = vectorstore.replace_document("b.pdf", *pages("b.pdf", "Revised analysis", 2), tenant=TENANT)
+    loaded = vectorstore.load_index(TENANT)
+    assert vectorstore.document_sources(TENANT) == {"b.pdf": new_chunks}
+    assert len(loaded.tombstones) == before + old_chunks, "replace did not tombstone the old version"
+    from app.vectorstore import similarity_search_with_scores
+
+    texts = [text for text, _m, _d in similarity_search_with_scores("Exploratory data analysis", k=10, tenant=TENANT)]
+    assert texts and all(t.startswith("Revised analysis") for t in texts), "search returned the replaced version"
+    print("✓ Replace swaps in the new version and tombstones the old one")
+
+
+def check_compaction_waits_for_writer_lock():
+    from app import index_snapshots, vectorstore
+
+    path = vectorstore.get_faiss_path(TENANT)
+    live = sum(vectorstore.document_sources(TENANT).values())
+    tombstoned = len(vectorstore.load_index(TENANT).tombstones)
+    result = {}
+    compaction = threading.Thread(target=lambda: result.update(vectorstore.compact_index(TENANT)))
+    with index_snapshots.writer_lock(path):
+        compaction.start()
+        time.sleep(0.3)
+        assert not result, "compaction ran while another writer held the snapshot lock"
+    compaction.join(timeout=30)
+    assert result == {"removed": tombstoned, "vectors": live}, result
+    loaded = vectorstore.load_index(TENANT)
+    assert loaded.store.index.ntotal == live and len(loaded.tombstones) == 0
+    assert vectorstore.document_sources(TENANT) == {"b.pdf": live}
+    assert "b.pdf" in sources_found("Revised analysis details")
+    print("✓ Compaction waits for the writer lock, then drops every tombstoned vector")
+
+
+def check_background_compaction():
+    from app import vectorstore
+
+    os.environ["VECTOR_COMPACT_RATIO"] = "0.2"
+    vectorstore.index_texts(*pages("c.pdf", "Onboarding checklist", 3), tenant=TENANT)
+    vectorstore.delete_document("c.pdf", tenant=TENANT)
+    deadline = time.time() + 30
+    while time.time() < deadline and len(vectorstore.load_index(TENANT).tombstones):
+        time.sleep(0.05)
+    assert len(vectorstore.load_index(TENANT).tombstones) == 0, "compaction did not start past VECTOR_COMPACT_RATIO"
+    print("✓ Deleting past VECTOR_COMPACT_RATIO compacts in the background")
+
+
+def check_admin_documents(workdir):
+    import asyncio
+
+    import httpx
+
+    from app import vectorstore
+    from app.main import app
+
+    os.environ["ADMIN_TOKEN"] = "check"
+    tenant = "admin-docs"
+    pdf = (Path(__file__).parent / "storage" / "uploads" / "Oops-questions.pdf").read_bytes()
+    uploads = Path(workdir) / "uploads" / "tenants" / tenant
+
+    async def requests():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check",
+                                     headers={"x-admin-token": "check"}) as client:
+            bad = []
+            for source in ("..%2Fescaped.pdf", "nested%2Fdoc.pdf", "..%5Cescaped.pdf"):
+                resp = await client.put(f"/admin/documents/{source}", params={"tenant": tenant},
+                                        files={"file": ("doc.pdf", pdf, "application/pdf")})
+                bad.append(resp.status_code)
+            put = await client.put("/admin/documents/oops.pdf", params={"tenant": tenant},
+                                   files={"file": ("doc.pdf", pdf, "application/pdf")})
+            assert put.status_code == 200 and put.json()["indexed_chunks"] > 0, put.text
+            assert (uploads / "oops.pdf").exists()
+            deleted = await client.delete("/admin/documents/oops.pdf", params={"tenant": tenant})
+            assert deleted.status_code == 200, deleted.text
+            return bad
+
+    assert asyncio.run(requests()) == [400, 400, 400], "a source with a directory part was accepted"
+    assert not any(Path(workdir).rglob("escaped.pdf")) and not (uploads / "nested").exists()
+    print("✓ Replacing a document whose name has a directory part is rejected before anything is written")
+    assert not (uploads / "oops.pdf").exists(), "the deleted document's upload is left for reindex.py to restore"
+    assert "oops.pdf" not in vectorstore.document_sources(tenant)
+    print("✓ Deleting a document removes its upload too, so a re-index does not bring it back")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing document tombstones and index compaction...")
+    f = fakes.install(llm_latency_ms=0.0)
+    # Background compaction would race the checks below until the last one turns it back on
+    os.environ["VECTOR_COMPACT_RATIO"] = "2"
+    try:
+        check_delete(f["embeddings"])
+        check_replace()
+        check_compaction_waits_for_writer_lock()
+        check_admin_documents(f["workdir"])
+        check_background_compaction()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Tombstone and compaction checks passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Check lead deduplication on the PAN/Aadhaar blind index and idempotent submits, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no MongoDB is needed.
+
+    python test_lead_dedupe.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+LEAD = {"full_name": "Asha Rao", "business_type": "company", "pan": "ABCDE1234F", "aadhaar": "123456789012"}
+
+
+async def submit(client, lead, session_id="dedupe", key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return await client.post("/api/submit", json={"session_id": session_id, "lead": lead}, headers=headers)
+
+
+async def check_submits(leads):
+    import httpx
+
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+        first = (await submit(client, LEAD)).json()
+        assert first["duplicate"] == "false"
+        again = (await submit(client, {**LEAD, "full_name": "Asha R", "pan": "abcde1234f"}, "other")).json()
+        assert again == {**first, "duplicate": "true"}, f"same PAN/Aadhaar stored twice: {first} {again}"
+        stored = leads.find_one({})
+        assert leads.count_documents({}) == 1 and stored["full_name"] == "Asha R"
+        assert "ABCDE1234F" not in str(stored), "PAN stored in clear"
+        print("✓ A resubmitted PAN/Aadhaar pair (any case) updates the existing lead instead of adding one")
+
+        other = {**LEAD, "pan": "PQRST6789Z", "aadhaar": "987654321098"}
+        keyed = (await submit(client, other, key="retry-1")).json()
+        retried = (await submit(client, {**other, "pan": "VWXYZ1111A"}, key="retry-1")).json()
+        assert keyed["duplicate"] == "false" and retried["id"] == keyed["id"] and retried["duplicate"] == "true"
+        assert leads.count_documents({}) == 2, "a retried Idempotency-Key stored another lead"
+        print("✓ A repeated Idempotency-Key returns the lead it first created")
+
+        for bad in ({**LEAD, "pan": "-- --"}, {**LEAD, "aadhaar": "no digits"}, {**LEAD, "aadhaar": None}):
+            resp = await submit(client, bad)
+            assert resp.status_code == 400, f"{bad} was accepted with {resp.status_code}"
+        assert leads.count_documents({}) == 2
+        print("✓ A PAN/Aadhaar that does not match its pattern is rejected with 400")
+
+
+def check_no_empty_key(leads):
+    from app.db import upsert_lead
+
+    for doc in ({"pan_bidx": None, "aadhaar_bidx": "x"}, {"pan_bidx": "x", "aadhaar_bidx": None}):
+        try:
+            upsert_lead(doc)
+            raise AssertionError(f"upsert_lead accepted {doc}")
+        except ValueError:
+            pass
+    assert leads.count_documents({}) == 2
+    print("✓ upsert_lead refuses a lead without both blind indexes instead of matching on None")
+
+
+def check_chat_auto_submit(leads):
+    import httpx
+
+    from app.main import app
+
+    async def chat(*turns):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            ids = set()
+            for text in turns:
+                resp = await client.post("/api/chat", json={"session_id": "chat-dedupe",
+                                                            "message": {"role": "user", "content": text}})
+                assert resp.status_code == 200, resp.text
+                if resp.json().get("submission_id"):
+                    ids.add(resp.json()["submission_id"])
+            return ids
+
+    ids = asyncio.run(chat("Meera Iyer", "freelancer", "PAN is KLMNO4321P", "Aadhaar 111122223333",
+                           "thanks", "one more question"))
+    assert len(ids) == 1, f"chat turns after completion stored {len(ids)} leads"
+    assert leads.count_documents({}) == 3
+    print("✓ Every chat turn after the lead is complete resubmits the same lead")
+
+    later = asyncio.run(chat("my website is https://meera.example"))
+    stored = leads.find_one({"full_name": "Meera Iyer"})
+    assert later == ids and leads.count_documents({}) == 3
+    assert stored["website"] == "https://meera.example", "a detail given after completion was dropped"
+    print("✓ Details added in a later turn of a completed chat update the stored lead")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing lead deduplication and idempotent submits...")
+    f = fakes.install(llm_latency_ms=0.0)
+    leads = f["mongo"]["ai_hackathon"].leads
+    try:
+        asyncio.run(check_submits(leads))
+        check_no_empty_key(leads)
+        check_chat_auto_submit(leads)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Deduplication checks passed!")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Check the load-test scenario generator and its replay, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key or MongoDB is needed.
+
+    python test_load_scenarios.py
+"""
+import asyncio
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+
+def check_generation():
+    from benchmarks.load_scenarios import generate_sessions
+
+    first, again, other = generate_sessions(200, seed=3), generate_sessions(200, seed=3), generate_sessions(200, seed=4)
+    assert [asdict(s) for s in first] == [asdict(s) for s in again], "the same seed produced different traffic"
+    assert [asdict(s) for s in first] != [asdict(s) for s in other]
+    onboarding = sum(s.onboarding for s in first)
+    assert 120 <= onboarding <= 160, f"{onboarding}/200 onboarding sessions for a 0.7 ratio"
+    assert all(s.turns for s in first) and len({s.session_id for s in first}) == 200
+    print("✓ The same seed always yields the same sessions, with the requested share of onboarding")
+
+
+def check_replay(leads):
+    import httpx
+
+    from app.main import app
+    from benchmarks.load_scenarios import generate_sessions, replay
+
+    sessions = generate_sessions(40, seed=7, mean_think_s=0)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            return await replay(client, sessions, rate=0, think_scale=0)
+
+    summary = asyncio.run(run())
+    onboarding = sum(s.onboarding for s in sessions)
+    assert summary["request"]["errors"] == 0, summary["request"]
+    submitted = summary["auto_submits"]
+    assert summary["onboarding_sessions"] == onboarding == submitted, (
+        f"{submitted} of {onboarding} scripted onboarding sessions reached auto-submit")
+    stored = {doc["session_id"] for doc in leads.find({})}
+    assert stored == {s.session_id for s in sessions if s.onboarding}, "leads stored for the wrong sessions"
+    print(f"✓ Replayed against the app, every one of the {onboarding} onboarding sessions submits exactly one lead")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing load-test scenarios...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_generation()
+        check_replay(f["mongo"]["ai_hackathon"].leads)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Load scenario checks passed!")
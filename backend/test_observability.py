@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Check the per-stage metrics and the profiling hooks, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed.
+
+    python test_observability.py
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+PDF = Path(__file__).parent / "storage" / "uploads" / "Oops-questions.pdf"
+
+
+def sample(text, name, **labels):
+    """Value of one series in Prometheus text output, 0 when it is absent; ``labels`` in output order."""
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+async def run(client, chats):
+    for i in range(chats):
+        resp = await client.post("/api/chat", json={"session_id": f"metrics-{i}",
+                                                    "messages": [{"role": "user", "content": "I want to onboard"}]})
+        assert resp.status_code == 200, resp.text
+    resp = await client.post("/api/upload", files={"files": (PDF.name, PDF.read_bytes(), "application/pdf")})
+    assert resp.status_code == 200 and resp.json()["success"], resp.text
+    return (await client.get("/metrics")).text
+
+
+def check_stage_metrics(embeddings):
+    import httpx
+
+    from app.main import app
+
+    async def requests():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            before = (await client.get("/metrics")).text
+            after = await run(client, chats=3)
+
+            def failing_embed(texts):
+                raise RuntimeError("embedding provider down")
+
+            embeddings.embed_documents = failing_embed
+            try:
+                resp = await client.post("/api/upload",
+                                         files={"files": ("other.pdf", PDF.read_bytes(), "application/pdf")})
+            finally:
+                del embeddings.embed_documents
+            assert not resp.json()["success"], resp.text
+            return before, after, (await client.get("/metrics")).text
+
+    before, after, failed = asyncio.run(requests())
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    for stage in ("inference", "retrieval", "rerank", "prompt_build", "llm"):
+        count = delta("app_stage_duration_seconds_count", path="chat", stage=stage)
+        assert count == 3, f"chat stage {stage} recorded {count} times for 3 requests"
+    for stage in ("extract", "chunk", "embed", "save"):
+        count = delta("app_stage_duration_seconds_count", path="upload", stage=stage)
+        assert count == 1, f"upload stage {stage} recorded {count} times for 1 upload"
+    assert delta("app_request_duration_seconds_count", path="/api/chat", status="200") == 3
+    assert delta("app_request_duration_seconds_count", path="/api/upload", status="200") == 1
+    print("✓ Each chat and upload records every one of its stages once, plus its end-to-end time")
+
+    # The fake LLM takes 50ms: every call lands above the 25ms bucket and inside the 100ms one
+    fast = delta("app_stage_duration_seconds_bucket", path="chat", stage="llm", le="0.025")
+    slow = delta("app_stage_duration_seconds_bucket", path="chat", stage="llm", le="0.1")
+    assert (fast, slow) == (0, 3), f"50ms LLM calls counted {fast} under 25ms and {slow} under 100ms"
+    assert delta("app_stage_duration_seconds_sum", path="chat", stage="llm") >= 0.15
+    print("✓ Stage timings fall in the histogram buckets matching the time actually spent")
+
+    labels = {"error": "RuntimeError", "path": "upload", "stage": "embed"}
+    errors = sample(failed, "app_errors_total", **labels) - sample(after, "app_errors_total", **labels)
+    assert errors == 1, f"a failing embedding call was counted {errors} times"
+    print("✓ An exception inside a stage is counted by stage and exception type")
+
+
+def busy_worker(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+
+
+def retain_allocations(kept):
+    kept.extend(f"retained-{i:08d}" * 4 for i in range(20_000))
+
+
+def sorted_call_chain():
+    return sorted(str(i) for i in range(200_000))
+
+
+def check_profiling(workdir):
+    import httpx
+
+    from app.main import app
+    from app.profiling import RequestProfile
+
+    os.environ.update(ADMIN_TOKEN="check", PROFILE_DIR=os.path.join(workdir, "profiles"))
+
+    async def sample_busy_thread():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check",
+                                     headers={"x-admin-token": "check"}) as client:
+            assert (await client.post("/admin/profile/start", params={"interval_ms": 2})).status_code == 200
+            assert (await client.post("/admin/profile/start")).status_code == 409, "a second profiler started"
+            worker = threading.Thread(target=busy_worker, args=(0.4,), name="busy worker")
+            worker.start()
+            await asyncio.to_thread(worker.join)
+            stopped = await client.post("/admin/profile/stop")
+            again = await client.post("/admin/profile/stop")
+            return stopped, again.status_code
+
+    stopped, again = asyncio.run(sample_busy_thread())
+    assert stopped.status_code == 200 and again == 409
+    stacks = dict(line.rsplit(" ", 1) for line in stopped.text.splitlines())
+    busy = sum(int(n) for stack, n in stacks.items()
+               if stack.startswith("busy_worker;") and "test_observability.py:busy_worker:" in stack)
+    samples = int(stopped.headers["X-Profile-Samples"])
+    # The thread ran for the whole 0.4s window, so it is in most of the samples taken meanwhile
+    assert busy >= 0.5 * samples > 0, f"busy thread in {busy} of {samples} samples"
+    assert Path(stopped.headers["X-Profile-Output"]).read_text() == stopped.text
+    print(f"✓ The sampling profiler finds a busy thread in {busy} of {samples} samples and saves the stacks")
+
+    with RequestProfile("/api/profiled") as profile:
+        sorted_call_chain()
+    collapsed = Path(profile.dump()).read_text()
+    edge = r"test_observability\.py:sorted_call_chain:\d+;[^ ]*<built-in_method_builtins\.sorted>"
+    assert re.search(edge, collapsed), "the cProfile call graph lost sorted_call_chain -> sorted"
+    print("✓ A per-request cProfile is written as collapsed stacks that keep caller -> callee paths")
+
+    async def heap_diff():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check",
+                                     headers={"x-admin-token": "check"}) as client:
+            kept = []
+            assert (await client.post("/admin/tracemalloc/start")).status_code == 200
+            first = (await client.post("/admin/tracemalloc/snapshot")).json()
+            retain_allocations(kept)
+            second = (await client.post("/admin/tracemalloc/snapshot", params={"top": 5})).json()
+            await client.post("/admin/tracemalloc/stop")
+            return first, second
+
+    first, second = asyncio.run(heap_diff())
+    grown = [s for s in second["top"] if "test_observability.py" in s["location"]]
+    assert not first["compared_to_previous"] and second["compared_to_previous"]
+    assert grown and grown[0]["size_diff_kb"] > 1000, f"retained allocations not in the top diff: {second['top']}"
+    print(f"✓ A second tracemalloc snapshot points at the line that retained {grown[0]['size_diff_kb']:.0f} KB since the first")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing metrics and profiling...")
+    f = fakes.install(llm_latency_ms=50.0)
+    try:
+        check_stage_metrics(f["embeddings"])
+        check_profiling(f["workdir"])
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Metrics and profiling checks passed!")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Check filtered similarity search and reranking, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed.
+
+    python test_retrieval.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+TENANT = "retrieval"
+QUERY = "payment settlement fees, oriented programming and data analysis notes for section 3"
+
+
+def pages(source, topic, n, tag, uploaded_at):
+    texts = [f"{topic} page {i}: " + f"{topic} notes for section {i}. " * 20 for i in range(n)]
+    return texts, [{"source": source, "page": i + 1, "tag": tag, "uploaded_at": uploaded_at} for i in range(n)]
+
+
+def seed():
+    from app import vectorstore
+
+    vectorstore.index_texts(*pages("payments.pdf", "Cross-border payment settlement fees", 40, "finance", 1000.0),
+                            tenant=TENANT)
+    vectorstore.index_texts(*pages("eda.pdf", "Exploratory data analysis", 4, "analytics", 2000.0), tenant=TENANT)
+    vectorstore.index_texts(*pages("oops.pdf", "Object oriented programming", 12, "engineering", 3000.0),
+                            tenant=TENANT)
+
+
+def brute_force(embeddings, query, k, keep):
+    """Top-k (text, squared distance) over every indexed chunk whose metadata passes ``keep``."""
+    import numpy as np
+
+    from app import vectorstore
+
+    docs = [d for d in vectorstore.load_index(TENANT).store.docstore._dict.values() if keep(d.metadata)]
+    vectors = np.asarray(embeddings.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+    dists = ((vectors - np.asarray(embeddings.embed_query(query), dtype=np.float32)) ** 2).sum(axis=1)
+    order = np.argsort(dists, kind="stable")[:k]
+    return [(docs[i].page_content, float(dists[i])) for i in order]
+
+
+def check_filtered_search(embeddings):
+    from app.vectorstore import similarity_search_with_scores
+
+    def search(filters, k=5):
+        return similarity_search_with_scores(QUERY, k=k, filters=filters, tenant=TENANT)
+
+    unfiltered = {meta["source"] for _t, meta, _d in search(None)}
+    assert "eda.pdf" not in unfiltered, f"eda.pdf already ranks unfiltered: {unfiltered}"
+    cases = [
+        (None, lambda m: True),
+        # A small scope is scored on its own rows; a large one goes to FAISS as an id selector
+        ({"source": "eda.pdf"}, lambda m: m["source"] == "eda.pdf"),
+        ({"source": ["eda.pdf", "oops.pdf"]}, lambda m: m["source"] in ("eda.pdf", "oops.pdf")),
+        ({"tag": "engineering"}, lambda m: m["tag"] == "engineering"),
+        ({"uploaded_after": 1500, "uploaded_before": 2500}, lambda m: 1500 <= m["uploaded_at"] <= 2500),
+    ]
+    for filters, keep in cases:
+        found = search(filters)
+        expected = brute_force(embeddings, QUERY, 5, keep)
+        assert found and all(keep(meta) for _t, meta, _d in found), f"{filters} returned chunks outside the filter"
+        assert len(found) == len(expected), f"{filters} returned {len(found)} of {len(expected)} chunks"
+        # Distances, not texts: chunks tied on distance may come back in either order
+        gaps = [abs(d - e) for (_t, _m, d), (_e, e) in zip(found, expected)]
+        assert max(gaps) < 1e-4, f"{filters} missed closer matching chunks"
+    print("✓ A filter restricts the search before ranking: every filter returns the exact top-k of its own chunks")
+
+    assert search({"source": "eda.pdf"}, k=10) and len(search({"source": "eda.pdf"}, k=10)) == 4
+    assert search({"source": "missing.pdf"}) == []
+    try:
+        search({"author": "someone"})
+        raise AssertionError("an unknown filter key was ignored instead of rejected")
+    except ValueError:
+        pass
+    print("✓ A filter matching fewer than k chunks returns just those; unknown filter keys are rejected")
+
+
+def chat_contexts(query, **fields):
+    """Contexts /api/chat retrieved for one question to the seeded tenant."""
+    import asyncio
+
+    import httpx
+
+    from app.main import app
+
+    async def chat():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            resp = await client.post("/api/chat", json={"session_id": "retrieval", "tenant": TENANT, **fields,
+                                                        "messages": [{"role": "user", "content": query}]})
+            assert resp.status_code == 200, resp.text
+            return resp.json()["contexts"]
+
+    return asyncio.run(chat())
+
+
+def check_chat_sources():
+    found = [c["source"] for c in chat_contexts(QUERY, sources=["oops.pdf"])]
+    assert found and set(found) == {"oops.pdf"}, found
+    print("✓ /api/chat with sources only answers from those documents")
+
+
+def check_rerank():
+    from app import rerank
+
+    query = "How long does payment settlement take?"
+    candidates = [
+        ("Our office dog is called Biscuit.", {"source": "team.pdf"}, 0.10),
+        ("Payment settlement usually takes a day.", {"source": "fees.pdf"}, 0.20),
+        ("Settlement of a payment takes two business days; payment settlement is daily.", {"source": "fees.pdf"}, 0.30),
+        ("The cafeteria opens at eight.", {"source": "team.pdf"}, 0.40),
+    ]
+    os.environ["RERANK_MODE"] = "off"
+    assert rerank.candidate_count(4) == 4
+    assert [c.distance for c in rerank.rerank(query, candidates, k=3)] == [0.10, 0.20, 0.30]
+    print("✓ With reranking off, the vector order is kept and only k chunks are fetched")
+
+    os.environ["RERANK_MODE"] = "lexical"
+    assert rerank.candidate_count(4) == 12, "reranking does not widen the vector search"
+    ranked = rerank.rerank(query, candidates, k=3)
+    assert [c.distance for c in ranked] == [0.30, 0.20], [(c.distance, c.relevance) for c in ranked]
+    assert ranked[0].relevance > ranked[1].relevance >= 0.2
+    print("✓ Lexical reranking puts the chunk covering the question first and drops chunks that share no terms")
+
+    os.environ["RERANK_MIN_CONTEXTS"] = "3"
+    try:
+        kept = rerank.rerank(query, candidates, k=3)
+    finally:
+        os.environ.pop("RERANK_MIN_CONTEXTS")
+    assert [c.distance for c in kept][:2] == [0.30, 0.20] and len(kept) == 3 and kept[2].relevance == 0
+    print("✓ RERANK_MIN_CONTEXTS keeps the best chunks even below the threshold")
+
+    os.environ["RERANK_MODE"] = "cross-encoder"
+    try:
+        fallback = rerank.get_reranker()
+        assert fallback.name in ("cross-encoder", "lexical") and rerank.get_reranker() is fallback
+    finally:
+        os.environ["RERANK_MODE"] = "off"
+    print(f"✓ The {fallback.name} reranker is loaded once and reused")
+
+
+def check_chat_rerank():
+    os.environ["RERANK_MODE"] = "lexical"
+    try:
+        contexts = chat_contexts("payment settlement fees")
+        relevance = [c["relevance"] for c in contexts]
+        assert contexts and relevance == sorted(relevance, reverse=True) and min(relevance) >= 0.2, relevance
+        assert {c["source"] for c in contexts} == {"payments.pdf"}
+        os.environ["RERANK_THRESHOLD"] = "1.1"
+        assert chat_contexts("payment settlement fees") == [], "chunks below the threshold reached the prompt"
+    finally:
+        os.environ.pop("RERANK_THRESHOLD", None)
+        os.environ["RERANK_MODE"] = "off"
+    print("✓ /api/chat returns reranked contexts best first with their relevance, and none below the threshold")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing retrieval...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        seed()
+        check_filtered_search(f["embeddings"])
+        check_chat_sources()
+        check_rerank()
+        check_chat_rerank()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Retrieval checks passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check the startup warm-up and the health endpoints, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key or MongoDB is needed.
+
+    python test_startup.py
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+
+def warm_up():
+    from app.startup import WarmupState, warm_up
+
+    state = WarmupState()
+    asyncio.run(warm_up(state))
+    return state
+
+
+def check_warmup_reports_broken_index():
+    from app import index_snapshots, vectorstore
+
+    state = warm_up()
+    assert state.steps["vector_store"]["ok"] and state.status == "ready", state.report()
+    print("✓ Without an index yet, the warm-up is ready")
+
+    vectorstore.index_texts(["Payouts run every weekday at noon. " * 30], [{"source": "payouts.pdf"}])
+    path = vectorstore.get_faiss_path()
+    snapshot = index_snapshots.snapshot_path(path, index_snapshots.read_manifest(path))
+    Path(snapshot, "index.faiss").write_bytes(b"not a faiss index")
+    vectorstore._STORE_CACHE.clear()
+    state = warm_up()
+    step = state.steps["vector_store"]
+    assert not step["ok"] and "could not be loaded" in step["error"], step
+    assert state.status == "degraded"
+    print("✓ An index that exists but does not load fails the warm-up, so /ready reports degraded")
+
+
+def check_health_does_not_wait_for_mongo(mongo):
+    import httpx
+
+    from app.main import app
+
+    def hanging_ping(name, *args, **kwargs):
+        time.sleep(3)
+        return {"ok": 1.0}
+
+    os.environ["HEALTH_MONGO_TIMEOUT_SECONDS"] = "0.3"
+    mongo.admin.command = hanging_ping
+
+    async def health_and_metrics():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            start = time.perf_counter()
+            health = asyncio.create_task(client.get("/health"))
+            await asyncio.sleep(0.05)
+            metrics = await client.get("/metrics")
+            metrics_s = time.perf_counter() - start
+            return (await health), metrics.status_code, metrics_s, time.perf_counter() - start
+
+    health, metrics_status, metrics_s, health_s = asyncio.run(health_and_metrics())
+    assert metrics_status == 200 and metrics_s < 0.25, f"/metrics waited {metrics_s:.2f}s behind the Mongo ping"
+    assert health.json()["mongodb"] == "timeout" and health_s < 1, (health.json(), health_s)
+    print(f"✓ A hanging Mongo ping neither blocks other requests nor /health ({health_s:.2f}s, mongodb: timeout)")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing the startup warm-up and health checks...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_warmup_reports_broken_index()
+        check_health_does_not_wait_for_mongo(f["mongo"])
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Startup and health checks passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Check per-tenant vector indexes, offline.
+
+Runs against the fakes in benchmarks/fakes.py; no OpenAI key is needed.
+
+    python test_tenant_indexes.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks import fakes
+
+
+def check_reads_create_nothing(workdir):
+    import httpx
+
+    from app import vectorstore
+    from app.main import app
+
+    async def chat():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            return await client.post("/api/chat", json={"session_id": "unknown-tenant", "tenant": "nobody",
+                                                        "messages": [{"role": "user", "content": "fees?"}]})
+
+    assert asyncio.run(chat()).status_code == 200
+    assert vectorstore.similarity_search_with_scores("fees", k=4, tenant="nobody-else") == []
+    assert vectorstore.index_stats("nobody-else") == {"vectors": 0}
+    tenants = Path(workdir) / "vector_db" / "tenants"
+    created = sorted(p.name for p in tenants.iterdir()) if tenants.exists() else []
+    assert created == [], f"searching unknown tenants created {created}"
+    print("✓ Searching a tenant without an index creates no directories")
+
+    vectorstore.index_texts(["Settlement takes two business days. " * 20], [{"source": "a.pdf"}], tenant="acme")
+    assert (tenants / "acme").is_dir() and vectorstore.document_sources("acme") == {"a.pdf": 1}
+    print("✓ The first upload creates the tenant's index directory")
+
+
+def check_float32_sidecar():
+    import numpy as np
+
+    from app import index_snapshots, vectorstore
+
+    text = ["Refunds are settled to the original payment method. " * 40]
+    os.environ["VECTOR_COMPRESSION"] = "int8"
+    loaded = {}
+    try:
+        for tenant, rerank in (("int8-plain", "false"), ("int8-rerank", "true")):
+            os.environ["VECTOR_RERANK_FP32"] = rerank
+            vectorstore.index_texts(text, [{"source": "refunds.pdf"}], tenant=tenant)
+            loaded[tenant] = vectorstore._load_index(tenant)
+            path = vectorstore.get_faiss_path(tenant)
+            snapshot = index_snapshots.snapshot_path(path, index_snapshots.read_manifest(path))
+            has_sidecar = os.path.exists(os.path.join(snapshot, index_snapshots.EXACT_VECTORS_FILE))
+            assert has_sidecar == (rerank == "true"), f"{tenant}: sidecar written={has_sidecar}"
+    finally:
+        os.environ.pop("VECTOR_COMPRESSION")
+        os.environ.pop("VECTOR_RERANK_FP32")
+    plain, reranked = loaded["int8-plain"], loaded["int8-rerank"]
+    assert plain.exact is None and isinstance(reranked.exact, np.memmap)
+    print("✓ A compressed index only gets a float32 sidecar while VECTOR_RERANK_FP32 is on")
+    assert reranked.resident_bytes == plain.resident_bytes, "the mapped sidecar was counted against the cache budget"
+    print("✓ The memory-mapped sidecar is not counted as resident memory of the worker")
+
+
+def check_lru_eviction():
+    from app import vectorstore
+
+    tenants = ["lru-a", "lru-b", "lru-c"]
+    for tenant in tenants:
+        texts = [f"{tenant} chargeback rules, section {i}. " * 30 for i in range(20)]
+        vectorstore.index_texts(texts, [{"source": f"{tenant}.pdf"}] * len(texts), tenant=tenant)
+    paths = {vectorstore.get_faiss_path(t): t for t in tenants}
+    size = max(vectorstore.load_index(t).resident_bytes for t in tenants)
+
+    def search(tenant):
+        found = vectorstore.similarity_search_with_scores("chargeback rules", k=2, tenant=tenant)
+        assert found and {meta["source"] for _t, meta, _d in found} == {f"{tenant}.pdf"}
+
+    def resident():
+        state = vectorstore.resident_indexes()
+        assert state["resident_bytes"] <= state["budget_bytes"], state
+        return [paths[entry["path"]] for entry in state["indexes"] if entry["path"] in paths]
+
+    vectorstore._STORE_CACHE.clear()
+    # Room for two of the three tenants
+    os.environ["VECTOR_CACHE_MAX_MB"] = str(2.5 * size / (1024 * 1024))
+    try:
+        search("lru-a")
+        search("lru-b")
+        search("lru-a")
+        assert resident() == ["lru-b", "lru-a"]
+        search("lru-c")
+        assert resident() == ["lru-a", "lru-c"], f"expected lru-b evicted, resident: {resident()}"
+        print("✓ Past the memory budget the least recently searched tenant is evicted")
+
+        search("lru-b")
+        assert resident() == ["lru-c", "lru-b"]
+        print("✓ An evicted tenant is reloaded from disk on its next search")
+
+        os.environ["VECTOR_CACHE_MAX_MB"] = "0.001"
+        search("lru-a")
+        assert vectorstore.resident_indexes()["indexes"][-1]["path"] == vectorstore.get_faiss_path("lru-a")
+        assert len(vectorstore.resident_indexes()["indexes"]) == 1
+        print("✓ A tenant larger than the whole budget is still searchable and evicts every other index")
+    finally:
+        os.environ.pop("VECTOR_CACHE_MAX_MB")
+
+
+if __name__ == "__main__":
+    print("🔍 Testing per-tenant vector indexes...")
+    f = fakes.install(llm_latency_ms=0.0)
+    try:
+        check_reads_create_nothing(f["workdir"])
+        check_float32_sidecar()
+        check_lru_eviction()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print("\n✅ Tenant index checks passed!")